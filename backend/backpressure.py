@@ -0,0 +1,75 @@
+"""
+Backpressure for upstream LLM calls.
+Caps how many calls are in flight and how many requests may wait for a slot,
+so overload turns into fast 429/503 responses instead of a growing queue.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot get an upstream slot."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int = 1):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class InflightLimiter:
+    """
+    Async limiter for in-flight upstream calls.
+
+    - At most `max_inflight` calls run at once.
+    - At most `max_queued` requests wait for a slot; more are rejected with 429.
+    - A request that waits longer than `queue_timeout` seconds gets a 503.
+    """
+
+    def __init__(self, max_inflight: int = 32, max_queued: int = 64, queue_timeout: float = 10.0):
+        self.max_inflight = max(1, max_inflight)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        self.inflight = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one upstream slot for the duration of the block."""
+        if self._semaphore.locked():
+            if self.queued >= self.max_queued:
+                self.rejected_queue_full += 1
+                raise Overloaded(429, "Too many requests in flight, retry shortly")
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise Overloaded(503, "Upstream busy, timed out waiting for capacity")
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Current limiter state for health/metrics endpoints."""
+        return {
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "max_inflight": self.max_inflight,
+            "max_queued": self.max_queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
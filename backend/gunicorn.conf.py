@@ -0,0 +1,125 @@
+"""
+Gunicorn settings for the multi-worker production server.
+
+  python -m gunicorn -c gunicorn.conf.py main:app
+
+One uvicorn worker per CPU core by default. Each worker runs its own event
+loop, so CPU-bound request work (JSON, validation, LangChain overhead) spreads
+over every core instead of one.
+
+The app is preloaded in the master before forking by default. Imports and
+read-only module state are then loaded once and shared copy-on-write, and
+workers start faster. post_fork() gives each worker its own LLM connection
+pools, response cache, score exporter, telemetry spool, rate limiter and
+metrics. The Langfuse client is created lazily, on first use inside a worker.
+
+/metrics reports totals across workers: every worker writes its metrics to
+METRICS_MULTIPROC_DIR (a fresh temp dir by default) and the answering worker
+merges them; see metrics.py. Other workers' numbers lag by at most
+METRICS_SNAPSHOT_INTERVAL seconds. A stopping worker flushes its scores and
+seals its telemetry spool segment (app shutdown, and worker_exit), and the
+master archives its metrics so counters never drop.
+
+Graceful reload: `kill -HUP <master pid>` starts fresh workers and lets the old
+ones finish in-flight requests (up to GUNICORN_GRACEFUL_TIMEOUT). With preload
+the new workers fork from the already-loaded master, so deploy code changes
+with a restart (Render does this on every deploy) or set GUNICORN_PRELOAD=0.
+
+Tuning (environment):
+  WEB_CONCURRENCY            (default: CPU count) - worker processes
+  PORT                       (default 8000)
+  GUNICORN_PRELOAD           (default 1)   - load the app once in the master
+  GUNICORN_TIMEOUT           (default 120) - kill a worker silent for this long
+  GUNICORN_GRACEFUL_TIMEOUT  (default 30)  - drain time on reload/shutdown
+  GUNICORN_MAX_REQUESTS      (default 0)   - recycle a worker after N requests (0 = never)
+  GUNICORN_ACCESS_LOG        (default -)   - access log file, "-" for stdout, empty to disable
+  METRICS_MULTIPROC_DIR      (default: new temp dir) - shared metrics snapshots
+  METRICS_SNAPSHOT_INTERVAL  (default 5)   - seconds between a worker's snapshots
+"""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Shared modules live at the repo root (same lookup as main.py; local copies win)
+REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or multiprocessing.cpu_count()
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+
+# Every worker gets an equal share of the OpenAI rate limits (rate_limiter.py).
+# Set here, in the master, so workers inherit it before anything reads it.
+os.environ.setdefault("LLM_RATE_LIMIT_WORKERS", str(workers))
+# Workers share their metrics through this directory, so /metrics shows totals
+_METRICS_DIR_PREFIX = "llm-eval-metrics-"
+if not os.getenv("METRICS_MULTIPROC_DIR"):
+    os.environ["METRICS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix=_METRICS_DIR_PREFIX)
+
+
+def on_starting(server):
+    # Counters from a previous run must not add to this one
+    from metrics import clear_multiprocess_dir
+    clear_multiprocess_dir()
+
+
+def on_exit(server):
+    # The config is re-read on HUP, so recognise our temp dir by its name
+    directory = os.getenv("METRICS_MULTIPROC_DIR", "")
+    if os.path.basename(directory).startswith(_METRICS_DIR_PREFIX):
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def when_ready(server):
+    # The master replays the telemetry spool for all workers (if replay is enabled)
+    from telemetry_spool import get_spool
+    get_spool()
+    server.log.info("Serving with %d %s workers (preload=%s)", workers, worker_class, preload_app)
+
+
+def post_fork(server, worker):
+    """Give the new worker its own clients, background threads and metrics."""
+    import llm_clients
+    import metrics
+    import rate_limiter
+    import score_exporter
+    import telemetry_spool
+
+    llm_clients.get_registry().reset()
+    score_exporter.reset_score_exporter()
+    telemetry_spool.reset_spool(replay=False)
+    rate_limiter.reset_rate_limiter()
+    metrics.REGISTRY.clear()
+    metrics.start_snapshot_writer(float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5")))
+
+    # Preloaded: the app's clients were built in the master, so rebuild them here.
+    # Otherwise the worker imports main after this hook and builds its own.
+    app_module = sys.modules.get("main")
+    if app_module is not None:
+        app_module.init_process_clients()
+
+
+def worker_exit(server, worker):
+    # Uvicorn workers usually do this in the app's lifespan shutdown and then die
+    # by SIGTERM before this hook; it covers workers that exit through gunicorn
+    app_module = sys.modules.get("main")
+    if app_module is not None:
+        app_module.shutdown_process_clients()
+
+
+def child_exit(server, worker):
+    # Runs in the master, also for workers that were killed: keep their counts
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Load test for the /chat endpoint.
+
+By default this starts the API in-process with fake_llm.FakeChatModel
+(seeded latency distribution, no OpenAI key needed) and measures requests/sec at increasing concurrency.
+With a non-blocking request path, throughput should grow roughly linearly
+with concurrency until MAX_INFLIGHT_LLM_CALLS is reached.
+
+Usage:
+  python load_test.py                                  # fake LLM, default levels
+  python load_test.py --latency-ms 500 --concurrency 1 8 32
+  python load_test.py --latency-distribution lognormal --error-rate 0.02
+  python load_test.py --url http://localhost:8000      # hit a running server
+  python load_test.py --workers 1 4 --latency-ms 0     # gunicorn: 1 worker vs 4 workers
+
+With --workers the API runs under gunicorn (gunicorn.conf.py, uvicorn workers)
+once per worker count, and the throughput of each count is compared. Use a low
+--latency-ms to make the test CPU-bound, which is where extra workers pay off.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_server(
+    latency_ms: float,
+    latency_distribution: str = "fixed",
+    error_rate: float = 0.0,
+    seed: int = 0
+) -> str:
+    """Run main.app with a seeded fake LLM in a background thread; return its URL."""
+    # Fake backend for every client main builds, and no rate limiter: the
+    # harness measures the server, not the 500 requests/min OpenAI budget
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_RATE_LIMIT"] = "0"
+    import uvicorn
+    import main
+    from fake_llm import FakeChatModel
+
+    main.llm = FakeChatModel(
+        latency_ms=latency_ms,
+        latency_distribution=latency_distribution,
+        error_rate=error_rate,
+        seed=seed
+    )
+    # Queries repeat across levels; measure the LLM path, not the cache
+    main.response_cache = None
+    port = _free_port()
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("Stub server did not start")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def start_gunicorn(
+    workers: int,
+    latency_ms: float,
+    latency_distribution: str = "fixed",
+    error_rate: float = 0.0,
+    seed: int = 0
+):
+    """Run main:app under gunicorn with `workers` workers and the fake LLM; return (url, process)."""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        LLM_BACKEND="fake",
+        FAKE_LLM_LATENCY_MS=str(latency_ms),
+        FAKE_LLM_LATENCY_DISTRIBUTION=latency_distribution,
+        FAKE_LLM_ERROR_RATE=str(error_rate),
+        FAKE_LLM_SEED=str(seed),
+        RESPONSE_CACHE_ENABLED="0",
+        WEB_CONCURRENCY=str(workers),
+        PORT=str(port),
+        GUNICORN_ACCESS_LOG="",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "main:app"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                break
+        except httpx.HTTPError:
+            pass
+        if time.time() > deadline:
+            process.terminate()
+            raise RuntimeError("gunicorn did not start")
+        time.sleep(0.2)
+    # Let the remaining workers finish booting before measuring
+    time.sleep(1.0)
+    return url, process
+
+
+def stop_gunicorn(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def compare_workers(
+    worker_counts: List[int],
+    levels: List[int],
+    requests_per_level: int,
+    **fake_llm
+) -> Dict[int, List[Dict[str, float]]]:
+    """Run the load test against gunicorn once per worker count; print rps side by side."""
+    results: Dict[int, List[Dict[str, float]]] = {}
+    for workers in worker_counts:
+        print(f"gunicorn, {workers} worker(s):")
+        url, process = start_gunicorn(workers, **fake_llm)
+        try:
+            results[workers] = asyncio.run(run_load_test(url, levels, requests_per_level))
+        finally:
+            stop_gunicorn(process)
+        print()
+
+    baseline = worker_counts[0]
+    print("Requests/sec by worker count (speedup vs %d worker(s)):" % baseline)
+    print("  concurrency " + "".join(f"{f'{w} workers':>22}" for w in worker_counts))
+    for i, concurrency in enumerate(levels):
+        cells = []
+        for workers in worker_counts:
+            rps = results[workers][i]["rps"]
+            base = results[baseline][i]["rps"]
+            cells.append(f"{rps:10.1f} ({rps / base if base else 0:4.2f}x)")
+        print(f"  {concurrency:<11} " + "".join(f"{cell:>22}" for cell in cells))
+    return results
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(url: str, concurrency: int, total_requests: int) -> Dict[str, float]:
+    """Send total_requests to /chat with `concurrency` workers."""
+    latencies: List[float] = []
+    status_counts: Dict[int, int] = {}
+    remaining = iter(range(total_requests))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+
+        async def worker():
+            for i in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/chat", json={"message": f"Load test query {i}"})
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                latencies.append(time.perf_counter() - start)
+                status_counts[status] = status_counts.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "elapsed_s": elapsed,
+        "rps": total_requests / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+        "ok": status_counts.get(200, 0),
+        "errors": total_requests - status_counts.get(200, 0),
+    }
+
+
+async def run_load_test(url: str, levels: List[int], requests_per_level: int) -> List[Dict[str, float]]:
+    results = []
+    for concurrency in levels:
+        total = max(requests_per_level, concurrency)
+        result = await run_level(url, concurrency, total)
+        results.append(result)
+        print(
+            f"  concurrency={concurrency:<4} rps={result['rps']:8.1f}  "
+            f"p50={result['p50_ms']:7.1f}ms  p95={result['p95_ms']:7.1f}ms  "
+            f"p99={result['p99_ms']:7.1f}ms  errors={result['errors']}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the /chat endpoint.")
+    parser.add_argument("--url", help="Target a running server instead of the in-process stub")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake LLM latency (median for lognormal)")
+    parser.add_argument("--latency-distribution", default="fixed",
+                        help="fixed, uniform, normal, lognormal or exponential")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM calls that raise a 429")
+    parser.add_argument("--seed", type=int, default=0, help="Fake LLM seed (same seed, same run)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="Run under gunicorn with each of these worker counts and compare (e.g. 1 4)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Backend Load Test")
+    print("=" * 60)
+
+    if args.workers:
+        print(f"Fake LLM latency: {args.latency_ms:.0f}ms ({args.latency_distribution}), "
+              f"{os.cpu_count()} CPU(s)\n")
+        compare_workers(
+            args.workers, args.concurrency, args.requests,
+            latency_ms=args.latency_ms, latency_distribution=args.latency_distribution,
+            error_rate=args.error_rate, seed=args.seed,
+        )
+        sys.exit(0)
+
+    url = args.url or start_stub_server(args.latency_ms, args.latency_distribution, args.error_rate, args.seed)
+    if not args.url:
+        print(f"Fake LLM latency: {args.latency_ms:.0f}ms ({args.latency_distribution}), "
+              f"error rate {args.error_rate:.0%}")
+    print(f"API URL: {url}\n")
+
+    asyncio.run(run_load_test(url, args.concurrency, args.requests))
@@ -10,27 +10,68 @@ Setup:
 5. Deploy on Render.com
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from pathlib import Path
+import json
 import os
+import sys
+import uuid
+
+# Shared modules (response cache, ...) live at the repo root. When deploying
+# the backend on its own, copy them next to main.py - local copies win.
+REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from backpressure import InflightLimiter, Overloaded
+from eval_system import LLMJudge
+from llm_clients import get_chat_model, get_registry, llm_available
+from metrics import REGISTRY, record_llm_usage, render_metrics, stage, write_snapshot
+from online_eval import evaluator_from_env
+from rate_limiter import get_rate_limiter, limited_ainvoke, limited_astream
+from response_cache import cache_from_env, make_cache_key
+from score_exporter import shutdown_score_exporter
+from singleflight import SingleFlight
+from telemetry_spool import close_spool, generation_events, get_spool, spool_langfuse_sdk
 
 # Make Langfuse optional for local testing (Python 3.14 compatibility issue)
 LANGFUSE_AVAILABLE = False
 try:
     import langfuse
-    from langfuse.decorators import observe
+    from langfuse.decorators import observe, langfuse_context
     LANGFUSE_AVAILABLE = True
 except (ImportError, Exception) as e:
-    # Create a no-op decorator if Langfuse is not available
+    langfuse_context = None
+    
+    # Create a no-op decorator if Langfuse is not available.
+    # Returning the function unchanged keeps async handlers awaitable.
     def observe(func=None, **kwargs):
         if func is None:
             return lambda f: f
         return func
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # @observe traces go to the spool too; done here, in the serving process,
+    # because configuring the SDK starts its threads (not in a preloading master)
+    if telemetry_spool and LANGFUSE_AVAILABLE:
+        spool_langfuse_sdk(telemetry_spool)
+    yield
+    # Give sampled responses still queued a chance to be judged
+    if online_evaluator:
+        await online_evaluator.stop()
+    shutdown_process_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS for Streamlit frontend
 app.add_middleware(
@@ -41,8 +82,90 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0) if os.getenv("OPENAI_API_KEY") else None
+MODEL_NAME = "gpt-4o-mini"
+MOCK_RESPONSE = "[Mock] Research summary about the query. This is a placeholder response."
+
+# Per-process clients, built by init_process_clients()
+llm = None
+telemetry_spool = None
+response_cache = None
+online_evaluator = None
+chat_flights = None
+limiter = None
+_langfuse_client = None
+
+
+def init_process_clients():
+    """
+    Build the state that must not be shared between processes: the LLM and
+    its connection pools, the response cache (a SQLite connection can't cross
+    a fork), the telemetry spool, the online evaluator, the coalescing group
+    and the in-flight limiter. Runs at import, and again in each gunicorn
+    worker after fork when the app is preloaded (see gunicorn.conf.py).
+    """
+    global llm, telemetry_spool, response_cache, online_evaluator, chat_flights, limiter, _langfuse_client
+    
+    # Initialize LLM on the shared keep-alive connection pool
+    llm = get_chat_model(MODEL_NAME, temperature=0) if llm_available() else None
+    
+    # Local spool for stream traces when TELEMETRY_SPOOL_DIR is set (replayed later)
+    telemetry_spool = get_spool()
+    
+    # LRU+TTL response cache (optional SQLite tier via RESPONSE_CACHE_SQLITE_PATH)
+    response_cache = cache_from_env()
+    
+    # Background LLM-as-judge on a sample of live traffic (ONLINE_EVAL_MODE=rate|hash)
+    online_evaluator = evaluator_from_env(lambda: LLMJudge(llm=llm)) if llm else None
+    
+    # Identical concurrent /chat queries share one upstream call (REQUEST_COALESCING=0 disables)
+    chat_flights = SingleFlight("chat") if os.getenv("REQUEST_COALESCING", "1") != "0" else None
+    
+    # Cap on concurrent upstream LLM calls; excess requests get 429/503
+    limiter = InflightLimiter(
+        max_inflight=int(os.getenv("MAX_INFLIGHT_LLM_CALLS", "32")),
+        max_queued=int(os.getenv("MAX_QUEUED_REQUESTS", "64")),
+        queue_timeout=float(os.getenv("QUEUE_TIMEOUT_SECONDS", "10")),
+    )
+    
+    # Rebuilt on first use in this process
+    _langfuse_client = None
+
+
+init_process_clients()
+
+
+def shutdown_process_clients():
+    """
+    Flush queued scores, seal this process's telemetry spool segment and
+    leave a final metrics snapshot. Runs at app shutdown: uvicorn workers
+    under gunicorn die by re-raising SIGTERM, so atexit handlers never run
+    there. Safe to call more than once.
+    """
+    shutdown_score_exporter()
+    close_spool()
+    write_snapshot()
+
+
+def get_langfuse_client():
+    """
+    Low-level client for traces that @observe can't capture (streamed responses).
+    Created on first use rather than at import: the SDK starts background
+    threads, which a preloading gunicorn master must not own when it forks.
+    """
+    global _langfuse_client
+    if _langfuse_client is None and LANGFUSE_AVAILABLE:
+        try:
+            _langfuse_client = langfuse.Langfuse()
+        except Exception:
+            _langfuse_client = False
+    return _langfuse_client or None
+
+
+PROMPT_TEMPLATE = """You are a research assistant. Answer the following query concisely and accurately.
+
+Query: {query}
+
+Provide a clear, factual answer."""
 
 
 class Query(BaseModel):
@@ -50,34 +173,281 @@ class Query(BaseModel):
 
 
 @observe()
-def research_assistant(query: str) -> str:
-    """Research assistant - automatically traced by Langfuse (if available)."""
+async def research_assistant(query: str) -> str:
+    """
+    Research assistant - automatically traced by Langfuse (if available).
+    Uses llm.ainvoke so a slow upstream call never blocks the event loop;
+    Langfuse's @observe keeps trace context per task, so concurrent
+    requests get separate traces.
+    """
     if not llm:
-        return "[Mock] Research summary about the query. This is a placeholder response."
+        return MOCK_RESPONSE
     
-    prompt = f"""You are a research assistant. Answer the following query concisely and accurately.
-
-Query: {query}
+    cache_key = _cache_key(query)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        _submit_online_eval(_current_trace_id(), query, cached)
+        return cached
+    
+    if chat_flights:
+        answer = await chat_flights.ado(_flight_key(query), lambda: _generate(query, cache_key))
+    else:
+        answer = await _generate(query, cache_key)
+    _submit_online_eval(_current_trace_id(), query, answer)
+    return answer
 
-Provide a clear, factual answer."""
 
-    messages = [HumanMessage(content=prompt)]
-    response = llm.invoke(messages)
+async def _generate(query: str, cache_key: Optional[str]) -> str:
+    """One upstream call; concurrent identical queries share it via chat_flights."""
+    messages = [HumanMessage(content=PROMPT_TEMPLATE.format(query=query))]
+    async with limiter.slot():
+        with stage("generation"):
+            response = await limited_ainvoke(llm, messages, priority="interactive")
+    record_llm_usage("generation", response, MODEL_NAME)
     
+    _cache_set(cache_key, response.content)
     return response.content
 
 
+def _flight_key(query: str) -> str:
+    """Same normalization as the response cache: query, model, temperature, prompt."""
+    return make_cache_key(
+        query,
+        getattr(llm, "model_name", MODEL_NAME),
+        getattr(llm, "temperature", None),
+        PROMPT_TEMPLATE
+    )
+
+
+def _current_trace_id() -> Optional[str]:
+    if not langfuse_context:
+        return None
+    try:
+        return langfuse_context.get_current_trace_id()
+    except Exception:
+        return None
+
+
+def _submit_online_eval(trace_id: Optional[str], query: str, answer: str):
+    """Hand the answer to the background judge if it is sampled (never blocks)."""
+    if not online_evaluator or not answer:
+        return
+    try:
+        online_evaluator.submit(trace_id, query, answer)
+    except Exception:
+        # Online evaluation must never break a response
+        pass
+
+
+def _cache_key(query: str) -> Optional[str]:
+    if not response_cache:
+        return None
+    return _flight_key(query)
+
+
+def _cache_get(key: Optional[str]) -> Optional[str]:
+    """Cached answer or None; marks the current Langfuse observation with the outcome."""
+    if not key:
+        return None
+    answer = response_cache.get(key)
+    if langfuse_context:
+        try:
+            langfuse_context.update_current_observation(metadata={"cache_hit": answer is not None})
+            if answer is not None:
+                langfuse_context.update_current_trace(tags=["cache_hit"])
+        except Exception:
+            pass
+    return answer
+
+
+def _cache_set(key: Optional[str], answer: str):
+    if key and answer:
+        response_cache.set(key, answer)
+
+
+async def stream_research_assistant(query: str, trace_metadata: Optional[dict] = None) -> AsyncIterator[str]:
+    """
+    Yield answer tokens as the LLM produces them (llm.astream).
+    Cache hits are yielded as a single chunk; trace_metadata, if given,
+    is filled with the cache outcome for the Langfuse generation.
+    """
+    trace_metadata = trace_metadata if trace_metadata is not None else {}
+    if not llm:
+        for word in MOCK_RESPONSE.split(" "):
+            yield word + " "
+        return
+    
+    cache_key = _cache_key(query)
+    cached = response_cache.get(cache_key) if cache_key else None
+    trace_metadata["cache_hit"] = cached is not None
+    if cached is not None:
+        yield cached
+        return
+    
+    parts = []
+    messages = [HumanMessage(content=PROMPT_TEMPLATE.format(query=query))]
+    async for chunk in limited_astream(llm, messages, priority="interactive"):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+    _cache_set(cache_key, "".join(parts))
+
+
+def _trace_stream(
+    query: str,
+    output: str,
+    start_time: datetime,
+    first_token_time: Optional[datetime],
+    error: Optional[str] = None,
+    metadata: Optional[dict] = None,
+    trace_id: Optional[str] = None
+):
+    """Record a streamed answer in Langfuse with its full output and time-to-first-token."""
+    langfuse_client = None if telemetry_spool else get_langfuse_client()
+    if not langfuse_client and not telemetry_spool:
+        return
+    end_time = datetime.now(timezone.utc)
+    ttft_ms = (first_token_time - start_time).total_seconds() * 1000 if first_token_time else None
+    generation = dict(
+        name="research_assistant_stream",
+        model=MODEL_NAME,
+        input=query,
+        output=output,
+        start_time=start_time,
+        completion_start_time=first_token_time,
+        end_time=end_time,
+        metadata={"time_to_first_token_ms": ttft_ms, "streamed": True, **(metadata or {})},
+        level="ERROR" if error else "DEFAULT",
+        status_message=error,
+        trace_id=trace_id
+    )
+    try:
+        if telemetry_spool:
+            telemetry_spool.append(generation_events(**generation))
+        else:
+            langfuse_client.generation(**generation)
+    except Exception:
+        # Tracing must never break the response stream
+        pass
+
+
+def _observe_stream(start_time: datetime, first_token_time: Optional[datetime]):
+    """Stream duration and time-to-first-token histograms for /metrics."""
+    REGISTRY.histogram(
+        "llm_eval_stage_duration_seconds", "Time spent per pipeline stage", stage="generation_stream"
+    ).observe((datetime.now(timezone.utc) - start_time).total_seconds())
+    if first_token_time:
+        REGISTRY.histogram(
+            "llm_eval_time_to_first_token_seconds", "Time to first streamed token"
+        ).observe((first_token_time - start_time).total_seconds())
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that releases its upstream slot however the response
+    ends. The body generator's own cleanup never runs if sending fails before
+    iteration starts (client gone before headers), which would leak the slot.
+    """
+    
+    def __init__(self, content, slot: AsyncExitStack, **kwargs):
+        super().__init__(content, **kwargs)
+        self._slot = slot
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._slot.aclose()
+
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    """Map a limiter rejection to an HTTP error with Retry-After."""
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.detail,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
 @app.post("/chat")
 async def chat(query: Query):
     """API endpoint for chat."""
-    response = research_assistant(query.message)
+    try:
+        response = await research_assistant(query.message)
+    except Overloaded as e:
+        raise _overloaded(e)
     return {"response": response}
 
 
+@app.post("/chat/stream")
+async def chat_stream(query: Query):
+    """
+    Streaming chat endpoint. Returns newline-delimited JSON events:
+      {"type": "token", "content": "..."}   one per chunk
+      {"type": "done", "response": "...", "time_to_first_token_ms": 123.4}
+      {"type": "error", "detail": "..."}    if the upstream call fails mid-stream
+    """
+    # Take the upstream slot before responding so overload is still a 429/503;
+    # the response releases it even if the body never starts
+    slot = AsyncExitStack()
+    try:
+        await slot.enter_async_context(limiter.slot())
+    except Overloaded as e:
+        raise _overloaded(e)
+    
+    async def events() -> AsyncIterator[str]:
+        start_time = datetime.now(timezone.utc)
+        first_token_time = None
+        parts = []
+        error = None
+        trace_metadata = {}
+        # Known up front so online-eval scores land on the same trace
+        trace_id = str(uuid.uuid4()) if (telemetry_spool or get_langfuse_client()) else None
+        try:
+            async for token in stream_research_assistant(query.message, trace_metadata):
+                if first_token_time is None:
+                    first_token_time = datetime.now(timezone.utc)
+                parts.append(token)
+                yield json.dumps({"type": "token", "content": token}) + "\n"
+            
+            ttft_ms = (first_token_time - start_time).total_seconds() * 1000 if first_token_time else None
+            yield json.dumps({"type": "done", "response": "".join(parts), "time_to_first_token_ms": ttft_ms}) + "\n"
+        except Exception as e:
+            error = str(e)
+            yield json.dumps({"type": "error", "detail": error}) + "\n"
+        finally:
+            await slot.aclose()
+            _observe_stream(start_time, first_token_time)
+            _trace_stream(query.message, "".join(parts), start_time, first_token_time, error, trace_metadata, trace_id)
+            if not error:
+                _submit_online_eval(trace_id, query.message, "".join(parts))
+    
+    return _SlotStreamingResponse(events(), slot, media_type="application/x-ndjson")
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint for Render."""
-    return {"status": "ok", "service": "research-assistant-api"}
+    return {
+        "status": "ok",
+        "service": "research-assistant-api",
+        "upstream": limiter.stats(),
+        "llm_pool": get_registry().stats(),
+        "cache": response_cache.stats() if response_cache else {"enabled": False},
+        "coalescing": chat_flights.stats() if chat_flights else {"enabled": False},
+        "telemetry_spool": telemetry_spool.stats() if telemetry_spool else {"enabled": False},
+        "online_eval": online_evaluator.stats() if online_evaluator else {"enabled": False},
+        "rate_limit": get_rate_limiter(llm).stats() if get_rate_limiter(llm) else {"enabled": False}
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics: per-stage latency histograms, tokens and estimated cost.
+    Under gunicorn these are totals across all workers (METRICS_MULTIPROC_DIR).
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/")
@@ -87,7 +457,9 @@ async def root():
         "message": "Research Assistant API",
         "endpoints": {
             "chat": "/chat (POST)",
-            "health": "/health (GET)"
+            "chat_stream": "/chat/stream (POST, NDJSON)",
+            "health": "/health (GET)",
+            "metrics": "/metrics (GET, Prometheus)"
         }
     }
 
@@ -2,8 +2,16 @@
 """
 Test script for the backend API
 Run this to verify your API is working locally
+
+The backpressure tests need no server: they drive main.app in-process with a
+slow FakeChatModel and a tiny InflightLimiter.
 """
 
+import asyncio
+import os
+from contextlib import contextmanager
+
+import httpx
 import requests
 import json
 
@@ -38,6 +46,79 @@ def test_chat():
         print(f"❌ Error: {e}")
         return False
 
+def _load_app():
+    """Import main.py against the fake LLM without leaking env to other tests."""
+    overrides = {"LLM_BACKEND": "fake", "LLM_RATE_LIMIT": "0", "LANGFUSE_PUBLIC_KEY": "",
+                 "LANGFUSE_SECRET_KEY": "", "ONLINE_EVAL_RATE": "0"}
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        import main
+        main.init_process_clients()
+        return main
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@contextmanager
+def _overload_setup(max_queued: int, queue_timeout: float, response_cache=None):
+    """One upstream slot held for 300ms per call, no coalescing, optional cache."""
+    main = _load_app()
+    from backpressure import InflightLimiter
+    from fake_llm import FakeChatModel    # repo root, on sys.path once main is imported
+
+    saved = {name: getattr(main, name) for name in ("llm", "limiter", "chat_flights", "response_cache")}
+    main.llm = FakeChatModel(latency_ms=300, latency_distribution="fixed")
+    main.limiter = InflightLimiter(max_inflight=1, max_queued=max_queued, queue_timeout=queue_timeout)
+    main.chat_flights = None
+    main.response_cache = response_cache
+    try:
+        yield main
+    finally:
+        for name, value in saved.items():
+            setattr(main, name, value)
+
+
+async def _post_all(main, messages):
+    """POST each message to /chat concurrently, in order; return the responses."""
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        tasks = []
+        for message in messages:
+            tasks.append(asyncio.create_task(client.post("/chat", json={"message": message})))
+            await asyncio.sleep(0.02)    # let each request reach the limiter before the next
+        return await asyncio.gather(*tasks)
+
+
+def test_overload_returns_429_and_503():
+    # The first call holds the slot, the second waits in the queue until it
+    # times out, the third finds the queue full
+    with _overload_setup(max_queued=1, queue_timeout=0.1) as main:
+        responses = asyncio.run(_post_all(main, ["first", "second", "third"]))
+        stats = main.limiter.stats()
+    assert [response.status_code for response in responses] == [200, 503, 429]
+    assert all(response.headers.get("Retry-After") == "1" for response in responses[1:])
+    assert (stats["rejected_timeout"], stats["rejected_queue_full"], stats["inflight"]) == (1, 1, 0), stats
+
+
+def test_cache_hits_skip_the_limiter():
+    _load_app()
+    from response_cache import MemoryTier, ResponseCache
+
+    with _overload_setup(max_queued=0, queue_timeout=0.1, response_cache=ResponseCache([MemoryTier()])) as main:
+        main.response_cache.set(main._cache_key("cached"), "Cached answer.")
+        # The slot is busy and nothing may queue: only the cached query gets through
+        responses = asyncio.run(_post_all(main, ["first", "cached", "uncached"]))
+        stats = main.limiter.stats()
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[1].json()["response"] == "Cached answer."
+    assert stats["rejected_queue_full"] == 1, stats
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("Backend API Test")
@@ -50,6 +131,15 @@ if __name__ == "__main__":
     health_ok = test_health()
     chat_ok = test_chat()
     
+    print("\nTesting backpressure in-process (no server needed)...")
+    for test in (test_overload_returns_429_and_503, test_cache_hits_skip_the_limiter):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            chat_ok = False
+            print(f"❌ {test.__name__}: {e}")
+    
     print("\n" + "=" * 60)
     if health_ok and chat_ok:
         print("✅ All tests passed!")
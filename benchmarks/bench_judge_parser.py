@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: judge output parsing.
+Compares the old nested-brace regex parser with the tolerant JSON scanner
+(extract_json) on small, fenced, nested and very large judge outputs, and
+reports time per parse and whether dimension scores survived.
+
+Usage:
+  python benchmarks/bench_judge_parser.py
+  python benchmarks/bench_judge_parser.py --repeat 2000
+"""
+
+import argparse
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from eval_system import LLMJudge  # noqa: E402
+from score_exporter import ScoreExporter  # noqa: E402
+
+VERDICT = {
+    "scores": {"relevance": 4, "accuracy": 5, "completeness": 3, "grounding": 4},
+    "reasoning": "Covers grounding and retrieval; misses evaluation details.",
+    "overall": 4.0,
+}
+
+
+def legacy_parse_scores(text: str) -> dict:
+    """The regex parser judge outputs were previously parsed with."""
+    json_match = re.search(r'\{[^{}]*"scores"[^{}]*\{[^{}]*\}[^{}]*\}', text, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except json.JSONDecodeError:
+            pass
+    overall_match = re.search(r'"overall":\s*(\d+\.?\d*)', text)
+    return {"scores": {}, "overall": float(overall_match.group(1)) if overall_match else 0.0}
+
+
+def make_cases() -> dict:
+    nested = dict(VERDICT, details={"relevance": {"evidence": ["a", "b"]}})
+    long_reasoning = dict(VERDICT, reasoning="The response {discusses} retrieval. " * 2000)
+    return {
+        "plain": json.dumps(VERDICT),
+        "fenced + trailing text": "Here is my evaluation:\n```json\n" + json.dumps(VERDICT, indent=2) + "\n```\nLet me know!",
+        "nested objects": json.dumps(nested),
+        "70KB reasoning": json.dumps(long_reasoning),
+        "100KB no JSON": "I think it is good {but} not {great}. " * 2500,
+    }
+
+
+def make_batch_output(items: int) -> str:
+    evaluations = [dict(VERDICT, id=str(i)) for i in range(1, items + 1)]
+    return "```json\n" + json.dumps({"evaluations": evaluations}) + "\n```"
+
+
+def bench(fn, text: str, repeat: int) -> float:
+    """Microseconds per call."""
+    return timeit.timeit(lambda: fn(text), number=repeat) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark judge output parsing.")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    judge = LLMJudge(llm=object(), exporter=ScoreExporter())
+
+    print("=" * 72)
+    print("Judge Output Parsing")
+    print("=" * 72)
+    print(f"{'case':<24}{'legacy (us)':>14}{'scanner (us)':>14}   scores kept (legacy/scanner)")
+    for name, text in make_cases().items():
+        legacy_us = bench(legacy_parse_scores, text, args.repeat)
+        scanner_us = bench(judge._parse_scores, text, args.repeat)
+        legacy_ok = bool(legacy_parse_scores(text).get("scores"))
+        scanner_ok = bool(judge._parse_scores(text).get("scores"))
+        print(f"{name:<24}{legacy_us:>14.1f}{scanner_us:>14.1f}   {legacy_ok}/{scanner_ok}")
+
+    print()
+    for items in (8, 64, 512):
+        text = make_batch_output(items)
+        scanner_us = bench(judge._parse_batch, text, max(1, args.repeat // 10))
+        parsed = len(judge._parse_batch(text))
+        print(f"batch of {items:<4} ({len(text) // 1024}KB): {scanner_us:>10.1f} us, {parsed}/{items} verdicts")
+    print("=" * 72)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Diff two benchmark result files from run_benchmarks.py.
+A metric regresses when it moves in its "worse" direction by more than the
+threshold (relative). A metric whose baseline is 0, such as an error count,
+regresses on any move in its worse direction. Exits 1 if anything regressed, so it can gate CI.
+
+Usage:
+  python benchmarks/compare.py baseline.json current.json
+  python benchmarks/compare.py baseline.json current.json --threshold 0.10
+"""
+
+import argparse
+import json
+import math
+import sys
+from typing import Any, Dict, List
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.15) -> List[Dict[str, Any]]:
+    """One row per metric present in both runs."""
+    rows = []
+    for bench, result in current["benchmarks"].items():
+        old_metrics = baseline.get("benchmarks", {}).get(bench, {}).get("metrics", {})
+        for name, new in result.get("metrics", {}).items():
+            old = old_metrics.get(name)
+            if old is None:
+                continue
+            if old["value"]:
+                change = (new["value"] - old["value"]) / old["value"]
+            else:
+                # No relative change from zero (error counts): any move counts in full
+                change = math.copysign(math.inf, new["value"]) if new["value"] else 0.0
+            worse = -change if new["better"] == "higher" else change
+            rows.append({
+                "benchmark": bench,
+                "metric": name,
+                "unit": new["unit"],
+                "baseline": old["value"],
+                "current": new["value"],
+                "change": change,
+                "regression": worse > threshold,
+                "improvement": -worse > threshold,
+            })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    print(f"{'benchmark':<11}{'metric':<40}{'baseline':>14}{'current':>14}{'change':>10}")
+    for row in rows:
+        flag = "  ❌" if row["regression"] else ("  ✅" if row["improvement"] else "")
+        print(
+            f"{row['benchmark']:<11}{row['metric']:<40}{row['baseline']:>14.4g}"
+            f"{row['current']:>14.4g}{row['change']:>+10.1%}{flag}"
+        )
+    regressions = sum(1 for row in rows if row["regression"])
+    print(f"\n{regressions} regression(s) across {len(rows)} metrics")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    rows = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    print_comparison(rows)
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
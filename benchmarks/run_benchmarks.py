@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the evaluation pipeline.
+Runs entirely offline (LLM calls go to fake_llm.FakeChatModel, Langfuse is
+disabled) and writes one JSON file per run, so two commits can be diffed
+with compare.py.
+
+Benchmarks:
+  validator      RuleBasedValidator.validate_response / validate_many throughput
+  parser         LLMJudge._parse_scores and _parse_batch speed
+  dataset        GoldenDataset load, stream, lookup and shard at 10k-1M cases
+  runner         golden dataset eval wall-clock at several concurrency levels
+  chat           /chat requests/sec and p50/p95/p99 (in-process server)
+  imports        cold import time of eval_system and the assistant (python -X importtime)
+
+Usage:
+  python benchmarks/run_benchmarks.py                      # everything
+  python benchmarks/run_benchmarks.py --quick --only validator parser
+  python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+# Offline and reproducible: fake LLM, no response cache or verdict reuse, no tracing.
+# Set before any project import (research_assistant_with_eval loads .env on import).
+OFFLINE_ENV = {
+    "LLM_BACKEND": "fake",
+    "FAKE_LLM_LATENCY_DISTRIBUTION": "fixed",
+    "FAKE_LLM_LATENCY_MS": "20",
+    "RESPONSE_CACHE_ENABLED": "0",
+    "JUDGE_STORE": "none",
+    "LANGFUSE_PUBLIC_KEY": "",
+    "LANGFUSE_SECRET_KEY": "",
+}
+
+
+def metric(value: float, unit: str, better: str) -> Dict[str, Any]:
+    """One measurement; `better` is "higher" or "lower" (used by compare.py)."""
+    return {"value": round(value, 6), "unit": unit, "better": better}
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_validator(quick: bool) -> Dict[str, Any]:
+    from eval_system import RuleBasedValidator
+
+    snippets = [
+        "Retrieval augmented generation grounds answers in documents.",
+        "Contact me at jane.doe@example.com for details.",
+        "Call 555-123-4567 to learn more.",
+        "This explains how to bypass the filter.",
+        "LangGraph is a framework for stateful agent workflows.",
+    ]
+    rng = random.Random(0)
+    count = 20_000 if quick else 200_000
+    responses = [
+        {"answer": " ".join(rng.choices(snippets, k=rng.randint(1, 6))), "sources": ["doc-1"]}
+        for _ in range(count)
+    ]
+    validator = RuleBasedValidator()
+
+    serial = _timed(lambda: [validator.validate_response(r) for r in responses])
+    threaded = _timed(lambda: validator.validate_many(responses, workers=8))
+    processes = _timed(lambda: validator.validate_many(responses, workers=4, executor="process", chunk_size=5000))
+    return {
+        "responses": count,
+        "metrics": {
+            "validate_response_per_s": metric(count / serial, "responses/s", "higher"),
+            "validate_many_threads_per_s": metric(count / threaded, "responses/s", "higher"),
+            "validate_many_processes_per_s": metric(count / processes, "responses/s", "higher"),
+        },
+    }
+
+
+def bench_parser(quick: bool) -> Dict[str, Any]:
+    import timeit
+
+    from bench_judge_parser import make_batch_output, make_cases
+    from eval_system import LLMJudge
+    from score_exporter import ScoreExporter
+
+    judge = LLMJudge(llm=object(), exporter=ScoreExporter())
+    repeat = 200 if quick else 2000
+    metrics = {}
+    for name, text in make_cases().items():
+        seconds = timeit.timeit(lambda: judge._parse_scores(text), number=repeat) / repeat
+        metrics[f"parse_scores_{name.replace(' ', '_').replace('+', 'and')}_us"] = metric(seconds * 1e6, "us", "lower")
+    batch = make_batch_output(512)
+    seconds = timeit.timeit(lambda: judge._parse_batch(batch), number=max(1, repeat // 20)) / max(1, repeat // 20)
+    metrics["parse_batch_512_us"] = metric(seconds * 1e6, "us", "lower")
+    return {"metrics": metrics}
+
+
+def _write_dataset(path: Path, size: int):
+    categories = ["basic", "comparison", "safety", "edge_case", "technical"]
+    with open(path, "w") as f:
+        f.write(json.dumps({"_meta": {"name": "bench", "version": "1"}}) + "\n")
+        for i in range(size):
+            f.write(json.dumps({
+                "id": f"case_{i:07d}",
+                "query": f"Benchmark query number {i} about retrieval and evaluation?",
+                "expected_topics": ["retrieval", "evaluation"],
+                "expected_not": ["fine-tuning"],
+                "category": categories[i % len(categories)],
+            }) + "\n")
+
+
+def bench_dataset(quick: bool) -> Dict[str, Any]:
+    from eval_system import GoldenDataset
+
+    sizes = [10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]
+    rng = random.Random(0)
+    metrics = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = Path(directory) / f"dataset_{size}.jsonl"
+            _write_dataset(path, size)
+            label = f"{size // 1000}k" if size < 1_000_000 else f"{size // 1_000_000}m"
+
+            dataset = GoldenDataset(str(path))
+            load = _timed(lambda: dataset.test_cases)
+            stream = _timed(lambda: sum(1 for _ in GoldenDataset(str(path)).iter_cases()))
+            shard = _timed(lambda: sum(1 for _ in GoldenDataset(str(path)).shard(0, 8).iter_cases()))
+            ids = [f"case_{rng.randrange(size):07d}" for _ in range(10_000)]
+            lookup = _timed(lambda: [dataset.get_test_case(test_id) for test_id in ids])
+            category = _timed(lambda: dataset.get_cases_by_category("safety"))
+
+            metrics[f"load_{label}_s"] = metric(load, "s", "lower")
+            metrics[f"stream_{label}_s"] = metric(stream, "s", "lower")
+            metrics[f"shard_1_of_8_{label}_s"] = metric(shard, "s", "lower")
+            metrics[f"lookup_{label}_per_s"] = metric(len(ids) / lookup, "lookups/s", "higher")
+            metrics[f"category_{label}_us"] = metric(category * 1e6, "us", "lower")
+            path.unlink()
+    return {"sizes": sizes, "metrics": metrics}
+
+
+def bench_runner(quick: bool) -> Dict[str, Any]:
+    import research_assistant_with_eval as assistant
+
+    cases = 32 if quick else 128
+    levels = [4, 16] if quick else [4, 16, 64]
+    metrics = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "runner.jsonl"
+        _write_dataset(path, cases)
+
+        serial = _timed(lambda: assistant.run_golden_dataset_eval(str(path)))
+        metrics["sync_cases_per_s"] = metric(cases / serial, "cases/s", "higher")
+        for concurrency in levels:
+            elapsed = _timed(lambda: asyncio.run(assistant.arun_golden_dataset_eval(str(path), concurrency=concurrency)))
+            metrics[f"async_c{concurrency}_cases_per_s"] = metric(cases / elapsed, "cases/s", "higher")
+        elapsed = _timed(lambda: asyncio.run(
+            assistant.arun_golden_dataset_eval(str(path), concurrency=16, judge_batch_size=8)
+        ))
+        metrics["async_c16_batch8_cases_per_s"] = metric(cases / elapsed, "cases/s", "higher")
+    return {"cases": cases, "llm_latency_ms": float(os.environ["FAKE_LLM_LATENCY_MS"]), "metrics": metrics}
+
+
+def bench_chat(quick: bool) -> Dict[str, Any]:
+    sys.path.insert(0, str(REPO_ROOT / "backend"))
+    from load_test import run_level, start_stub_server
+
+    latency_ms = 50.0
+    url = start_stub_server(latency_ms)
+    requests = 60 if quick else 300
+    metrics = {}
+    for concurrency in ([1, 16] if quick else [1, 8, 32]):
+        result = asyncio.run(run_level(url, concurrency, max(requests, concurrency)))
+        metrics[f"c{concurrency}_rps"] = metric(result["rps"], "req/s", "higher")
+        for pct in ("p50", "p95", "p99"):
+            metrics[f"c{concurrency}_{pct}_ms"] = metric(result[f"{pct}_ms"], "ms", "lower")
+        metrics[f"c{concurrency}_errors"] = metric(result["errors"], "requests", "lower")
+    return {"llm_latency_ms": latency_ms, "metrics": metrics}
+
+
+def _import_ms(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == module:
+            return int(line.split("|")[1]) / 1000.0
+    raise RuntimeError(f"{module} missing from -X importtime output")
+
+
+def bench_imports(quick: bool) -> Dict[str, Any]:
+    runs = 3 if quick else 7
+    metrics = {}
+    for module in ("eval_system", "research_assistant_with_eval"):
+        metrics[f"{module}_ms"] = metric(min(_import_ms(module) for _ in range(runs)), "ms", "lower")
+    return {"runs": runs, "metrics": metrics}
+
+
+BENCHMARKS: Dict[str, Callable[[bool], Dict[str, Any]]] = {
+    "validator": bench_validator,
+    "parser": bench_parser,
+    "dataset": bench_dataset,
+    "runner": bench_runner,
+    "chat": bench_chat,
+    "imports": bench_imports,
+}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(names: List[str], quick: bool) -> Dict[str, Any]:
+    for key, value in OFFLINE_ENV.items():
+        os.environ[key] = value
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+        },
+        "benchmarks": {},
+    }
+    for name in names:
+        print(f"Running {name}...")
+        start = time.perf_counter()
+        results["benchmarks"][name] = BENCHMARKS[name](quick)
+        print(f"  done in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the evaluation pipeline benchmarks.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes (CI smoke run)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="Baseline result file; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only or list(BENCHMARKS), args.quick)
+
+    output = Path(args.output) if args.output else (
+        BENCH_DIR / "results" / f"{results['meta']['git_commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        from compare import compare_results, load_results, print_comparison
+
+        rows = compare_results(load_results(args.compare), results, args.threshold)
+        print_comparison(rows)
+        sys.exit(1 if any(row["regression"] for row in rows) else 0)
@@ -0,0 +1,157 @@
+"""
+Run Checkpoints for Resumable Golden Dataset Evaluation
+Each finished case record is appended to a JSONL file as soon as it
+completes, so a crashed, rate-limited or killed run loses at most the cases
+that were in flight. A resumed run skips every case whose latest record
+succeeded and re-runs the rest (failed runs and judge errors included).
+
+File layout:
+  {"_checkpoint": {"version": 1, "config": "<fingerprint>", "created": "..."}}
+  {"key": "case_001", "test_id": "case_001", "passed": true, "score": 4.2, ..., "result": {...}}
+  ...
+
+Only a small (passed, score) summary per case id is kept in memory; full
+records live in the file (iter_records streams them back).
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointMismatch(Exception):
+    """The checkpoint was written by a run with a different prompt, model or judge."""
+
+
+def case_key(test_case: Dict[str, Any], index: int) -> str:
+    """Case identity in the checkpoint: its id, or its dataset position if it has none."""
+    test_id = test_case.get("id")
+    return str(test_id) if test_id is not None else f"#{index}"
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream the records of a checkpoint file without opening it for writing."""
+    with open(path, "r") as f:
+        for line in f:
+            entry = RunCheckpoint._parse_line(line)
+            if entry is not None and "_checkpoint" not in entry:
+                yield entry
+
+
+def record_succeeded(record: Dict[str, Any]) -> bool:
+    """False for cases that failed after retries or whose judge call errored."""
+    result = record.get("result", {})
+    return not result.get("error") and not result.get("evaluation", {}).get("error")
+
+
+class RunCheckpoint:
+    """Append-only JSONL checkpoint of completed case records."""
+
+    def __init__(self, path: str, config: str = "", resume: bool = False):
+        """
+        Open a checkpoint. With resume=False any existing file is replaced;
+        with resume=True its completed cases are loaded, and CheckpointMismatch
+        is raised if it was written under a different `config` fingerprint.
+        """
+        self.path = path
+        self.config = config
+        # case key -> (passed, score) of its latest successful record
+        self.completed: Dict[str, Tuple[bool, float]] = {}
+        # case keys whose latest record failed (re-run on resume)
+        self.failed: Set[str] = set()
+        self.appended = 0
+
+        if resume and os.path.exists(path):
+            needs_newline = self._load()
+            self._file = open(path, "a")
+            if needs_newline:
+                # Terminate a line cut off by a crash so the next record starts cleanly
+                self._file.write("\n")
+        else:
+            self._file = open(path, "w")
+            self._write({"_checkpoint": {
+                "version": CHECKPOINT_VERSION,
+                "config": config,
+                "created": datetime.now(timezone.utc).isoformat(),
+            }})
+
+    def is_completed(self, key: str) -> bool:
+        return key in self.completed
+
+    def append(self, record: Dict[str, Any], key: str):
+        """Persist one finished case (flushed immediately)."""
+        self._write({"key": key, **record})
+        self.appended += 1
+        self._track(key, record)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Stream every record in the file (later lines supersede earlier ones for a case)."""
+        self._file.flush()
+        yield from read_records(self.path)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals over the completed cases."""
+        count = len(self.completed)
+        scores = [score for _, score in self.completed.values()]
+        return {
+            "completed": count,
+            "failed": len(self.failed),
+            "passed": sum(1 for passed, _ in self.completed.values() if passed),
+            "mean_score": sum(scores) / count if count else 0.0,
+        }
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "RunCheckpoint":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def _load(self) -> bool:
+        """Read completed cases; returns True if the file ends mid-line."""
+        line = "\n"
+        with open(self.path, "r") as f:
+            for line in f:
+                entry = self._parse_line(line)
+                if entry is None:
+                    continue
+                if "_checkpoint" in entry:
+                    stored = entry["_checkpoint"].get("config", "")
+                    if self.config and stored and stored != self.config:
+                        raise CheckpointMismatch(
+                            f"{self.path} was written with a different prompt, model or judge; "
+                            "start a new run without --resume"
+                        )
+                    continue
+                if entry.get("key") is not None:
+                    self._track(entry["key"], entry)
+        return not line.endswith("\n")
+
+    def _track(self, key: str, record: Dict[str, Any]):
+        if record_succeeded(record):
+            self.completed[key] = (bool(record.get("passed")), float(record.get("score", 0.0)))
+            self.failed.discard(key)
+        else:
+            self.completed.pop(key, None)
+            self.failed.add(key)
+
+    @staticmethod
+    def _parse_line(line: str) -> Optional[Dict[str, Any]]:
+        """A record, or None for blank lines and a line truncated by a crash."""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            return None
@@ -131,6 +131,7 @@ def main():
     print("1. Open Langfuse dashboard to explore traces")
     print("2. Add more test cases to golden_dataset.json")
     print("3. Run weekly evaluations to track quality over time")
+    print("   (--results-store eval_results, then python reporting.py --store eval_results)")
     print("4. Use eval results to improve your prompts")
 
 
@@ -10,14 +10,15 @@ from langfuse.decorators import observe
 # Import your agent (adjust import path as needed)
 # from research_assistant.agent import root_agent
 # Or use a simple example:
-from langchain_openai import ChatOpenAI
+from llm_clients import get_chat_model, llm_available
+from rate_limiter import limited_invoke
 from langchain_core.messages import HumanMessage
-import os
 
 app = FastAPI()
 
 # Initialize LLM
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0) if os.getenv("OPENAI_API_KEY") else None
+# Shared keep-alive connection pool (see llm_clients.py)
+llm = get_chat_model("gpt-4o-mini", temperature=0) if llm_available() else None
 
 
 class Query(BaseModel):
@@ -37,7 +38,7 @@ Query: {query}
 Provide a clear, factual answer."""
 
     messages = [HumanMessage(content=prompt)]
-    response = llm.invoke(messages)
+    response = limited_invoke(llm, messages, priority="interactive")
     
     return response.content
 
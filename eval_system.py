@@ -1,125 +1,460 @@
 """
 Evaluation System for Research Assistant
 Implements golden datasets, rule-based validation, and LLM-as-judge scoring.
+
+LangChain, the OpenAI client and Langfuse are imported only when a judge call
+needs them, so importing this module for RuleBasedValidator or GoldenDataset
+stays fast (see test_import_time.py).
 """
 
+import asyncio
 import json
 import re
-from typing import Dict, List, Optional, Any
-from pathlib import Path
-from langfuse import Langfuse
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
+from judge_store import verdict_key
+from metrics import record_llm_usage, stage
+from rate_limiter import limited_ainvoke, limited_invoke
+from score_exporter import ScoreExporter, get_score_exporter
+from singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+
+JUDGE_RUBRIC = """Score this response on a scale of 1-5 for each dimension:
+
+1. **Relevance** (1-5): Does the response directly address the query?
+2. **Accuracy** (1-5): Is the information factually correct?
+3. **Completeness** (1-5): Are key points covered?
+4. **Grounding** (1-5): Are claims supported by sources or evidence?
+
+Return your evaluation as JSON with this structure:
+{
+  "scores": {
+    "relevance": 4,
+    "accuracy": 5,
+    "completeness": 3,
+    "grounding": 4
+  },
+  "reasoning": "Brief explanation of scores",
+  "overall": 4.0
+}
+
+Calculate overall as the average of the four scores."""
+
+
+BATCH_JUDGE_INSTRUCTIONS = """You will receive several numbered items, each with a query and a response.
+Score every item independently with the rubric above.
+
+Return a single JSON object with exactly one entry per item, in this structure:
+{
+  "evaluations": [
+    {
+      "id": "1",
+      "scores": {"relevance": 4, "accuracy": 5, "completeness": 3, "grounding": 4},
+      "reasoning": "Brief explanation of scores",
+      "overall": 4.0
+    }
+  ]
+}
+
+Use the item number as "id". Every score is an integer from 1 to 5."""
+
+JUDGE_DIMENSIONS = ("relevance", "accuracy", "completeness", "grounding")
+
+# Expected judge output per item, reserved from the tokens/min budget (rate_limiter.py)
+JUDGE_OUTPUT_TOKENS = 200
+
+_JSON_DECODER = json.JSONDecoder()
+# Only a "{" followed by a key or "}" can start a JSON object; checking this first
+# keeps prose full of braces linear (a failed decode costs O(position) to report)
+_JSON_OBJECT_START = re.compile(r'\{\s*["}]')
+
+
+def extract_json(text: str, required_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return the first JSON object in `text` (that has `required_key`, if given).
+    Tolerates code fences, prose before or after the object and nested objects.
+    The text is scanned left to right with raw_decode at each "{"; an object
+    that decodes but lacks the key is skipped whole rather than rescanned.
+    """
+    match = _JSON_OBJECT_START.search(text)
+    while match:
+        pos = match.start()
+        try:
+            value, end = _JSON_DECODER.raw_decode(text, pos)
+        except ValueError:
+            match = _JSON_OBJECT_START.search(text, pos + 1)
+            continue
+        if isinstance(value, dict) and (required_key is None or required_key in value):
+            return value
+        match = _JSON_OBJECT_START.search(text, end)
+    return None
 
 
 class GoldenDataset:
-    """Manages golden dataset test cases."""
+    """
+    Manages golden dataset test cases.
     
-    def __init__(self, dataset_path: str):
-        """Load golden dataset from JSON file."""
-        with open(dataset_path, 'r') as f:
-            self.data = json.load(f)
-        self.test_cases = self.data.get('test_cases', [])
+    Supports the original JSON format ({"name", "version", "test_cases": [...]})
+    and JSONL: one test case per line, optionally preceded by a header line
+    {"_meta": {"name": ..., "version": ...}}. JSONL files are streamed, so
+    iter_cases() and shards never hold more than their own cases.
+    
+    Cases are loaded on first use, with id and category indexes built once.
+    """
+    
+    def __init__(self, dataset_path: str, shard_index: int = 0, num_shards: int = 1):
+        """Open a golden dataset (optionally one shard of it)."""
+        if not 0 <= shard_index < num_shards:
+            raise ValueError(f"shard_index must be in [0, {num_shards}), got {shard_index}")
+        self.dataset_path = dataset_path
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+        self.is_jsonl = str(dataset_path).endswith(".jsonl")
+        
+        if self.is_jsonl:
+            self.data = self._read_jsonl_header()
+        else:
+            with open(dataset_path, 'r') as f:
+                self.data = json.load(f)
         self.name = self.data.get('name', 'unknown')
         self.version = self.data.get('version', '1.0.0')
+        
+        self._cases: Optional[List[Dict]] = None
+        self._by_id: Dict[str, Dict] = {}
+        self._by_category: Dict[str, List[Dict]] = {}
+    
+    @property
+    def test_cases(self) -> List[Dict]:
+        """All test cases in this dataset (or shard)."""
+        if self._cases is None:
+            self._load()
+        return self._cases
+    
+    def iter_cases(self):
+        """Yield this dataset's (or shard's) test cases lazily, in file order."""
+        if self._cases is not None:
+            yield from self._cases
+        elif self.is_jsonl:
+            yield from self._iter_jsonl()
+        else:
+            cases = self.data.get('test_cases', [])
+            yield from cases[self.shard_index::self.num_shards]
+    
+    def shard(self, index: int, count: int) -> "GoldenDataset":
+        """
+        Return shard `index` of `count` (cases whose position modulo count
+        equals index). Shards of a shard are supported; for JSONL nothing is
+        loaded until the shard is used.
+        """
+        return GoldenDataset(
+            self.dataset_path,
+            shard_index=self.shard_index + index * self.num_shards,
+            num_shards=self.num_shards * count
+        )
     
     def get_test_case(self, test_id: str) -> Optional[Dict]:
         """Get a specific test case by ID."""
-        for case in self.test_cases:
-            if case.get('id') == test_id:
-                return case
-        return None
+        if self._cases is None:
+            self._load()
+        return self._by_id.get(test_id)
     
     def get_all_cases(self) -> List[Dict]:
         """Get all test cases."""
         return self.test_cases
     
     def get_cases_by_category(self, category: str) -> List[Dict]:
-        """Get test cases by category."""
-        return [case for case in self.test_cases if case.get('category') == category]
+        """Get test cases by category (the indexed list; don't mutate it)."""
+        if self._cases is None:
+            self._load()
+        return self._by_category.get(category, [])
+    
+    def write_jsonl(self, output_path: str):
+        """Write this dataset (or shard) as JSONL with a metadata header line."""
+        meta = {k: v for k, v in self.data.items() if k != 'test_cases'}
+        with open(output_path, 'w') as f:
+            f.write(json.dumps({"_meta": meta}) + "\n")
+            for case in self.iter_cases():
+                f.write(json.dumps(case) + "\n")
+    
+    def _load(self):
+        """Materialize cases and build the id/category indexes in one pass."""
+        cases, by_id, by_category = [], {}, {}
+        for case in self.iter_cases():
+            cases.append(case)
+            if case.get('id') is not None:
+                by_id.setdefault(case['id'], case)
+            by_category.setdefault(case.get('category'), []).append(case)
+        self._cases, self._by_id, self._by_category = cases, by_id, by_category
+    
+    def _read_jsonl_header(self) -> Dict[str, Any]:
+        with open(self.dataset_path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    first = json.loads(line)
+                    return first.get("_meta", {}) if isinstance(first, dict) else {}
+        return {}
+    
+    def _iter_jsonl(self):
+        """Stream JSONL cases, only parsing the lines that belong to this shard."""
+        position = 0
+        first = True
+        with open(self.dataset_path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                if first:
+                    first = False
+                    if '"_meta"' in line and "_meta" in json.loads(line):
+                        continue
+                if position % self.num_shards == self.shard_index:
+                    yield json.loads(line)
+                position += 1
+
+
+DEFAULT_VALIDATION_RULES = {
+    "min_length": 10,
+    "max_length": 5000,
+    "pii_patterns": {
+        "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+        "phone": r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
+    },
+    "banned_terms": ["hack", "exploit", "bypass"]  # Very basic example
+}
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    """
+    Immutable outcome of validating one response.
+    Also supports result["valid"], result.get("errors"), "valid" in result
+    and keys() for callers written against the old dict result.
+    """
+    valid: bool
+    errors: Tuple[str, ...] = field(default_factory=tuple)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self.keys()
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+    
+    def keys(self) -> Tuple[str, ...]:
+        return ("valid", "errors")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"valid": self.valid, "errors": list(self.errors)}
 
 
 class RuleBasedValidator:
-    """Fast, deterministic validation checks."""
+    """
+    Fast, deterministic validation checks.
+    
+    The validator keeps no per-call state, so one instance can be shared
+    across threads, async tasks and worker processes.
+    
+    Rules come from DEFAULT_VALIDATION_RULES, a dict, or a JSON config file
+    (see from_config). All patterns are compiled once when the validator is
+    built: PII patterns are combined into one regex and banned terms into one
+    case-insensitive alternation, so each response is scanned once per check.
+    """
     
-    def __init__(self):
-        self.errors = []
+    def __init__(self, rules: Optional[Dict[str, Any]] = None):
+        self.rules = {**DEFAULT_VALIDATION_RULES, **(rules or {})}
+        self.min_length = self.rules["min_length"]
+        self.max_length = self.rules["max_length"]
+        self._pii_re = self._compile_alternation(
+            f"(?:{pattern})" for pattern in self.rules["pii_patterns"].values()
+        )
+        # Longest terms first so overlapping terms match deterministically
+        banned = sorted(self.rules["banned_terms"], key=len, reverse=True)
+        self._banned_re = self._compile_alternation((re.escape(term) for term in banned), re.IGNORECASE)
     
-    def validate_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+    @classmethod
+    def from_config(cls, config_path: str) -> "RuleBasedValidator":
+        """Build a validator from a JSON file with any of the DEFAULT_VALIDATION_RULES keys."""
+        with open(config_path, 'r') as f:
+            return cls(json.load(f))
+    
+    @staticmethod
+    def _compile_alternation(patterns, flags: int = 0) -> Optional["re.Pattern"]:
+        patterns = list(patterns)
+        return re.compile("|".join(patterns), flags) if patterns else None
+    
+    def validate_response(self, response: Dict[str, Any]) -> ValidationResult:
         """
         Validate response against rule-based checks.
-        Returns dict with 'valid' (bool) and 'errors' (list).
+        Returns a ValidationResult with 'valid' (bool) and 'errors' (tuple).
+        """
+        errors = self._check(response)
+        return ValidationResult(valid=not errors, errors=tuple(errors))
+    
+    def validate_many(
+        self,
+        responses: List[Any],
+        workers: Optional[int] = None,
+        executor: str = "thread",
+        chunk_size: int = 1000
+    ) -> List[ValidationResult]:
+        """
+        Validate a batch of responses (e.g. a log replay), in input order.
+        
+        With workers > 1 the batch is split into chunks and fanned out over a
+        thread pool (executor="thread") or a process pool (executor="process";
+        responses must be picklable). Regex scanning holds the GIL, so large
+        replays scale better with processes.
         """
-        self.errors = []
+        if not workers or workers <= 1 or len(responses) <= chunk_size:
+            return self._validate_chunk(responses)
+        
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        
+        chunks = [responses[i:i + chunk_size] for i in range(0, len(responses), chunk_size)]
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            results = []
+            for chunk_results in pool.map(self._validate_chunk, chunks):
+                results.extend(chunk_results)
+        return results
+    
+    def _validate_chunk(self, responses: List[Any]) -> List[ValidationResult]:
+        return [self.validate_response(response) for response in responses]
+    
+    def _check(self, response: Any) -> List[str]:
+        """Run every rule against one response and return its errors."""
+        errors = []
         
         # Format check
         if not isinstance(response, dict):
-            self.errors.append("Response must be a dictionary")
-            return {"valid": False, "errors": self.errors}
+            errors.append("Response must be a dictionary")
+            return errors
         
         # Required fields check
         if "answer" not in response:
-            self.errors.append("Missing 'answer' field")
+            errors.append("Missing 'answer' field")
         elif not isinstance(response.get("answer"), str):
-            self.errors.append("'answer' field must be a string")
+            errors.append("'answer' field must be a string")
         
-        # Length check
+        # Length check (non-string answers were already reported above)
         answer = response.get("answer", "")
-        if len(answer) < 10:
-            self.errors.append("Response too short (minimum 10 characters)")
-        if len(answer) > 5000:
-            self.errors.append("Response too long (maximum 5000 characters)")
+        if not isinstance(answer, str):
+            answer = ""
+        if len(answer) < self.min_length:
+            errors.append(f"Response too short (minimum {self.min_length} characters)")
+        if len(answer) > self.max_length:
+            errors.append(f"Response too long (maximum {self.max_length} characters)")
         
         # Grounding check (if sources field exists)
         if "sources" in response:
             sources = response.get("sources", [])
             if not isinstance(sources, list):
-                self.errors.append("'sources' must be a list")
+                errors.append("'sources' must be a list")
             elif len(sources) == 0 and answer:
-                self.errors.append("No sources cited for response")
+                errors.append("No sources cited for response")
         
         # Safety check - basic PII detection
         if self._contains_pii(answer):
-            self.errors.append("Potential PII detected in response")
+            errors.append("Potential PII detected in response")
         
         # Safety check - banned content (basic)
         if self._contains_banned_content(answer):
-            self.errors.append("Banned content detected")
+            errors.append("Banned content detected")
         
-        return {
-            "valid": len(self.errors) == 0,
-            "errors": self.errors
-        }
+        return errors
     
     def _contains_pii(self, text: str) -> bool:
         """Basic PII detection - email and phone patterns."""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        phone_pattern = r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
-        
-        if re.search(email_pattern, text) or re.search(phone_pattern, text):
-            return True
-        return False
+        return bool(self._pii_re and self._pii_re.search(text))
     
     def _contains_banned_content(self, text: str) -> bool:
         """Basic banned content check."""
-        banned_words = ["hack", "exploit", "bypass"]  # Very basic example
-        text_lower = text.lower()
-        for word in banned_words:
-            if word in text_lower:
-                return True
-        return False
+        return bool(self._banned_re and self._banned_re.search(text))
 
 
 class LLMJudge:
     """LLM-as-judge for quality evaluation."""
     
-    def __init__(self, llm: Optional[ChatOpenAI] = None):
-        """Initialize with optional LLM (uses gpt-4o-mini by default)."""
-        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0)
-        try:
-            self.langfuse = Langfuse()
-        except:
-            self.langfuse = None
+    def __init__(
+        self,
+        llm: Optional["ChatOpenAI"] = None,
+        store: Any = None,
+        exporter: Optional[ScoreExporter] = None,
+        structured_output: bool = False,
+        coalesce: bool = True,
+        priority: str = "background"
+    ):
+        """
+        Initialize with optional LLM (the shared-pool gpt-4o-mini by default,
+        created on first use).
+        Pass a judge_store backend as `store` to reuse verdicts for unchanged inputs.
+        Scores go to Langfuse through the shared background ScoreExporter.
+        With structured_output=True the judge is asked for a JSON object
+        (OpenAI JSON mode), which removes most parse failures.
+        With coalesce=True, concurrent evaluate/aevaluate calls with identical
+        inputs share one judge call; each caller's trace still gets the scores.
+        Judge calls go through the shared rate limiter at `priority`, so live
+        traffic is served first and 429s are retried instead of scored 0.0.
+        """
+        self.structured_output = structured_output
+        self._llm = llm
+        self._bound_llm = self._bind(llm) if llm is not None else None
+        self.store = store
+        self.judge_calls = 0
+        self.reused_verdicts = 0
+        self.batch_stats = {
+            "batch_requests": 0,
+            "batched_items": 0,
+            "requests_saved": 0,
+            "prompt_tokens": 0,
+            "prompt_tokens_saved": 0
+        }
+        # Judge outputs we couldn't turn into verdicts (each one is a paid call wasted)
+        self.parse_stats = {
+            "parse_failures": 0,
+            "unparsed_batch_items": 0
+        }
+        self._exporter = exporter
+        self.coalesce = coalesce
+        self._flights = SingleFlight("judge")
+        self.priority = priority
+    
+    @property
+    def llm(self):
+        """The judge model; the default one is built on first use."""
+        if self._llm is None:
+            from llm_clients import get_chat_model
+            self._llm = get_chat_model("gpt-4o-mini", temperature=0)
+        return self._llm
+    
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
+        self._bound_llm = self._bind(value)
+    
+    @property
+    def _judge_llm(self):
+        """The model as called for verdicts (bound to JSON mode with structured_output)."""
+        if self._bound_llm is None:
+            self._bound_llm = self._bind(self.llm)
+        return self._bound_llm
+    
+    def _bind(self, llm):
+        if self.structured_output and hasattr(llm, "bind"):
+            return llm.bind(response_format={"type": "json_object"})
+        return llm
+    
+    @property
+    def exporter(self) -> ScoreExporter:
+        if self._exporter is None:
+            self._exporter = get_score_exporter()
+        return self._exporter
     
     def evaluate(
         self,
@@ -133,91 +468,425 @@ class LLMJudge:
         Evaluate response quality using LLM-as-judge.
         Returns scores and reasoning.
         """
+        key = self._verdict_key(query, response, expected_topics, expected_not)
+        cached = self._reuse_verdict(key, trace_id)
+        if cached is not None:
+            return cached
+        
+        messages = self._build_messages(query, response, expected_topics, expected_not)
+        flight_key = self._flight_key(key, query, response, expected_topics, expected_not)
+        
+        try:
+            scores = self._flights.do(flight_key, lambda: self._judge_once(key, messages))
+        except Exception as e:
+            return self._error_result(e)
+        self._log_scores(trace_id, scores)
+        return dict(scores)
+    
+    async def aevaluate(
+        self,
+        query: str,
+        response: str,
+        expected_topics: List[str] = None,
+        expected_not: List[str] = None,
+        trace_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of evaluate() using the model's ainvoke.
+        Lets many judge calls share one event loop.
+        """
+        key = self._verdict_key(query, response, expected_topics, expected_not)
+        cached = self._reuse_verdict(key, trace_id)
+        if cached is not None:
+            return cached
+        
+        messages = self._build_messages(query, response, expected_topics, expected_not)
+        flight_key = self._flight_key(key, query, response, expected_topics, expected_not)
+        
+        try:
+            scores = await self._flights.ado(flight_key, lambda: self._ajudge_once(key, messages))
+        except Exception as e:
+            return self._error_result(e)
+        self._log_scores(trace_id, scores)
+        return dict(scores)
+    
+    def evaluate_batch(self, items: List[Dict[str, Any]], batch_size: int = 8) -> List[Dict[str, Any]]:
+        """
+        Evaluate many responses with one judge call per `batch_size` items.
+        Each item is a dict with query, response and optional expected_topics,
+        expected_not and trace_id. Returns one result per item, in order.
+        """
+        results, pending = self._prepare_batch(items)
+        for start in range(0, len(pending), max(1, batch_size)):
+            chunk = pending[start:start + max(1, batch_size)]
+            for index, verdict in zip(chunk, self._judge_batch([items[i] for i in chunk])):
+                results[index] = verdict
+        return results
+    
+    async def aevaluate_batch(
+        self,
+        items: List[Dict[str, Any]],
+        batch_size: int = 8,
+        max_concurrency: int = 4
+    ) -> List[Dict[str, Any]]:
+        """Async variant of evaluate_batch(); up to max_concurrency batches run at once."""
+        results, pending = self._prepare_batch(items)
+        chunks = [pending[start:start + max(1, batch_size)] for start in range(0, len(pending), max(1, batch_size))]
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def judge_chunk(chunk: List[int]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._ajudge_batch([items[i] for i in chunk])
+        
+        verdict_lists = await asyncio.gather(*(judge_chunk(chunk) for chunk in chunks))
+        for chunk, verdicts in zip(chunks, verdict_lists):
+            for index, verdict in zip(chunk, verdicts):
+                results[index] = verdict
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        How many verdicts came from the judge vs. the store, batch token savings,
+        and how many judge calls were wasted on unparseable output.
+        """
+        return {
+            "judge_calls": self.judge_calls,
+            "reused_verdicts": self.reused_verdicts,
+            **self.batch_stats,
+            **self.parse_stats,
+            "parse_failure_rate": self.parse_stats["parse_failures"] / self.judge_calls if self.judge_calls else 0.0,
+            "coalesced_calls": self._flights.coalesced
+        }
+    
+    @property
+    def _judge_model(self) -> str:
+        return getattr(self.llm, "model_name", type(self.llm).__name__)
+    
+    def _verdict_key(
+        self,
+        query: str,
+        response: str,
+        expected_topics: List[str] = None,
+        expected_not: List[str] = None
+    ) -> Optional[str]:
+        """Content address of a verdict, or None when no store is configured."""
+        if self.store is None:
+            return None
+        return verdict_key(JUDGE_RUBRIC, self._judge_model, query, response, expected_topics, expected_not)
+    
+    def _reuse_verdict(self, key: Optional[str], trace_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return a stored verdict (scored against the new trace) if one exists."""
+        if key is None:
+            return None
+        verdict = self.store.get(key)
+        if verdict is None:
+            return None
+        self.reused_verdicts += 1
+        self._log_scores(trace_id, verdict)
+        verdict["cached"] = True
+        return verdict
+    
+    def _store_verdict(self, key: Optional[str], scores: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a verdict; unparseable ones are not stored so they get re-judged."""
+        if key is not None and scores.get("scores"):
+            self.store.put(key, scores)
+        return scores
+    
+    def _build_messages(
+        self,
+        query: str,
+        response: str,
+        expected_topics: List[str] = None,
+        expected_not: List[str] = None
+    ) -> List[Any]:
+        """Build the rubric + evaluation prompt messages."""
+        eval_prompt = self._item_prompt(query, response, expected_topics, expected_not)
+        eval_prompt += "\n\nEvaluate the response according to the rubric above."
+        
+        from langchain_core.messages import HumanMessage, SystemMessage
+        return [
+            SystemMessage(content=JUDGE_RUBRIC),
+            HumanMessage(content=eval_prompt)
+        ]
+    
+    @staticmethod
+    def _item_prompt(
+        query: str,
+        response: str,
+        expected_topics: List[str] = None,
+        expected_not: List[str] = None
+    ) -> str:
+        """The per-response part of the judge prompt."""
         expected_topics = expected_topics or []
         expected_not = expected_not or []
         
-        rubric = """Score this response on a scale of 1-5 for each dimension:
-
-1. **Relevance** (1-5): Does the response directly address the query?
-2. **Accuracy** (1-5): Is the information factually correct?
-3. **Completeness** (1-5): Are key points covered?
-4. **Grounding** (1-5): Are claims supported by sources or evidence?
-
-Return your evaluation as JSON with this structure:
-{
-  "scores": {
-    "relevance": 4,
-    "accuracy": 5,
-    "completeness": 3,
-    "grounding": 4
-  },
-  "reasoning": "Brief explanation of scores",
-  "overall": 4.0
-}
-
-Calculate overall as the average of the four scores."""
-
-        # Build evaluation prompt
-        eval_prompt = f"""Query: {query}
+        return f"""Query: {query}
 
 Response to evaluate:
 {response}
 
 Expected topics to cover: {', '.join(expected_topics) if expected_topics else 'None specified'}
-Topics that should NOT appear: {', '.join(expected_not) if expected_not else 'None specified'}
-
-Evaluate the response according to the rubric above."""
-
-        messages = [
-            SystemMessage(content=rubric),
-            HumanMessage(content=eval_prompt)
-        ]
-        
-        try:
-            judge_response = self.llm.invoke(messages)
-            judge_text = judge_response.content
-            
-            # Parse JSON from response
-            scores = self._parse_scores(judge_text)
-            
-            # Log scores to Langfuse if trace_id provided
-            if trace_id and self.langfuse:
-                for score_name, score_value in scores.get("scores", {}).items():
-                    self.langfuse.score(
-                        trace_id=trace_id,
-                        name=f"llm_judge_{score_name}",
-                        value=float(score_value),
-                        comment=scores.get("reasoning", "")
-                    )
-                
-                # Log overall score
-                self.langfuse.score(
+Topics that should NOT appear: {', '.join(expected_not) if expected_not else 'None specified'}"""
+    
+    def _judge_once(self, key: Optional[str], messages: List[Any]) -> Dict[str, Any]:
+        """One judge call; concurrent identical evaluations share it (see evaluate)."""
+        self.judge_calls += 1
+        with stage("judge_call"):
+            judge_response = limited_invoke(self._judge_llm, messages, self.priority, JUDGE_OUTPUT_TOKENS)
+        record_llm_usage("judge", judge_response, self._judge_model)
+        with stage("judge_parse"):
+            scores = self._parse_scores(judge_response.content)
+        return self._store_verdict(key, scores)
+    
+    async def _ajudge_once(self, key: Optional[str], messages: List[Any]) -> Dict[str, Any]:
+        self.judge_calls += 1
+        with stage("judge_call"):
+            judge_response = await limited_ainvoke(self._judge_llm, messages, self.priority, JUDGE_OUTPUT_TOKENS)
+        record_llm_usage("judge", judge_response, self._judge_model)
+        with stage("judge_parse"):
+            scores = self._parse_scores(judge_response.content)
+        return self._store_verdict(key, scores)
+    
+    def _flight_key(
+        self,
+        key: Optional[str],
+        query: str,
+        response: str,
+        expected_topics: List[str] = None,
+        expected_not: List[str] = None
+    ) -> Optional[str]:
+        """Key for coalescing identical in-flight evaluations (None when disabled)."""
+        if not self.coalesce:
+            return None
+        return key or verdict_key(JUDGE_RUBRIC, self._judge_model, query, response, expected_topics, expected_not)
+    
+    def _log_scores(self, trace_id: Optional[str], scores: Dict[str, Any]):
+        """Queue judge scores for Langfuse if trace_id provided (never blocks)."""
+        if not trace_id:
+            return
+        with stage("scoring"):
+            for score_name, score_value in scores.get("scores", {}).items():
+                self.exporter.submit(
                     trace_id=trace_id,
-                    name="llm_judge_overall",
-                    value=float(scores.get("overall", 0)),
+                    name=f"llm_judge_{score_name}",
+                    value=float(score_value),
                     comment=scores.get("reasoning", "")
                 )
             
-            return scores
-            
+            # Log overall score
+            self.exporter.submit(
+                trace_id=trace_id,
+                name="llm_judge_overall",
+                value=float(scores.get("overall", 0)),
+                comment=scores.get("reasoning", "")
+            )
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict[str, Any]:
+        """Result returned when the judge call fails."""
+        return {
+            "scores": {},
+            "reasoning": f"Error during evaluation: {str(error)}",
+            "overall": 0.0,
+            "error": str(error)
+        }
+    
+    def _prepare_batch(self, items: List[Dict[str, Any]]):
+        """Fill in stored verdicts; return (results, indexes still to judge)."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        pending = []
+        for i, item in enumerate(items):
+            key = self._verdict_key(item["query"], item["response"], item.get("expected_topics"), item.get("expected_not"))
+            cached = self._reuse_verdict(key, item.get("trace_id"))
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+        return results, pending
+    
+    def _judge_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Judge a batch in one call, splitting and retrying items that fail to parse."""
+        if len(batch) == 1:
+            return [self.evaluate(**self._evaluate_kwargs(batch[0]))]
+        
+        try:
+            self.judge_calls += 1
+            with stage("judge_call"):
+                judge_response = limited_invoke(
+                    self._judge_llm, self._build_batch_messages(batch), self.priority, JUDGE_OUTPUT_TOKENS * len(batch)
+                )
+            record_llm_usage("judge", judge_response, self._judge_model)
+        except Exception as e:
+            return [self._error_result(e) for _ in batch]
+        
+        verdicts = self._finish_batch(batch, judge_response)
+        missing = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        for group in self._retry_groups(missing, len(batch)):
+            for i, verdict in zip(group, self._judge_batch([batch[i] for i in group])):
+                verdicts[i] = verdict
+        return verdicts
+    
+    async def _ajudge_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async variant of _judge_batch()."""
+        if len(batch) == 1:
+            return [await self.aevaluate(**self._evaluate_kwargs(batch[0]))]
+        
+        try:
+            self.judge_calls += 1
+            with stage("judge_call"):
+                judge_response = await limited_ainvoke(
+                    self._judge_llm, self._build_batch_messages(batch), self.priority, JUDGE_OUTPUT_TOKENS * len(batch)
+                )
+            record_llm_usage("judge", judge_response, self._judge_model)
         except Exception as e:
-            return {
-                "scores": {},
-                "reasoning": f"Error during evaluation: {str(e)}",
-                "overall": 0.0,
-                "error": str(e)
-            }
+            return [self._error_result(e) for _ in batch]
+        
+        verdicts = self._finish_batch(batch, judge_response)
+        missing = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        groups = self._retry_groups(missing, len(batch))
+        retried = await asyncio.gather(*(self._ajudge_batch([batch[i] for i in group]) for group in groups))
+        for group, group_verdicts in zip(groups, retried):
+            for i, verdict in zip(group, group_verdicts):
+                verdicts[i] = verdict
+        return verdicts
+    
+    @staticmethod
+    def _retry_groups(missing: List[int], batch_len: int) -> List[List[int]]:
+        """
+        Group failed item indexes for another attempt. If the whole batch
+        failed to parse it is split in half; otherwise only the missing items
+        are re-sent together. Groups always shrink, so retries terminate.
+        """
+        if not missing:
+            return []
+        if len(missing) < batch_len:
+            return [missing]
+        mid = (len(missing) + 1) // 2
+        return [missing[:mid], missing[mid:]]
+    
+    @staticmethod
+    def _evaluate_kwargs(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "query": item["query"],
+            "response": item["response"],
+            "expected_topics": item.get("expected_topics"),
+            "expected_not": item.get("expected_not"),
+            "trace_id": item.get("trace_id")
+        }
+    
+    def _build_batch_messages(self, batch: List[Dict[str, Any]]) -> List[Any]:
+        """One system rubric followed by all numbered items."""
+        sections = [
+            f"### Item {i}\n" + self._item_prompt(item["query"], item["response"], item.get("expected_topics"), item.get("expected_not"))
+            for i, item in enumerate(batch, start=1)
+        ]
+        from langchain_core.messages import HumanMessage, SystemMessage
+        return [
+            SystemMessage(content=JUDGE_RUBRIC + "\n\n" + BATCH_JUDGE_INSTRUCTIONS),
+            HumanMessage(content="\n\n".join(sections) + f"\n\nEvaluate all {len(batch)} items.")
+        ]
+    
+    def _finish_batch(self, batch: List[Dict[str, Any]], judge_response: Any) -> List[Optional[Dict[str, Any]]]:
+        """
+        Validate the batch output, log and store valid verdicts, and track token
+        savings. Items without a valid verdict come back as None.
+        """
+        with stage("judge_parse"):
+            evaluations = self._parse_batch(judge_response.content)
+        
+        verdicts: List[Optional[Dict[str, Any]]] = []
+        for i, item in enumerate(batch, start=1):
+            verdict = evaluations.get(str(i))
+            if verdict is None:
+                verdicts.append(None)
+                continue
+            self._log_scores(item.get("trace_id"), verdict)
+            key = self._verdict_key(item["query"], item["response"], item.get("expected_topics"), item.get("expected_not"))
+            verdicts.append(self._store_verdict(key, verdict))
+        
+        unparsed = sum(1 for v in verdicts if v is None)
+        self.parse_stats["unparsed_batch_items"] += unparsed
+        if unparsed == len(batch):
+            self.parse_stats["parse_failures"] += 1
+        self._record_batch_usage(batch, [v is not None for v in verdicts], judge_response)
+        return verdicts
+    
+    def _parse_batch(self, text: str) -> Dict[str, Dict[str, Any]]:
+        """Map item id -> verdict for every evaluation that matches the schema."""
+        data = extract_json(text, "evaluations")
+        evaluations = {}
+        if data is None or not isinstance(data["evaluations"], list):
+            return evaluations
+        for entry in data["evaluations"]:
+            verdict = self._validate_verdict(entry)
+            if verdict is not None:
+                evaluations[str(entry["id"])] = verdict
+        return evaluations
+    
+    @staticmethod
+    def _validate_verdict(entry: Any) -> Optional[Dict[str, Any]]:
+        """Return a clean verdict if entry has an id, all four 1-5 scores and an overall."""
+        if not isinstance(entry, dict) or "id" not in entry:
+            return None
+        scores = entry.get("scores")
+        if not isinstance(scores, dict):
+            return None
+        clean = {}
+        for dimension in JUDGE_DIMENSIONS:
+            value = scores.get(dimension)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 1 <= value <= 5:
+                return None
+            clean[dimension] = value
+        overall = entry.get("overall")
+        if isinstance(overall, bool) or not isinstance(overall, (int, float)):
+            overall = sum(clean.values()) / len(clean)
+        return {
+            "scores": clean,
+            "reasoning": str(entry.get("reasoning", "")),
+            "overall": float(overall)
+        }
+    
+    def _record_batch_usage(self, batch: List[Dict[str, Any]], judged: List[bool], judge_response: Any):
+        """
+        Track what a batch call saved versus judging the same items one by one
+        (each single call repeats the rubric). Savings are estimated by scaling
+        the call's real prompt tokens by prompt length, and only count items
+        that got a valid verdict, so a batch that failed to parse counts as
+        a loss.
+        """
+        usage = getattr(judge_response, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens", 0)
+        batched_chars = sum(len(m.content) for m in self._build_batch_messages(batch))
+        unbatched_chars = sum(
+            sum(len(m.content) for m in self._build_messages(item["query"], item["response"], item.get("expected_topics"), item.get("expected_not")))
+            for item, ok in zip(batch, judged) if ok
+        )
+        estimated_unbatched = round(prompt_tokens * unbatched_chars / batched_chars) if batched_chars else 0
+        
+        self.batch_stats["batch_requests"] += 1
+        self.batch_stats["batched_items"] += sum(judged)
+        self.batch_stats["requests_saved"] += sum(judged) - 1
+        self.batch_stats["prompt_tokens"] += prompt_tokens
+        self.batch_stats["prompt_tokens_saved"] += estimated_unbatched - prompt_tokens
     
     def _parse_scores(self, text: str) -> Dict[str, Any]:
         """Parse scores from LLM response."""
-        # Try to extract JSON from response
-        json_match = re.search(r'\{[^{}]*"scores"[^{}]*\{[^{}]*\}[^{}]*\}', text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except:
-                pass
+        data = extract_json(text, "scores")
+        if data is not None and isinstance(data["scores"], dict):
+            scores = {}
+            for name, value in data["scores"].items():
+                # Accept {"relevance": {"score": 4, ...}} as well as plain numbers
+                if isinstance(value, dict):
+                    value = value.get("score", value.get("value"))
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    scores[name] = value
+            if scores:
+                overall = data.get("overall")
+                if isinstance(overall, bool) or not isinstance(overall, (int, float)):
+                    overall = sum(scores.values()) / len(scores)
+                return {**data, "scores": scores, "overall": float(overall)}
         
+        self.parse_stats["parse_failures"] += 1
         # Fallback: try to find overall score
         overall_match = re.search(r'"overall":\s*(\d+\.?\d*)', text)
         overall = float(overall_match.group(1)) if overall_match else 0.0
@@ -232,19 +901,23 @@ Evaluate the response according to the rubric above."""
 class LangfuseTracer:
     """Wrapper for easy Langfuse integration."""
     
-    def __init__(self):
-        """Initialize Langfuse client."""
-        try:
-            self.langfuse = Langfuse()
-        except:
-            self.langfuse = None
+    def __init__(self, exporter: Optional[ScoreExporter] = None):
+        """Use the shared background score exporter (no client per tracer), created on first score."""
+        self._exporter = exporter
+    
+    @property
+    def exporter(self) -> ScoreExporter:
+        if self._exporter is None:
+            self._exporter = get_score_exporter()
+        return self._exporter
     
     def get_current_trace_id(self) -> Optional[str]:
         """Get current trace ID from context."""
         try:
             from langfuse.decorators import langfuse_context
             return langfuse_context.get_current_trace_id()
-        except:
+        except Exception:
+            # Langfuse not installed or no active observation
             return None
     
     def score_trace(
@@ -254,12 +927,10 @@ class LangfuseTracer:
         value: float,
         comment: str = ""
     ):
-        """Score a trace."""
-        if self.langfuse:
-            self.langfuse.score(
-                trace_id=trace_id,
-                name=name,
-                value=value,
-                comment=comment
-            )
-
+        """Score a trace. Queued and sent in batches by the background exporter."""
+        self.exporter.submit(
+            trace_id=trace_id,
+            name=name,
+            value=value,
+            comment=comment
+        )
@@ -0,0 +1,263 @@
+"""
+Deterministic Fake Chat Model
+A drop-in replacement for ChatOpenAI for offline benchmarks, load tests and
+CI. It is a real LangChain chat model (invoke/ainvoke/stream/astream/bind all
+work) with:
+
+- configurable latency distributions (fixed, uniform, normal, lognormal, exponential)
+- token-rate streaming (time-to-first-token = sampled latency, then tokens_per_second)
+- error injection: openai.RateLimitError (429 with Retry-After) and openai.APITimeoutError
+- deterministic answers and judge verdicts derived from a hash of the prompt
+- usage_metadata token counts, so cost/token accounting paths are exercised
+
+Select it everywhere with LLM_BACKEND=fake (see llm_clients.get_chat_model).
+Tuning: FAKE_LLM_LATENCY_MS, FAKE_LLM_LATENCY_DISTRIBUTION, FAKE_LLM_LATENCY_SIGMA,
+FAKE_LLM_TOKENS_PER_SECOND, FAKE_LLM_ERROR_RATE, FAKE_LLM_TIMEOUT_RATE, FAKE_LLM_SEED.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+_JUDGE_MARKER = "Score this response"
+_BATCH_MARKER = '"evaluations"'
+_ITEM_HEADER = re.compile(r"^### Item (\d+)$", re.MULTILINE)
+
+_VOCABULARY = (
+    "retrieval grounding evaluation context documents latency tracing agents "
+    "workflows models prompts answers sources quality metrics pipelines"
+).split()
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _count_tokens(text: str) -> int:
+    # Rough OpenAI-style estimate; good enough for relative token accounting
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """Seeded, latency-shaped stand-in for ChatOpenAI."""
+
+    model_name: str = "fake-gpt-4o-mini"
+    latency_ms: float = 200.0
+    latency_distribution: str = "lognormal"
+    # Spread: sigma for lognormal/normal (relative to latency_ms), half-width ratio for uniform
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 0.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_ms: float = 1000.0
+    answer_words: int = 60
+    seed: Optional[int] = 0
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr()
+
+    def model_post_init(self, __context: Any):
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {LATENCY_DISTRIBUTIONS}")
+        self._rng = random.Random(self.seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model_name: str = "gpt-4o-mini", **overrides) -> "FakeChatModel":
+        settings = {
+            "model_name": f"fake-{model_name}",
+            "latency_ms": float(os.getenv("FAKE_LLM_LATENCY_MS", "200")),
+            "latency_distribution": os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal"),
+            "latency_sigma": float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")),
+            "tokens_per_second": float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0")),
+            "error_rate": float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            "timeout_rate": float(os.getenv("FAKE_LLM_TIMEOUT_RATE", "0")),
+            "seed": int(os.getenv("FAKE_LLM_SEED", "0")),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "latency_ms": self.latency_ms, "seed": self.seed}
+
+    # -- LangChain hooks -------------------------------------------------
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        delay, failure = self._plan_call()
+        time.sleep(delay)
+        if failure:
+            raise failure
+        return self._result(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        delay, failure = self._plan_call()
+        await asyncio.sleep(delay)
+        if failure:
+            raise failure
+        return self._result(messages)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        delay, failure = self._plan_call()
+        time.sleep(delay)
+        if failure:
+            raise failure
+        for i, token in enumerate(self._tokens(messages)):
+            if i and self.tokens_per_second > 0:
+                time.sleep(1.0 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        delay, failure = self._plan_call()
+        await asyncio.sleep(delay)
+        if failure:
+            raise failure
+        for i, token in enumerate(self._tokens(messages)):
+            if i and self.tokens_per_second > 0:
+                await asyncio.sleep(1.0 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    # -- Behaviour -------------------------------------------------------
+
+    def sample_latency(self) -> float:
+        """One latency sample in seconds."""
+        with self._rng_lock:
+            return self._sample_latency_ms(self._rng) / 1000.0
+
+    def _sample_latency_ms(self, rng: random.Random) -> float:
+        mean = self.latency_ms
+        if self.latency_distribution == "fixed":
+            return mean
+        if self.latency_distribution == "uniform":
+            return rng.uniform(mean * (1 - self.latency_sigma), mean * (1 + self.latency_sigma))
+        if self.latency_distribution == "normal":
+            return max(0.0, rng.gauss(mean, mean * self.latency_sigma))
+        if self.latency_distribution == "exponential":
+            return rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        # lognormal with median latency_ms: realistic long right tail
+        return mean * rng.lognormvariate(0.0, self.latency_sigma)
+
+    def _plan_call(self):
+        """Latency and (optional) injected error for one call, drawn under one lock."""
+        with self._rng_lock:
+            delay = self._sample_latency_ms(self._rng) / 1000.0
+            roll = self._rng.random()
+        if roll < self.timeout_rate:
+            return self.timeout_ms / 1000.0, self._timeout_error()
+        if roll < self.timeout_rate + self.error_rate:
+            return delay, self._rate_limit_error()
+        return delay, None
+
+    def _rate_limit_error(self) -> Exception:
+        import httpx
+        import openai
+
+        request = httpx.Request("POST", "https://fake-llm.local/v1/chat/completions")
+        response = httpx.Response(
+            429,
+            request=request,
+            headers={"retry-after": "1", "x-ratelimit-remaining-requests": "0"},
+        )
+        return openai.RateLimitError("Rate limit reached (injected by FakeChatModel)", response=response, body=None)
+
+    def _timeout_error(self) -> Exception:
+        import httpx
+        import openai
+
+        return openai.APITimeoutError(request=httpx.Request("POST", "https://fake-llm.local/v1/chat/completions"))
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        content = self.respond(messages)
+        prompt_tokens = sum(_count_tokens(str(m.content)) for m in messages)
+        completion_tokens = _count_tokens(content)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            response_metadata={"model_name": self.model_name, "finish_reason": "stop"},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        words = self.respond(messages).split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    def respond(self, messages: List[BaseMessage]) -> str:
+        """Deterministic reply: judge JSON for judge prompts, otherwise an answer."""
+        system = " ".join(str(m.content) for m in messages if isinstance(m, SystemMessage))
+        prompt = "\n".join(str(m.content) for m in messages if not isinstance(m, SystemMessage))
+        if _JUDGE_MARKER in system:
+            if _BATCH_MARKER in system:
+                return self._batch_verdicts(prompt)
+            return json.dumps(self._verdict(prompt))
+        return self._answer(prompt)
+
+    def _answer(self, prompt: str) -> str:
+        rng = random.Random(_digest(prompt))
+        query = prompt.split("Query:", 1)[-1].strip().splitlines()[0] if "Query:" in prompt else prompt[:80]
+        words = [rng.choice(_VOCABULARY) for _ in range(self.answer_words)]
+        return f"Research summary for '{query}': " + " ".join(words) + "."
+
+    @staticmethod
+    def _verdict(item_prompt: str) -> Dict[str, Any]:
+        # Hash only the item itself, so single and batched judging agree
+        rng = random.Random(_digest(item_prompt.split("\n\nEvaluate ")[0].strip()))
+        scores = {name: rng.randint(3, 5) for name in ("relevance", "accuracy", "completeness", "grounding")}
+        return {
+            "scores": scores,
+            "reasoning": "Deterministic verdict from FakeChatModel.",
+            "overall": sum(scores.values()) / len(scores),
+        }
+
+    def _batch_verdicts(self, prompt: str) -> str:
+        headers = list(_ITEM_HEADER.finditer(prompt))
+        evaluations = []
+        for i, header in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(prompt)
+            evaluations.append({"id": header.group(1), **self._verdict(prompt[header.end():end].strip())})
+        return json.dumps({"evaluations": evaluations})
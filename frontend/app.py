@@ -10,6 +10,8 @@ Setup:
 5. Deploy on Streamlit Cloud
 """
 
+import json
+
 import streamlit as st
 import requests
 
@@ -26,6 +28,42 @@ st.caption("Ask me anything and I'll research it for you!")
 # For local testing, you can use: API_URL = "http://localhost:8000"
 API_URL = st.secrets.get("API_URL", "http://localhost:8000")
 
+
+class StreamInterrupted(requests.exceptions.RequestException):
+    """The backend stalled, dropped the connection or failed after the answer had started."""
+
+
+def stream_chat(message: str, received: list):
+    """
+    Yield answer tokens from the backend's /chat/stream NDJSON endpoint.
+    Tokens are also appended to `received`, so a cut-off answer can be kept.
+    """
+    with requests.post(
+        f"{API_URL}/chat/stream",
+        json={"message": message},
+        stream=True,
+        timeout=(5, 60)  # connect timeout, then max wait between chunks
+    ) as response:
+        response.raise_for_status()
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event["type"] == "token":
+                    received.append(event["content"])
+                    yield event["content"]
+                elif event["type"] == "error":
+                    # Once tokens have been shown, keep them rather than replace them with the error
+                    if received:
+                        raise StreamInterrupted(event["detail"])
+                    raise requests.exceptions.RequestException(event["detail"])
+        except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError) as e:
+            # A read timeout inside iter_lines surfaces as ConnectionError, not ReadTimeout
+            raise StreamInterrupted("the backend stopped responding") from e
+
+
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -44,35 +82,32 @@ if query := st.chat_input("Ask me anything..."):
     with st.chat_message("user"):
         st.write(query)
     
-    # Get response from API
+    # Stream response from API, rendering tokens as they arrive
     with st.chat_message("assistant"):
-        with st.spinner("Researching..."):
-            try:
-                response = requests.post(
-                    f"{API_URL}/chat",
-                    json={"message": query},
-                    timeout=60  # Increase timeout for longer queries
-                )
-                response.raise_for_status()
-                result = response.json()
-                assistant_response = result.get("response", "No response received")
-                
-                st.write(assistant_response)
-                st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-                
-            except requests.exceptions.ConnectionError:
-                error_msg = f"❌ Could not connect to API at {API_URL}. Make sure your backend is running!"
-                st.error(error_msg)
-                st.info("For local testing, start your backend with: `uvicorn main:app --reload`")
-                
-            except requests.exceptions.Timeout:
-                error_msg = "⏱️ Request timed out. The query might be too complex."
-                st.error(error_msg)
-                
-            except requests.exceptions.RequestException as e:
-                error_msg = f"❌ Error: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+        received = []
+        try:
+            assistant_response = st.write_stream(stream_chat(query, received))
+            st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+            
+        except StreamInterrupted as e:
+            partial = "".join(received)
+            st.warning(f"⚠️ The answer was cut off before it was complete ({e}).")
+            if partial:
+                st.session_state.messages.append({"role": "assistant", "content": partial + " …"})
+            
+        except requests.exceptions.ConnectionError:
+            error_msg = f"❌ Could not connect to API at {API_URL}. Make sure your backend is running!"
+            st.error(error_msg)
+            st.info("For local testing, start your backend with: `uvicorn main:app --reload`")
+            
+        except requests.exceptions.Timeout:
+            error_msg = "⏱️ Request timed out. The query might be too complex."
+            st.error(error_msg)
+            
+        except requests.exceptions.RequestException as e:
+            error_msg = f"❌ Error: {str(e)}"
+            st.error(error_msg)
+            st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
 # Sidebar with info
 with st.sidebar:
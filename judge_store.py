@@ -0,0 +1,141 @@
+"""
+Judge Result Store
+Content-addressed storage for LLM-as-judge verdicts, so reruns only pay for
+(query, response) pairs whose inputs, rubric or judge model actually changed.
+
+Backends:
+  memory            - process lifetime only
+  sqlite:<path>     - single file, safe across threads
+  jsondir:<path>    - one JSON file per verdict (easy to inspect and diff)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def verdict_key(
+    rubric: str,
+    judge_model: str,
+    query: str,
+    response: str,
+    expected_topics: Optional[List[str]] = None,
+    expected_not: Optional[List[str]] = None
+) -> str:
+    """Hash of everything that determines a judge verdict."""
+    payload = json.dumps(
+        {
+            "rubric": rubric,
+            "judge_model": judge_model,
+            "query": query,
+            "response": response,
+            "expected_topics": list(expected_topics or []),
+            "expected_not": list(expected_not or []),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryJudgeStore:
+    """In-process verdict store."""
+
+    def __init__(self):
+        self._verdicts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            verdict = self._verdicts.get(key)
+        return dict(verdict) if verdict is not None else None
+
+    def put(self, key: str, verdict: Dict[str, Any]):
+        with self._lock:
+            self._verdicts[key] = dict(verdict)
+
+    def __len__(self) -> int:
+        return len(self._verdicts)
+
+
+class SQLiteJudgeStore:
+    """Verdicts in a single SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS judge_verdicts (key TEXT PRIMARY KEY, verdict TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT verdict FROM judge_verdicts WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, verdict: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO judge_verdicts (key, verdict) VALUES (?, ?)",
+                (key, json.dumps(verdict)),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM judge_verdicts").fetchone()[0]
+
+
+class JSONDirJudgeStore:
+    """One JSON file per verdict under <directory>/<key[:2]>/<key>.json."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, verdict: Dict[str, Any]):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial verdict
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(verdict, f)
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob("*/*.json"))
+
+
+def make_judge_store(spec: Optional[str]):
+    """
+    Build a store from a spec string: "memory", "sqlite:<path>" or "jsondir:<path>".
+    None, "" or "none" disables verdict reuse.
+    """
+    if not spec or spec == "none":
+        return None
+    kind, _, location = spec.partition(":")
+    if kind == "memory":
+        return MemoryJudgeStore()
+    if kind == "sqlite" and location:
+        return SQLiteJudgeStore(location)
+    if kind == "jsondir" and location:
+        return JSONDirJudgeStore(location)
+    raise ValueError(f"Unknown judge store spec: {spec!r} (use memory, sqlite:<path> or jsondir:<path>)")
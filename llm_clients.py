@@ -0,0 +1,314 @@
+"""
+Shared LLM Client Registry
+One keep-alive HTTP connection pool (sync and async) per upstream host, shared
+by every ChatOpenAI built through get_chat_model() - the assistant, the judge
+and the backend - so repeated calls reuse warm TLS connections instead of
+each client opening its own.
+
+Tuning (environment):
+  LLM_POOL_MAX_CONNECTIONS   (default 100) - sockets per host
+  LLM_POOL_MAX_KEEPALIVE     (default 20)  - idle sockets kept open per host
+  LLM_POOL_KEEPALIVE_EXPIRY  (default 30)  - seconds before an idle socket closes
+  LLM_HTTP2                  (default 0)   - multiplex over HTTP/2 (needs `h2`)
+  LLM_HTTP_TIMEOUT           (default 60)  - request timeout in seconds
+  LLM_BACKEND                (default openai) - "fake" swaps in fake_llm.FakeChatModel
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class PoolMetrics:
+    """Request and connection counters for one host's pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen_connections: set = set()
+        self.requests = 0
+        self.active_requests = 0
+        self.peak_active_requests = 0
+        self.connections_opened = 0
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.active_requests += 1
+            self.peak_active_requests = max(self.peak_active_requests, self.active_requests)
+
+    def finished(self, connections: list):
+        with self._lock:
+            self.active_requests -= 1
+            # A connection id we haven't seen before means a new socket (and handshake)
+            current = {id(connection) for connection in connections}
+            self.connections_opened += len(current - self._seen_connections)
+            self._seen_connections = current
+
+    def snapshot(self, connections: list) -> Dict[str, int]:
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "requests": self.requests,
+            "active_requests": self.active_requests,
+            "peak_active_requests": self.peak_active_requests,
+            "connections_open": len(connections),
+            "connections_idle": idle,
+            "connections_opened": self.connections_opened,
+            # Requests served over an already-open socket
+            "connection_reuse": max(0, self.requests - self.connections_opened),
+        }
+
+
+def _connections(pool) -> list:
+    return list(getattr(pool, "connections", []))
+
+
+class _MeteredTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.HTTPTransport, metrics: PoolMetrics):
+        self._transport = transport
+        self.metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.metrics.started()
+        try:
+            return self._transport.handle_request(request)
+        finally:
+            self.metrics.finished(_connections(self._transport._pool))
+
+    def snapshot(self) -> Dict[str, int]:
+        return self.metrics.snapshot(_connections(self._transport._pool))
+
+    def close(self):
+        self._transport.close()
+
+
+class _AsyncMeteredTransport(httpx.AsyncBaseTransport):
+    """
+    One connection pool per event loop. Async connections belong to the loop
+    that opened them, and the async runner, benchmarks and notebook call
+    asyncio.run() repeatedly, each time with a new loop. Pools of closed loops
+    are dropped; their sockets can't be closed from another loop.
+    """
+
+    def __init__(self, transport_factory: Callable[[], httpx.AsyncHTTPTransport], metrics: PoolMetrics):
+        self._transport_factory = transport_factory
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._transports: Dict[int, Tuple[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]] = {}
+
+    def _loop_transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._transports.get(id(loop))
+            if entry is None or entry[0] is not loop:
+                self._transports = {
+                    key: value for key, value in self._transports.items() if not value[0].is_closed()
+                }
+                entry = self._transports[id(loop)] = (loop, self._transport_factory())
+        return entry[1]
+
+    def _live_connections(self) -> list:
+        with self._lock:
+            transports = [transport for loop, transport in self._transports.values() if not loop.is_closed()]
+        return [connection for transport in transports for connection in _connections(transport._pool)]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._loop_transport()
+        self.metrics.started()
+        try:
+            return await transport.handle_async_request(request)
+        finally:
+            self.metrics.finished(self._live_connections())
+
+    def snapshot(self) -> Dict[str, int]:
+        return self.metrics.snapshot(self._live_connections())
+
+    async def aclose(self):
+        """Close the running loop's pool (others are dropped with their loops)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._transports.pop(id(loop), None)
+        if entry is not None and entry[0] is loop:
+            await entry[1].aclose()
+
+
+class ClientRegistry:
+    """Per-host httpx pools and the ChatOpenAI instances built on them."""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 60.0
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # Fall back to HTTP/1.1 keep-alive when the h2 package isn't installed
+        self.http2 = http2 and _h2_available()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._models: Dict[Tuple, Any] = {}
+
+    @classmethod
+    def from_env(cls) -> "ClientRegistry":
+        return cls(
+            max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "30")),
+            http2=os.getenv("LLM_HTTP2", "0") == "1",
+            timeout=float(os.getenv("LLM_HTTP_TIMEOUT", "60")),
+        )
+
+    def http_client(self, base_url: Optional[str] = None) -> httpx.Client:
+        """Shared sync client for the host of `base_url`."""
+        host = _host_key(base_url)
+        with self._lock:
+            client = self._clients.get(host)
+            if client is None:
+                transport = httpx.HTTPTransport(limits=self.limits, http2=self.http2)
+                client = httpx.Client(
+                    transport=_MeteredTransport(transport, PoolMetrics()), timeout=self.timeout
+                )
+                self._clients[host] = client
+        return client
+
+    def async_http_client(self, base_url: Optional[str] = None) -> httpx.AsyncClient:
+        """
+        Shared async client for the host of `base_url`. It keeps one pool per
+        event loop, so it stays usable across repeated asyncio.run() calls.
+        """
+        host = _host_key(base_url)
+        with self._lock:
+            client = self._async_clients.get(host)
+            if client is None:
+                def transport_factory():
+                    return httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+                client = httpx.AsyncClient(
+                    transport=_AsyncMeteredTransport(transport_factory, PoolMetrics()), timeout=self.timeout
+                )
+                self._async_clients[host] = client
+        return client
+
+    def chat_model(self, model: str = "gpt-4o-mini", temperature: float = 0, **kwargs):
+        """ChatOpenAI wired to the shared pools; identical settings return the same instance."""
+        backend = llm_backend()
+        key = (backend, model, temperature, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+        with self._lock:
+            chat = self._models.get(key)
+        if chat is None and backend == "fake":
+            from fake_llm import FakeChatModel
+            with self._lock:
+                chat = self._models.setdefault(key, FakeChatModel.from_env(model))
+        if chat is None:
+            from langchain_openai import ChatOpenAI
+            from rate_limiter import rate_limit_enabled
+
+            base_url = kwargs.get("base_url") or os.getenv("OPENAI_BASE_URL")
+            if rate_limit_enabled():
+                # The rate limiter owns retries; SDK retries would hide 429s from it
+                kwargs.setdefault("max_retries", 0)
+            chat = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                http_client=self.http_client(base_url),
+                http_async_client=self.async_http_client(base_url),
+                # x-ratelimit-* headers feed the adaptive rate limiter (rate_limiter.py)
+                include_response_headers=kwargs.pop("include_response_headers", True),
+                **kwargs
+            )
+            with self._lock:
+                chat = self._models.setdefault(key, chat)
+        return chat
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilization per host, for sync and async clients."""
+        with self._lock:
+            clients = list(self._clients.items())
+            async_clients = list(self._async_clients.items())
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "sync": {host: _client_stats(client) for host, client in clients},
+            "async": {host: _client_stats(client) for host, client in async_clients},
+        }
+
+    def reset(self):
+        """
+        Forget all pools and models without touching their sockets. Call in a
+        forked child so it never shares connections with its parent.
+        """
+        with self._lock:
+            self._clients = {}
+            self._async_clients = {}
+            self._models = {}
+
+    def close(self):
+        """Close sync pools (async pools close with their event loop)."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+            self._async_clients = {}
+            self._models = {}
+        for client in clients:
+            client.close()
+
+
+def llm_backend() -> str:
+    return os.getenv("LLM_BACKEND", "openai").lower()
+
+
+def llm_available() -> bool:
+    """True when get_chat_model() can serve real calls (an API key, or the fake backend)."""
+    return llm_backend() == "fake" or bool(os.getenv("OPENAI_API_KEY"))
+
+
+def _host_key(base_url: Optional[str]) -> str:
+    parts = urlsplit(base_url or DEFAULT_BASE_URL)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _client_stats(client) -> Dict[str, int]:
+    return client._transport.snapshot()
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ClientRegistry:
+    """Process-wide registry, configured from the environment on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry.from_env()
+    return _registry
+
+
+def get_chat_model(model: str = "gpt-4o-mini", temperature: float = 0, **kwargs):
+    """
+    Shared-pool ChatOpenAI for `model`; use this instead of constructing
+    ChatOpenAI directly. Returns a FakeChatModel when LLM_BACKEND=fake.
+    """
+    return get_registry().chat_model(model=model, temperature=temperature, **kwargs)
@@ -0,0 +1,227 @@
+"""
+Multi-Variant Golden Dataset Comparison
+Evaluates the golden dataset across several (model, prompt template,
+temperature) variants concurrently and reports quality against latency,
+tokens and cost for each. All variants are scored by the same judge and
+share its verdict store, so an answer already judged for one variant (or
+in an earlier run with a persistent store) is not judged again.
+
+Usage:
+  python matrix_eval.py                                  # built-in example variants
+  python matrix_eval.py --variants variants.json --concurrency 16 --output matrix.json
+
+variants.json is a list of objects:
+  [{"name": "mini-short", "model": "gpt-4o-mini", "temperature": 0,
+    "prompt_template": "Answer briefly.\\n\\nQuery: {query}"},
+   {"name": "4o", "model": "gpt-4o", "prompt_file": "prompts/research.txt"}]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import research_assistant_with_eval as assistant
+from eval_system import GoldenDataset
+from judge_store import make_judge_store
+from llm_clients import get_chat_model
+from metrics import estimate_cost
+
+SHORT_PROMPT = """Answer concisely in at most three sentences.
+
+Query: {query}"""
+
+
+@dataclass
+class Variant:
+    """One configuration of the research assistant to evaluate."""
+    name: str
+    model: str = "gpt-4o-mini"
+    prompt_template: str = assistant.RESEARCH_PROMPT
+    temperature: float = 0.0
+
+
+DEFAULT_VARIANTS = [
+    Variant("baseline"),
+    Variant("short-prompt", prompt_template=SHORT_PROMPT),
+    Variant("temperature-0.7", temperature=0.7),
+]
+
+
+def load_variants(path: str) -> List[Variant]:
+    """Read variants from JSON; "prompt_file" is resolved relative to the JSON file."""
+    with open(path, "r") as f:
+        entries = json.load(f)
+    variants = []
+    for entry in entries:
+        entry = dict(entry)
+        prompt_file = entry.pop("prompt_file", None)
+        if prompt_file:
+            entry["prompt_template"] = (Path(path).parent / prompt_file).read_text()
+        variants.append(Variant(**entry))
+    for variant in variants:
+        if "{query}" not in variant.prompt_template:
+            raise ValueError(f"Variant {variant.name!r}: prompt_template must contain {{query}}")
+    if len({variant.name for variant in variants}) != len(variants):
+        raise ValueError("Variant names must be unique")
+    return variants
+
+
+async def arun_matrix(
+    variants: List[Variant],
+    dataset_path: Union[str, GoldenDataset] = "golden_dataset.json",
+    concurrency: int = 8,
+    timeout: Optional[float] = 60.0,
+    max_retries: int = 2,
+    on_progress: Optional[Callable[[str, int, int], None]] = None
+) -> Dict[str, List[dict]]:
+    """
+    Run every variant over the dataset at the same time. `concurrency` is
+    split evenly across variants. Returns variant name -> records in dataset order.
+    """
+    dataset = assistant._open_dataset(dataset_path)
+    total = len(dataset.get_all_cases())
+    per_variant = max(1, concurrency // max(1, len(variants)))
+
+    async def run_variant(variant: Variant) -> List[dict]:
+        chat_model = get_chat_model(variant.model, temperature=variant.temperature)
+        records: List[Optional[dict]] = [None] * total
+        done = 0
+        async for index, record in assistant.aiter_golden_dataset_eval(
+            dataset,
+            concurrency=per_variant,
+            timeout=timeout,
+            max_retries=max_retries,
+            chat_model=chat_model,
+            prompt_template=variant.prompt_template
+        ):
+            records[index] = record
+            done += 1
+            if on_progress:
+                on_progress(variant.name, done, total)
+        return records
+
+    results = await asyncio.gather(*(run_variant(variant) for variant in variants))
+    return {variant.name: records for variant, records in zip(variants, results)}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize_variant(variant: Variant, records: List[dict]) -> Dict[str, Any]:
+    """
+    Quality, answer latency (generation stage), tokens and cost for one variant.
+    Answers the judge failed to score count as judge_errors: their latency,
+    tokens and cost are kept, but they are left out of mean_score.
+    """
+    scores, latencies, input_tokens, output_tokens = [], [], [], []
+    cost = 0.0
+    failed = 0
+    judge_errors = 0
+    for record in records:
+        result = record["result"]
+        if result.get("error") or "evaluation" not in result:
+            failed += 1
+            continue
+        if result["evaluation"].get("error"):
+            judge_errors += 1
+        else:
+            scores.append(record["score"])
+        metrics = result.get("metrics", {})
+        if "generation" in metrics.get("stages_ms", {}):
+            latencies.append(metrics["stages_ms"]["generation"])
+        tokens = metrics.get("tokens", {}).get("generation", {})
+        input_tokens.append(tokens.get("input", 0))
+        output_tokens.append(tokens.get("output", 0))
+        cost += estimate_cost(variant.model, tokens.get("input", 0), tokens.get("output", 0))
+
+    count = len(records)
+    return {
+        "variant": variant.name,
+        "model": variant.model,
+        "temperature": variant.temperature,
+        "cases": count,
+        "failed": failed,
+        "judge_errors": judge_errors,
+        "mean_score": statistics.mean(scores) if scores else 0.0,
+        "pass_rate": sum(1 for r in records if r["passed"]) / count if count else 0.0,
+        "validation_pass_rate": sum(1 for r in records if r["validation_passed"]) / count if count else 0.0,
+        "p50_latency_ms": _percentile(latencies, 50),
+        "p95_latency_ms": _percentile(latencies, 95),
+        "avg_input_tokens": statistics.mean(input_tokens) if input_tokens else 0.0,
+        "avg_output_tokens": statistics.mean(output_tokens) if output_tokens else 0.0,
+        "cost_usd": cost,
+        "cost_per_1k_cases_usd": cost / len(input_tokens) * 1000 if input_tokens else 0.0,
+    }
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    header = (f"{'variant':<20}{'model':<16}{'temp':>5}{'score':>7}{'pass':>7}{'p50 ms':>9}"
+              f"{'p95 ms':>9}{'in tok':>8}{'out tok':>8}{'$/1k cases':>12}{'failed':>8}{'judge err':>10}")
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['variant']:<20}{row['model']:<16}{row['temperature']:>5.1f}{row['mean_score']:>7.2f}"
+            f"{row['pass_rate']:>7.0%}{row['p50_latency_ms']:>9.0f}{row['p95_latency_ms']:>9.0f}"
+            f"{row['avg_input_tokens']:>8.0f}{row['avg_output_tokens']:>8.0f}"
+            f"{row['cost_per_1k_cases_usd']:>12.4f}{row['failed']:>8}{row['judge_errors']:>10}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare research assistant variants on the golden dataset.")
+    parser.add_argument("--dataset", default="golden_dataset.json", help="Path to the golden dataset (.json or .jsonl)")
+    parser.add_argument("--variants", help="JSON file with variants (default: built-in examples)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Cases in flight across all variants")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-case timeout in seconds")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per case with jittered backoff")
+    parser.add_argument("--judge-store", help="Shared verdict store: memory, sqlite:<path>, jsondir:<path>")
+    parser.add_argument("--use-response-cache", action="store_true",
+                        help="Allow cached answers (off by default so latency is measured)")
+    parser.add_argument("--output", help="Write the summary and per-case records as JSON")
+    args = parser.parse_args()
+
+    variants = load_variants(args.variants) if args.variants else DEFAULT_VARIANTS
+    if args.judge_store is not None:
+        assistant.judge.store = make_judge_store(args.judge_store)
+    if not args.use_response_cache:
+        assistant.response_cache = None
+    if not assistant.llm:
+        print("⚠️  No LLM configured (set OPENAI_API_KEY or LLM_BACKEND=fake); results will be mock answers.")
+
+    def progress(name: str, done: int, total: int):
+        if done == total:
+            print(f"  {name}: {done}/{total} cases done")
+
+    print(f"Running {len(variants)} variants on {args.dataset}...")
+    results = asyncio.run(arun_matrix(
+        variants,
+        args.dataset,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        max_retries=args.retries,
+        on_progress=progress
+    ))
+    rows = [summarize_variant(variant, results[variant.name]) for variant in variants]
+
+    print()
+    print(format_table(rows))
+    judge_stats = assistant.judge.stats()
+    print(f"\nJudge calls: {judge_stats['judge_calls']}, verdicts reused across variants: {judge_stats['reused_verdicts']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "variants": [asdict(variant) for variant in variants],
+                "summary": rows,
+                "records": results
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
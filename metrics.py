@@ -0,0 +1,380 @@
+"""
+In-Process Metrics
+Low-overhead counters and histograms for the hot path, with Prometheus text
+exposition (served on /metrics by the backend).
+
+Pipeline code wraps each stage in `stage("name")`. The timing goes to the
+process-wide registry and, inside `request_metrics()`, to that request's
+own RequestMetrics (carried in a ContextVar, so it follows async tasks).
+`record_llm_usage` adds token counts from a LangChain message's
+usage_metadata and an estimated cost.
+
+Metrics:
+  llm_eval_stage_duration_seconds{stage}   histogram
+  llm_eval_tokens_total{stage,kind}        counter (kind = input | output)
+  llm_eval_cost_usd_total{stage}           counter
+
+Multiple processes (gunicorn workers): with METRICS_MULTIPROC_DIR set, each
+process writes its registry to metrics-<pid>.json in that directory
+(periodically, and whenever it serves a scrape), and render_metrics() merges
+every file, so /metrics reports totals whichever worker answers. A finished
+worker's file is folded into metrics-archive.json (mark_process_dead), so
+counters never go backwards.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per 1M tokens (input, output). "fake-<model>" is priced as <model>.
+MODEL_PRICES_PER_1M = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return {"buckets": list(zip(self.buckets + (float("inf"),), cumulative)), "sum": total, "count": count}
+
+    def merge(self, counts: List[int], total: float, count: int):
+        """Add another histogram's raw (non-cumulative) bucket counts."""
+        with self._lock:
+            for index, c in enumerate(counts):
+                self._counts[index] += c
+            self._sum += total
+            self._count += count
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile (upper bound of the bucket containing it)."""
+        snap = self.snapshot()
+        if not snap["count"]:
+            return 0.0
+        target = q * snap["count"]
+        for bound, cumulative in snap["buckets"]:
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class MetricsRegistry:
+    """Named, labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, Counter]] = {}
+        self._help: Dict[str, str] = {}
+
+    def histogram(self, name: str, help: str = "", **labels: str) -> Histogram:
+        key = tuple(sorted(labels.items()))
+        series = self._histograms.get(name)
+        if series is None or key not in series:
+            with self._lock:
+                series = self._histograms.setdefault(name, {})
+                series.setdefault(key, Histogram())
+                self._help.setdefault(name, help)
+        return series[key]
+
+    def counter(self, name: str, help: str = "", **labels: str) -> Counter:
+        key = tuple(sorted(labels.items()))
+        series = self._counters.get(name)
+        if series is None or key not in series:
+            with self._lock:
+                series = self._counters.setdefault(name, {})
+                series.setdefault(key, Counter())
+                self._help.setdefault(name, help)
+        return series[key]
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+        for name, series in sorted(counters.items()):
+            lines.append(f"# HELP {name} {self._help.get(name, '')}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, counter in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {counter.value:g}")
+        for name, series in sorted(histograms.items()):
+            lines.append(f"# HELP {name} {self._help.get(name, '')}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items()):
+                snap = histogram.snapshot()
+                for bound, cumulative in snap["buckets"]:
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {snap['sum']:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {snap['count']}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable copy of every series (histograms as raw bucket counts)."""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            help_text = dict(self._help)
+        data: Dict[str, Any] = {"help": help_text, "counters": {}, "histograms": {}}
+        for name, series in counters.items():
+            data["counters"][name] = [[list(labels), counter.value] for labels, counter in series.items()]
+        for name, series in histograms.items():
+            entries = data["histograms"][name] = []
+            for labels, histogram in series.items():
+                with histogram._lock:
+                    entries.append([list(labels), list(histogram.buckets), list(histogram._counts),
+                                    histogram._sum, histogram._count])
+        return data
+
+    def merge(self, data: Dict[str, Any]):
+        """Add the series from another registry's to_dict() into this one."""
+        for name, series in data.get("counters", {}).items():
+            for labels, value in series:
+                self.counter(name, data["help"].get(name, ""), **dict(labels)).inc(value)
+        for name, series in data.get("histograms", {}).items():
+            for labels, buckets, counts, total, count in series:
+                histogram = self.histogram(name, data["help"].get(name, ""), **dict(labels))
+                if list(histogram.buckets) == buckets:
+                    histogram.merge(counts, total, count)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+_ARCHIVE = "metrics-archive.json"
+
+
+def multiprocess_dir() -> Optional[str]:
+    return os.getenv("METRICS_MULTIPROC_DIR") or None
+
+
+@contextmanager
+def _dir_lock(directory: str, exclusive: bool) -> Iterator[None]:
+    # Keeps readers from seeing a worker's series both archived and in its own file.
+    # fcntl is Unix-only, like gunicorn; single-process use never gets here.
+    import fcntl
+
+    with open(os.path.join(directory, ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def write_snapshot(directory: Optional[str] = None, registry: Optional[MetricsRegistry] = None, pid: Optional[int] = None):
+    """Write this process's registry to <directory>/metrics-<pid>.json."""
+    directory = directory or multiprocess_dir()
+    if directory:
+        _write_json(Path(directory) / f"metrics-{pid or os.getpid()}.json", (registry or REGISTRY).to_dict())
+
+
+def mark_process_dead(pid: int, directory: Optional[str] = None):
+    """Fold a finished process's last snapshot into the archive (run by the gunicorn master)."""
+    directory = directory or multiprocess_dir()
+    if not directory:
+        return
+    path = Path(directory) / f"metrics-{pid}.json"
+    with _dir_lock(directory, exclusive=True):
+        if not path.exists():
+            return
+        archive = MetricsRegistry()
+        for source in (Path(directory) / _ARCHIVE, path):
+            if source.exists():
+                archive.merge(json.loads(source.read_text()))
+        _write_json(Path(directory) / _ARCHIVE, archive.to_dict())
+        path.unlink()
+
+
+def render_metrics(directory: Optional[str] = None) -> str:
+    """
+    Prometheus text for /metrics: this process's registry, or with
+    METRICS_MULTIPROC_DIR the sum over every process that wrote a snapshot.
+    """
+    directory = directory or multiprocess_dir()
+    if not directory:
+        return REGISTRY.render_prometheus()
+    write_snapshot(directory)
+    merged = MetricsRegistry()
+    with _dir_lock(directory, exclusive=False):
+        for path in sorted(Path(directory).glob("metrics-*.json")):
+            try:
+                merged.merge(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue                # a worker's file vanished or is mid-replace
+    return merged.render_prometheus()
+
+
+def start_snapshot_writer(interval: float = 5.0) -> Optional[threading.Thread]:
+    """Write this process's snapshot every `interval` seconds from a daemon thread."""
+    directory = multiprocess_dir()
+    if not directory:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(directory)
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=loop, name="metrics-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+
+def clear_multiprocess_dir(directory: Optional[str] = None):
+    """Remove snapshots left by a previous server run (call once, in the master, at startup)."""
+    directory = directory or multiprocess_dir()
+    if directory:
+        for path in Path(directory).glob("metrics-*.json"):
+            path.unlink(missing_ok=True)
+
+
+class RequestMetrics:
+    """Per-request stage timings, token counts and cost."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages_ms: Dict[str, float] = {}
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.cost_usd = 0.0
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages_ms[name] = self.stages_ms.get(name, 0.0) + seconds * 1000
+
+    def add_usage(self, name: str, input_tokens: int, output_tokens: int, cost: float):
+        tokens = self.tokens.setdefault(name, {"input": 0, "output": 0})
+        tokens["input"] += input_tokens
+        tokens["output"] += output_tokens
+        self.cost_usd += cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages_ms": {name: round(ms, 3) for name, ms in self.stages_ms.items()},
+            "tokens": self.tokens,
+            "cost_usd": round(self.cost_usd, 8),
+        }
+
+
+_current: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar("request_metrics", default=None)
+
+
+@contextmanager
+def request_metrics() -> Iterator[RequestMetrics]:
+    """Collect stage metrics for everything run inside this block."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage (also when it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        REGISTRY.histogram("llm_eval_stage_duration_seconds", "Time spent per pipeline stage", stage=name).observe(elapsed)
+        current = _current.get()
+        if current is not None:
+            current.add_stage(name, elapsed)
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost; 0 for models without a known price."""
+    name = (model or "").removeprefix("fake-")
+    prices = MODEL_PRICES_PER_1M.get(name)
+    if prices is None:
+        # Dated snapshots, e.g. gpt-4o-mini-2024-07-18
+        prices = next((p for m, p in MODEL_PRICES_PER_1M.items() if name.startswith(m + "-")), None)
+    if prices is None:
+        return 0.0
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def record_llm_usage(name: str, message: Any, model: Optional[str] = None):
+    """Record token usage and cost from a LangChain message's usage_metadata."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    input_tokens = int(usage.get("input_tokens", 0))
+    output_tokens = int(usage.get("output_tokens", 0))
+    if not input_tokens and not output_tokens:
+        return
+    model = (getattr(message, "response_metadata", None) or {}).get("model_name") or model
+    cost = estimate_cost(model, input_tokens, output_tokens)
+    REGISTRY.counter("llm_eval_tokens_total", "LLM tokens used", stage=name, kind="input").inc(input_tokens)
+    REGISTRY.counter("llm_eval_tokens_total", "LLM tokens used", stage=name, kind="output").inc(output_tokens)
+    REGISTRY.counter("llm_eval_cost_usd_total", "Estimated LLM cost in USD", stage=name).inc(cost)
+    current = _current.get()
+    if current is not None:
+        current.add_usage(name, input_tokens, output_tokens, cost)
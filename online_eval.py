@@ -0,0 +1,218 @@
+"""
+Online Evaluation
+Judges a sample of live traffic off the request path. The request handler
+runs the cheap RuleBasedValidator inline, asks the sampler whether the
+response should be judged and, if so, queues it; a small pool of asyncio
+workers runs LLMJudge.aevaluate and attaches the scores to the original
+Langfuse trace (through the judge's ScoreExporter).
+
+Sampling (ONLINE_EVAL_MODE):
+  off     never judge (default)
+  rate    each response is judged with probability ONLINE_EVAL_RATE
+  hash    stratified by query hash: a query is judged when its hash falls in
+          the first ONLINE_EVAL_RATE of the hash space, so the sample spreads
+          evenly over distinct queries and repeats of a query agree
+Responses that fail validation are always judged (ONLINE_EVAL_ALWAYS_ON_FAILURE=0
+turns this off; ONLINE_EVAL_RATE=0 judges only failures). When the queue
+(ONLINE_EVAL_MAX_QUEUE) is full, new jobs are dropped and counted rather
+than slowing requests down.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from eval_system import RuleBasedValidator, ValidationResult
+from metrics import REGISTRY
+
+SAMPLING_MODES = ("off", "rate", "hash")
+
+
+class OnlineEvalSampler:
+    """Decides which responses get judged."""
+
+    def __init__(
+        self,
+        rate: float = 0.05,
+        mode: str = "rate",
+        always_on_validation_failure: bool = True,
+        seed: Optional[int] = None
+    ):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode {mode!r} (expected one of {', '.join(SAMPLING_MODES)})")
+        self.rate = min(1.0, max(0.0, rate))
+        self.mode = mode
+        self.always_on_validation_failure = always_on_validation_failure
+        self._rng = random.Random(seed)
+
+    @staticmethod
+    def query_bucket(query: str) -> float:
+        """Stable position of a (normalized) query in [0, 1)."""
+        digest = hashlib.sha256(" ".join(query.lower().split()).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+    def decide(self, query: str, validation_passed: bool = True) -> Optional[str]:
+        """Reason for judging this response ("validation_failure", "rate", "hash"), or None."""
+        if not validation_passed and self.always_on_validation_failure:
+            return "validation_failure"
+        if self.mode == "rate" and self._rng.random() < self.rate:
+            return "rate"
+        if self.mode == "hash" and self.query_bucket(query) < self.rate:
+            return "hash"
+        return None
+
+
+@dataclass
+class EvalJob:
+    trace_id: Optional[str]
+    query: str
+    response: str
+    reason: str
+    validation: ValidationResult
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class OnlineEvaluator:
+    """
+    Background judge for sampled production responses.
+
+    Call submit() from the request handler (it never awaits the judge).
+    Workers start on the first submit in the running event loop; call
+    stop() on shutdown to drain what is queued.
+    """
+
+    def __init__(
+        self,
+        judge: Any,
+        sampler: OnlineEvalSampler,
+        validator: Optional[RuleBasedValidator] = None,
+        workers: int = 2,
+        max_queue: int = 1000
+    ):
+        self.judge = judge
+        self.sampler = sampler
+        self.validator = validator or RuleBasedValidator()
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.counts = {"seen": 0, "sampled": 0, "dropped": 0, "judged": 0, "errors": 0}
+        self.sampled_by_reason: Dict[str, int] = {}
+        self._score_sum = 0.0
+
+    def submit(self, trace_id: Optional[str], query: str, response: str) -> Optional[str]:
+        """
+        Validate the response and queue it for judging if sampled.
+        Returns the sampling reason, or None when it was not queued.
+        Must be called from inside the event loop.
+        """
+        self.counts["seen"] += 1
+        validation = self.validator.validate_response({"answer": response})
+        if not validation.valid:
+            REGISTRY.counter("llm_eval_online_validation_failures_total", "Live responses failing validation").inc()
+        reason = self.sampler.decide(query, validation.valid)
+        if reason is None:
+            return None
+
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait(EvalJob(trace_id, query, response, reason, validation))
+        except asyncio.QueueFull:
+            self.counts["dropped"] += 1
+            REGISTRY.counter("llm_eval_online_eval_total", "Online evaluation jobs", outcome="dropped").inc()
+            return None
+        self.counts["sampled"] += 1
+        self.sampled_by_reason[reason] = self.sampled_by_reason.get(reason, 0) + 1
+        return reason
+
+    async def stop(self, timeout: float = 10.0):
+        """Wait up to `timeout` seconds for queued jobs, then stop the workers."""
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Sampling and judging counters for the health endpoint."""
+        return {
+            "mode": self.sampler.mode,
+            "rate": self.sampler.rate,
+            **self.counts,
+            "sampled_by_reason": dict(self.sampled_by_reason),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "mean_overall_score": self._score_sum / self.counts["judged"] if self.counts["judged"] else None,
+        }
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        loop = asyncio.get_running_loop()
+        while len(self._tasks) < self.workers:
+            # Fresh context: workers must not inherit the submitting request's
+            # metrics or trace context
+            self._tasks.append(loop.create_task(self._worker(), context=contextvars.Context()))
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._evaluate(job)
+            finally:
+                self._queue.task_done()
+
+    async def _evaluate(self, job: EvalJob):
+        REGISTRY.histogram(
+            "llm_eval_online_eval_queue_seconds", "Time sampled responses wait for a judge"
+        ).observe(time.perf_counter() - job.enqueued_at)
+        try:
+            result = await self.judge.aevaluate(job.query, job.response, trace_id=job.trace_id)
+        except Exception as e:
+            result = {"error": str(e)}
+        if result.get("error"):
+            self.counts["errors"] += 1
+            REGISTRY.counter("llm_eval_online_eval_total", "Online evaluation jobs", outcome="error").inc()
+            return
+        self.counts["judged"] += 1
+        self._score_sum += float(result.get("overall", 0))
+        REGISTRY.counter("llm_eval_online_eval_total", "Online evaluation jobs", outcome="judged").inc()
+        if job.trace_id:
+            self.judge.exporter.submit(
+                trace_id=job.trace_id,
+                name="validation_passed",
+                value=1.0 if job.validation.valid else 0.0,
+                comment=f"online eval ({job.reason}): " + "; ".join(job.validation.errors)
+            )
+
+
+def evaluator_from_env(judge_factory) -> Optional[OnlineEvaluator]:
+    """
+    OnlineEvaluator configured from ONLINE_EVAL_* variables, or None when
+    ONLINE_EVAL_MODE is off. judge_factory() builds the LLMJudge; it is only
+    called when online evaluation is enabled.
+    """
+    mode = os.getenv("ONLINE_EVAL_MODE", "off").lower()
+    if mode == "off":
+        return None
+    sampler = OnlineEvalSampler(
+        rate=float(os.getenv("ONLINE_EVAL_RATE", "0.05")),
+        mode=mode,
+        always_on_validation_failure=os.getenv("ONLINE_EVAL_ALWAYS_ON_FAILURE", "1") != "0"
+    )
+    return OnlineEvaluator(
+        judge=judge_factory(),
+        sampler=sampler,
+        workers=int(os.getenv("ONLINE_EVAL_WORKERS", "2")),
+        max_queue=int(os.getenv("ONLINE_EVAL_MAX_QUEUE", "1000"))
+    )
@@ -0,0 +1,542 @@
+"""
+Adaptive Client-Side Rate Limiter for OpenAI Calls
+One process-wide scheduler shared by the backend, the research assistant and
+the LLM judge, so they stop racing each other into 429s.
+
+- Token buckets for requests/min and tokens/min. A call reserves its
+  estimated tokens up front, and the bucket is settled against the real usage
+  afterwards.
+- Adaptive (AIMD) limits. A 429 halves the effective rate and pauses every
+  caller until Retry-After has passed. Each success then raises the rate a
+  little, back up to the configured or learned limit. The x-ratelimit-* headers
+  OpenAI returns (limit, remaining, reset) keep the buckets in step with the
+  server.
+- Priority classes: interactive > batch > background. Lower classes wait
+  while a higher class is waiting, and they may not drain the last few
+  seconds of refill from either bucket. That way live /chat traffic gets capacity ahead of eval runs
+  and background judging.
+- A 429 is retried after waiting on the limiter, instead of surfacing as an
+  error score. Connection errors, timeouts and 5xx responses are retried with
+  exponential backoff. While the limiter is on, llm_clients builds ChatOpenAI
+  with max_retries=0, so the SDK's own retries never hide a 429 from it.
+
+Usage:
+  from rate_limiter import limited_ainvoke
+  response = await limited_ainvoke(chat_model, messages, priority="interactive")
+
+Tuning (environment):
+  LLM_RATE_LIMIT              (default auto) - 1 on, 0 off; auto = on unless LLM_BACKEND=fake
+                                               or the model is a FakeChatModel
+  LLM_RATE_LIMIT_RPM          (default 500)    - requests per minute
+  LLM_RATE_LIMIT_TPM          (default 200000) - tokens per minute
+  LLM_RATE_LIMIT_MAX_RETRIES  (default 3)      - 429 / transient-error retries per call
+  LLM_RATE_LIMIT_WORKERS      (default 1)      - processes sharing the API key; each
+                                                 gets 1/N of the limits (gunicorn sets it)
+"""
+
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Tuple
+
+from metrics import REGISTRY
+
+PRIORITIES = ("interactive", "batch", "background")
+
+# Seconds of refill each class must leave in the buckets (interactive may use all of it)
+DEFAULT_RESERVE_SECONDS = (0.0, 1.0, 3.0)
+
+# How long a lower-priority caller sleeps before re-checking for higher-priority waiters
+_PREEMPT_POLL_SECONDS = 0.05
+# Backoff for transient errors, as the OpenAI SDK does it: 0.5s doubling up to 8s
+_TRANSIENT_BACKOFF_SECONDS = 0.5
+_TRANSIENT_BACKOFF_MAX_SECONDS = 8.0
+# Longest single sleep, so changes to the rate (from headers or AIMD) are picked up promptly
+_MAX_SLEEP_SECONDS = 1.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+class TokenBucket:
+    """Continuously refilling bucket of `per_minute` units with a one-minute burst."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.per_minute = float(per_minute)
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._clock = clock
+        self._updated = clock()
+
+    @property
+    def rate(self) -> float:
+        """Refill rate in units per second."""
+        return self.per_minute / 60.0
+
+    def refill(self):
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, per_minute: float):
+        """Change the refill rate; the current level is kept, capped by the new capacity."""
+        self.refill()
+        self.per_minute = max(1e-9, float(per_minute))
+        self.capacity = self.per_minute
+        self.level = min(self.level, self.capacity)
+
+    def time_until(self, amount: float, floor: float = 0.0) -> float:
+        """Seconds until `amount` can be taken while leaving `floor` behind (0 if now)."""
+        needed = amount + floor - self.level
+        return 0.0 if needed <= 0 else needed / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def drain(self):
+        self.refill()
+        self.level = min(self.level, 0.0)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After value ("2", "0.5") or an OpenAI reset value ("1s", "6m0s", "20ms")."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def estimate_tokens(messages: List[Any], output_tokens: int = 400) -> int:
+    """Rough token estimate for one chat call: ~4 characters per prompt token plus expected output."""
+    prompt_tokens = sum(len(str(getattr(m, "content", m))) // 4 + 4 for m in messages)
+    return prompt_tokens + output_tokens
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Connection errors, timeouts, 408/409 and 5xx: worth retrying, but not a rate signal."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 409) or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _error_headers(error: BaseException) -> Mapping[str, str]:
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None) or {}
+
+
+def _response_headers(response: Any) -> Mapping[str, str]:
+    # ChatOpenAI(include_response_headers=True) puts them in response_metadata
+    return (getattr(response, "response_metadata", None) or {}).get("headers") or {}
+
+
+def _used_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None) or {}
+    total = usage.get("total_tokens")
+    return int(total) if total is not None else None
+
+
+class AdaptiveRateLimiter:
+    """Thread- and event-loop-safe RPM/TPM scheduler with priority classes."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200_000,
+        reserve_seconds: Tuple[float, ...] = DEFAULT_RESERVE_SECONDS,
+        max_retries: int = 3,
+        min_scale: float = 0.05,
+        decrease_factor: float = 0.5,
+        increase_step: float = 0.02,
+        share: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        requests_per_minute / tokens_per_minute are this process's limits.
+        `share` is the fraction of the server-reported (x-ratelimit-limit-*)
+        limits this process may use when several workers share one API key.
+        """
+        if len(reserve_seconds) != len(PRIORITIES):
+            raise ValueError(f"reserve_seconds needs one value per priority {PRIORITIES}")
+        self.limit_rpm = float(requests_per_minute)
+        self.limit_tpm = float(tokens_per_minute)
+        self.reserve_seconds = tuple(reserve_seconds)
+        self.max_retries = max(0, max_retries)
+        self.min_scale = min_scale
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.share = share
+        # Fraction of the limits currently used (AIMD)
+        self.scale = 1.0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(self.limit_rpm, clock)
+        self._tokens = TokenBucket(self.limit_tpm, clock)
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        self._waiting = [0] * len(PRIORITIES)
+        self.granted = [0] * len(PRIORITIES)
+        self.rate_limited = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveRateLimiter":
+        share = 1.0 / max(1, int(os.getenv("LLM_RATE_LIMIT_WORKERS", "1")))
+        return cls(
+            requests_per_minute=float(os.getenv("LLM_RATE_LIMIT_RPM", "500")) * share,
+            tokens_per_minute=float(os.getenv("LLM_RATE_LIMIT_TPM", "200000")) * share,
+            max_retries=int(os.getenv("LLM_RATE_LIMIT_MAX_RETRIES", "3")),
+            share=share,
+        )
+
+    # -- Admission ---------------------------------------------------------
+
+    async def acquire(self, tokens: int, priority: str = "batch"):
+        """Wait (without blocking the event loop) until a call of `tokens` may start."""
+        level = _priority_level(priority)
+        started = self._clock()
+        self._enter(level)
+        try:
+            while True:
+                delay = self._try_acquire(level, tokens)
+                if delay == 0.0:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            self._leave(level, started)
+
+    def acquire_sync(self, tokens: int, priority: str = "batch"):
+        """Blocking acquire() for sync callers (judge threads, the sync assistant)."""
+        level = _priority_level(priority)
+        started = self._clock()
+        self._enter(level)
+        try:
+            while True:
+                delay = self._try_acquire(level, tokens)
+                if delay == 0.0:
+                    break
+                time.sleep(delay)
+        finally:
+            self._leave(level, started)
+
+    def _try_acquire(self, level: int, tokens: int) -> float:
+        """Take capacity and return 0.0, or return how long to sleep before trying again."""
+        with self._lock:
+            now = self._clock()
+            if now < self._blocked_until:
+                return min(_MAX_SLEEP_SECONDS, self._blocked_until - now)
+            if any(self._waiting[:level]):
+                return _PREEMPT_POLL_SECONDS
+            self._requests.refill()
+            self._tokens.refill()
+            reserve = self.reserve_seconds[level]
+            token_floor = reserve * self._tokens.rate
+            # A single call larger than the whole bucket would otherwise wait forever
+            tokens = min(float(tokens), max(1.0, self._tokens.capacity - token_floor))
+            delay = max(
+                self._requests.time_until(1, reserve * self._requests.rate),
+                self._tokens.time_until(tokens, token_floor),
+            )
+            if delay > 0:
+                return min(_MAX_SLEEP_SECONDS, delay)
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self.granted[level] += 1
+            return 0.0
+
+    def _enter(self, level: int):
+        with self._lock:
+            self._waiting[level] += 1
+
+    def _leave(self, level: int, started: float):
+        waited = self._clock() - started
+        with self._lock:
+            self._waiting[level] -= 1
+            self.wait_seconds += waited
+        REGISTRY.histogram(
+            "llm_eval_rate_limit_wait_seconds", "Time spent waiting for the client-side rate limiter",
+            priority=PRIORITIES[level]
+        ).observe(waited)
+
+    # -- Feedback ----------------------------------------------------------
+
+    def settle(self, estimated: int, used: Optional[int]):
+        """Correct the token bucket once the real usage of a call is known."""
+        if used is None:
+            return
+        with self._lock:
+            self._tokens.refill()
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level + estimated - used)
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None):
+        """Additive increase, then sync with any rate-limit headers."""
+        with self._lock:
+            if self.scale < 1.0:
+                self.scale = min(1.0, self.scale + self.increase_step)
+                self._apply_scale()
+        if headers:
+            self.observe_headers(headers)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None, headers: Optional[Mapping[str, str]] = None):
+        """Multiplicative decrease and a pause for every caller until Retry-After has passed."""
+        headers = headers or {}
+        if retry_after is None:
+            retry_after = parse_duration(headers.get("retry-after"))
+        with self._lock:
+            now = self._clock()
+            self.rate_limited += 1
+            pause = retry_after if retry_after is not None else 1.0
+            # Several calls in flight usually fail together: count that as one signal
+            if now - self._last_decrease >= max(pause, 1.0):
+                self.scale = max(self.min_scale, self.scale * self.decrease_factor)
+                self._last_decrease = now
+                self._apply_scale()
+            self._blocked_until = max(self._blocked_until, now + pause)
+            self._requests.drain()
+        if headers:
+            self.observe_headers(headers)
+
+    def observe_headers(self, headers: Mapping[str, str]):
+        """
+        Adopt OpenAI's x-ratelimit-* headers, scaled by `share`. The limit resets
+        our ceiling, and the remaining count caps what the buckets think is left.
+        If either count is exhausted, callers pause until it resets.
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+        with self._lock:
+            now = self._clock()
+            for kind, bucket in (("requests", self._requests), ("tokens", self._tokens)):
+                limit = _number(headers.get(f"x-ratelimit-limit-{kind}"))
+                if limit:
+                    limit *= self.share
+                    if kind == "requests":
+                        self.limit_rpm = limit
+                    else:
+                        self.limit_tpm = limit
+                    self._apply_scale()
+                remaining = _number(headers.get(f"x-ratelimit-remaining-{kind}"))
+                if remaining is None:
+                    continue
+                bucket.refill()
+                bucket.level = min(bucket.level, remaining * self.share)
+                if remaining <= 0:
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self._blocked_until = max(self._blocked_until, now + reset)
+
+    def _apply_scale(self):
+        self._requests.set_rate(self.limit_rpm * self.scale)
+        self._tokens.set_rate(self.limit_tpm * self.scale)
+
+    # -- Calls -------------------------------------------------------------
+
+    async def ainvoke(self, chat_model: Any, messages: List[Any], priority: str = "batch", output_tokens: int = 400):
+        """chat_model.ainvoke(messages) under the limiter, retrying 429s."""
+        estimated = estimate_tokens(messages, output_tokens)
+        attempt = 0
+        while True:
+            await self.acquire(estimated, priority)
+            try:
+                response = await chat_model.ainvoke(messages)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, estimated)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.settle(estimated, _used_tokens(response))
+            self.on_success(_response_headers(response))
+            return response
+
+    def invoke(self, chat_model: Any, messages: List[Any], priority: str = "batch", output_tokens: int = 400):
+        """Sync variant of ainvoke()."""
+        estimated = estimate_tokens(messages, output_tokens)
+        attempt = 0
+        while True:
+            self.acquire_sync(estimated, priority)
+            try:
+                response = chat_model.invoke(messages)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, estimated)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self.settle(estimated, _used_tokens(response))
+            self.on_success(_response_headers(response))
+            return response
+
+    async def astream(
+        self,
+        chat_model: Any,
+        messages: List[Any],
+        priority: str = "interactive",
+        output_tokens: int = 400
+    ) -> AsyncIterator[Any]:
+        """chat_model.astream(messages) under the limiter; failures before the first chunk are retried."""
+        estimated = estimate_tokens(messages, output_tokens)
+        attempt = 0
+        while True:
+            await self.acquire(estimated, priority)
+            started = False
+            try:
+                async for chunk in chat_model.astream(messages):
+                    if not started:
+                        started = True
+                        self.on_success(_response_headers(chunk))
+                    yield chunk
+                return
+            except Exception as e:
+                delay = None if started else self._retry_delay(e, attempt, estimated)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def _retry_delay(self, error: Exception, attempt: int, estimated: int) -> Optional[float]:
+        """
+        Feed a failed call back into the limiter. Returns how long to sleep
+        before retrying (0 for a 429: the limiter itself paces the retry), or
+        None when the error should reach the caller.
+        """
+        if is_rate_limit_error(error):
+            return 0.0 if self._should_retry(error, attempt, estimated) else None
+        if not is_transient_error(error) or attempt >= self.max_retries:
+            return None
+        # A failed call used (almost) no tokens: give its reservation back
+        self.settle(estimated, 0)
+        with self._lock:
+            self.retries += 1
+        backoff = min(_TRANSIENT_BACKOFF_MAX_SECONDS, _TRANSIENT_BACKOFF_SECONDS * 2 ** attempt)
+        return backoff * random.uniform(0.75, 1.0)
+
+    def _should_retry(self, error: Exception, attempt: int, estimated: int) -> bool:
+        """Feed a 429 back into the limiter; True if the call is worth retrying."""
+        # A rejected call used no tokens: give its reservation back
+        self.settle(estimated, 0)
+        self.on_rate_limited(headers=_error_headers(error))
+        REGISTRY.counter(
+            "llm_eval_rate_limited_total", "429 responses seen by the client-side rate limiter"
+        ).inc()
+        if attempt >= self.max_retries:
+            return False
+        with self._lock:
+            self.retries += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._requests.refill()
+            self._tokens.refill()
+            return {
+                "enabled": True,
+                "limit_rpm": self.limit_rpm,
+                "limit_tpm": self.limit_tpm,
+                "scale": round(self.scale, 3),
+                "effective_rpm": round(self._requests.per_minute, 1),
+                "effective_tpm": round(self._tokens.per_minute, 1),
+                "available_requests": round(self._requests.level, 1),
+                "available_tokens": round(self._tokens.level, 1),
+                "paused_for_seconds": round(max(0.0, self._blocked_until - self._clock()), 3),
+                "waiting": dict(zip(PRIORITIES, self._waiting)),
+                "granted": dict(zip(PRIORITIES, self.granted)),
+                "rate_limited": self.rate_limited,
+                "retries": self.retries,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
+
+
+def _priority_level(priority: str) -> int:
+    try:
+        return PRIORITIES.index(priority)
+    except ValueError:
+        raise ValueError(f"priority must be one of {PRIORITIES}, got {priority!r}") from None
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_fake_model(chat_model: Any) -> bool:
+    # fake_llm is only in sys.modules if something built a FakeChatModel
+    fake_llm = sys.modules.get("fake_llm")
+    return fake_llm is not None and isinstance(chat_model, fake_llm.FakeChatModel)
+
+
+def rate_limit_enabled(chat_model: Any = None) -> bool:
+    """
+    LLM_RATE_LIMIT=1/0 forces the limiter on/off. In auto mode it is off for
+    LLM_BACKEND=fake and for calls to a FakeChatModel (there is no quota to protect).
+    """
+    setting = os.getenv("LLM_RATE_LIMIT", "auto").lower()
+    if setting == "auto":
+        return os.getenv("LLM_BACKEND", "openai").lower() != "fake" and not _is_fake_model(chat_model)
+    return setting not in ("0", "false", "off")
+
+
+_limiter: Optional[AdaptiveRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(chat_model: Any = None) -> Optional[AdaptiveRateLimiter]:
+    """Process-wide limiter configured from the environment, or None when disabled (for chat_model)."""
+    global _limiter
+    if not rate_limit_enabled(chat_model):
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveRateLimiter.from_env()
+    return _limiter
+
+
+def reset_rate_limiter():
+    """Drop the process-wide limiter (e.g. in a forked worker, or after changing the env)."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = None
+
+
+async def limited_ainvoke(chat_model: Any, messages: List[Any], priority: str = "batch", output_tokens: int = 400):
+    """await chat_model.ainvoke(messages) through the shared limiter (a plain call when it is disabled)."""
+    limiter = get_rate_limiter(chat_model)
+    if limiter is None:
+        return await chat_model.ainvoke(messages)
+    return await limiter.ainvoke(chat_model, messages, priority, output_tokens)
+
+
+def limited_invoke(chat_model: Any, messages: List[Any], priority: str = "batch", output_tokens: int = 400):
+    """chat_model.invoke(messages) through the shared limiter (a plain call when it is disabled)."""
+    limiter = get_rate_limiter(chat_model)
+    if limiter is None:
+        return chat_model.invoke(messages)
+    return limiter.invoke(chat_model, messages, priority, output_tokens)
+
+
+def limited_astream(chat_model: Any, messages: List[Any], priority: str = "interactive", output_tokens: int = 400):
+    """chat_model.astream(messages) through the shared limiter (a plain stream when it is disabled)."""
+    limiter = get_rate_limiter(chat_model)
+    if limiter is None:
+        return chat_model.astream(messages)
+    return limiter.astream(chat_model, messages, priority, output_tokens)
@@ -0,0 +1,190 @@
+"""
+Aggregate Reports over Stored Runs
+Vectorized (pandas/NumPy) summaries of the results store: pass rates, score
+distributions, per-category breakdowns and run-over-run diffs. Every function
+takes the DataFrame returned by ResultsStore.read(), so the same reports work
+for one run or months of them.
+
+Usage:
+  python reporting.py --store eval_results                     # latest run
+  python reporting.py --store eval_results --run 20250101T000000Z --baseline 20241231T000000Z
+"""
+
+import argparse
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from results_store import SCORE_DIMENSIONS, ResultsStore
+
+SCORE_BINS = (0.0, 1.0, 2.0, 3.0, 4.0, 5.0)
+
+
+def _aggregate(grouped) -> pd.DataFrame:
+    summary = grouped.agg(
+        cases=("passed", "size"),
+        pass_rate=("passed", "mean"),
+        validation_pass_rate=("validation_passed", "mean"),
+        error_rate=("error", "mean"),
+        mean_score=("score", "mean"),
+        p50_score=("score", "median"),
+        p50_generation_ms=("generation_ms", "median"),
+        p95_generation_ms=("generation_ms", lambda s: s.quantile(0.95)),
+        output_tokens=("generation_output_tokens", "sum"),
+        cost_usd=("cost_usd", "sum"),
+    )
+    return summary
+
+
+def run_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per run: pass rates, scores, latency, tokens and cost."""
+    summary = _aggregate(df.groupby("run_id", sort=True))
+    dims = df.groupby("run_id", sort=True)[[f"score_{d}" for d in SCORE_DIMENSIONS]].mean()
+    return summary.join(dims)
+
+
+def pass_rates(df: pd.DataFrame, by: Sequence[str] = ("run_id",)) -> pd.DataFrame:
+    """Pass and validation pass rate per group."""
+    return df.groupby(list(by), dropna=False)[["passed", "validation_passed"]].mean()
+
+
+def category_breakdown(df: pd.DataFrame, run_id: Optional[str] = None) -> pd.DataFrame:
+    """Per-category metrics for one run (or every row when run_id is None)."""
+    if run_id is not None:
+        df = df[df["run_id"] == run_id]
+    return _aggregate(df.assign(category=df["category"].fillna("uncategorized")).groupby("category"))
+
+
+def score_distribution(
+    df: pd.DataFrame,
+    column: str = "score",
+    bins: Sequence[float] = SCORE_BINS
+) -> pd.DataFrame:
+    """Histogram of `column` per run (rows: runs, columns: score bins)."""
+    binned = pd.cut(df[column], bins=list(bins), include_lowest=True)
+    counts = df.groupby(["run_id", binned], observed=False).size().unstack(fill_value=0)
+    counts.columns = [str(interval) for interval in counts.columns]
+    return counts
+
+
+def score_quantiles(df: pd.DataFrame, column: str = "score", q: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95)):
+    """Quantiles of `column` per run."""
+    return df.groupby("run_id")[column].quantile(list(q)).unstack()
+
+
+DIFF_STATUSES = ("regressed", "fixed", "unchanged", "new", "removed")
+
+
+def _last_row_per_case(df: pd.DataFrame, rows: np.ndarray) -> np.ndarray:
+    """Drop all but the last of `rows` for each test_id (rows without one are kept)."""
+    ids = pd.Series(df["test_id"].array.take(rows))
+    keep = ~ids.duplicated(keep="last") | ids.isna()
+    return rows[keep.to_numpy()]
+
+
+def run_diff(df: pd.DataFrame, baseline_run: str, current_run: str) -> pd.DataFrame:
+    """
+    Case-level comparison of two runs (matched on test_id), one row per case
+    in either run. Columns: test_id, category, score_baseline, score_current,
+    score_delta, passed_baseline, passed_current and status (a categorical:
+    regressed / fixed / unchanged / new / removed). Cases without a test_id
+    are only matched when both runs list the same cases in the same order;
+    otherwise they show up as removed and new. A test_id that appears more
+    than once in a run (a retried case) is compared by its last row.
+    """
+    # Work on row positions so string columns are gathered once, at the end
+    run_ids = df["run_id"].to_numpy()
+    base_rows = _last_row_per_case(df, np.flatnonzero(run_ids == baseline_run))
+    cur_rows = _last_row_per_case(df, np.flatnonzero(run_ids == current_run))
+    n_base, n_cur = len(base_rows), len(cur_rows)
+    rows = np.concatenate([base_rows, cur_rows])
+    ids = df["test_id"].array.take(rows)
+
+    if n_base == n_cur and bool((ids[:n_base] == ids[n_base:]).all()):
+        # Same cases in the same order (the usual nightly run): align by position
+        base_pos = cur_pos = np.arange(n_cur)
+        size = n_cur
+    else:
+        # One hash pass over both runs instead of a sorted outer merge
+        codes, uniques = pd.factorize(ids)
+        # Cases without a test_id can't be matched: each gets its own row
+        missing = codes == -1
+        codes[missing] = len(uniques) + np.arange(missing.sum())
+        base_pos, cur_pos = codes[:n_base], codes[n_base:]
+        size = len(uniques) + int(missing.sum())
+
+    def scatter(column: str, positions: np.ndarray, source_rows: np.ndarray, fill, dtype) -> np.ndarray:
+        out = np.full(size, fill, dtype=dtype)
+        out[positions] = df[column].to_numpy(dtype=dtype)[source_rows]
+        return out
+
+    in_baseline = np.zeros(size, dtype=bool)
+    in_baseline[base_pos] = True
+    in_current = np.zeros(size, dtype=bool)
+    in_current[cur_pos] = True
+    score_baseline = scatter("score", base_pos, base_rows, np.nan, float)
+    score_current = scatter("score", cur_pos, cur_rows, np.nan, float)
+    was_passing = scatter("passed", base_pos, base_rows, False, bool)
+    is_passing = scatter("passed", cur_pos, cur_rows, False, bool)
+
+    # Row each case's id and category come from: the current run if present, else the baseline
+    source = np.empty(size, dtype=np.int64)
+    source[base_pos] = np.arange(n_base)
+    source[cur_pos] = n_base + np.arange(n_cur)
+
+    status_codes = np.select(
+        [~in_baseline, ~in_current, was_passing & ~is_passing, ~was_passing & is_passing],
+        [DIFF_STATUSES.index(s) for s in ("new", "removed", "regressed", "fixed")],
+        default=DIFF_STATUSES.index("unchanged"),
+    )
+    return pd.DataFrame({
+        "test_id": ids.take(source),
+        "category": df["category"].array.take(rows[source]),
+        "score_baseline": score_baseline,
+        "score_current": score_current,
+        "score_delta": score_current - score_baseline,
+        "passed_baseline": pd.arrays.BooleanArray(was_passing, ~in_baseline),
+        "passed_current": pd.arrays.BooleanArray(is_passing, ~in_current),
+        "status": pd.Categorical.from_codes(status_codes, categories=list(DIFF_STATUSES)),
+    })
+
+
+def diff_summary(diff: pd.DataFrame) -> pd.Series:
+    """Counts per status plus the mean score change over cases in both runs."""
+    counts = diff["status"].value_counts()
+    summary = pd.Series({status: int(counts.get(status, 0)) for status in DIFF_STATUSES}, dtype="float64")
+    summary["mean_score_delta"] = diff["score_delta"].mean()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reports over stored golden dataset runs.")
+    parser.add_argument("--store", default="eval_results", help="Results directory")
+    parser.add_argument("--run", help="Run to report on (default: latest)")
+    parser.add_argument("--baseline", help="Run to diff against (default: the run before --run)")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    runs = store.list_runs()
+    if not runs:
+        raise SystemExit(f"No runs in {args.store}")
+    run_id = args.run or runs[-1]
+    baseline = args.baseline or (runs[runs.index(run_id) - 1] if runs.index(run_id) > 0 else None)
+    df = store.read([baseline, run_id] if baseline else [run_id])
+
+    pd.set_option("display.width", 160)
+    pd.set_option("display.max_columns", 20)
+    print(f"Run summary ({len(runs)} stored runs)")
+    print(run_summary(df).round(3).to_string())
+    print(f"\nBy category ({run_id})")
+    print(category_breakdown(df, run_id).round(3).to_string())
+    print("\nScore distribution")
+    print(score_distribution(df).to_string())
+    if baseline:
+        diff = run_diff(df, baseline, run_id)
+        print(f"\n{run_id} vs {baseline}")
+        print(diff_summary(diff).to_string())
+        changed = diff[diff["status"].isin(["regressed", "fixed"])].sort_values(["status", "score_delta"])
+        if len(changed):
+            print(changed.head(20).to_string(index=False))
@@ -3,11 +3,14 @@ Research Assistant with Evaluation and Langfuse Integration
 Extends the Week 3 research assistant with evaluation capabilities.
 """
 
+import argparse
+import asyncio
 import os
+import random
 from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from dotenv import load_dotenv
 from langfuse.decorators import observe, langfuse_context
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
 # Load environment variables
@@ -18,138 +21,684 @@ if not env_path.exists():
     env_path = Path("../../.env")
 load_dotenv(env_path)
 
-from eval_system import RuleBasedValidator, LLMJudge, GoldenDataset
+from eval_system import RuleBasedValidator, LLMJudge, GoldenDataset, LangfuseTracer, JUDGE_RUBRIC
+from response_cache import cache_from_env, make_cache_key
+from judge_store import make_judge_store
+from run_manifest import RunManifest, case_fingerprint
+from checkpoint import RunCheckpoint, case_key
+from llm_clients import get_chat_model, llm_available
+from metrics import record_llm_usage, request_metrics, stage
+from rate_limiter import limited_ainvoke, limited_invoke
+from telemetry_spool import spool_langfuse_sdk
 
 # Initialize components
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0) if os.getenv("OPENAI_API_KEY") else None
+llm = get_chat_model("gpt-4o-mini", temperature=0) if llm_available() else None
 validator = RuleBasedValidator()
-judge = LLMJudge(llm=llm)
+# JUDGE_STORE: "memory" (default), "sqlite:<path>", "jsondir:<path>" or "none"
+# JUDGE_STRUCTURED_OUTPUT=1 asks the judge model for a JSON object (JSON mode)
+judge = LLMJudge(
+    llm=llm,
+    store=make_judge_store(os.getenv("JUDGE_STORE", "memory")),
+    structured_output=os.getenv("JUDGE_STRUCTURED_OUTPUT", "0") == "1"
+)
+response_cache = cache_from_env()
+tracer = LangfuseTracer()
+# With TELEMETRY_SPOOL_DIR set, @observe traces are spooled like scores
+spool_langfuse_sdk()
+
+RESEARCH_PROMPT = """You are a research assistant. Answer the following query concisely and accurately.
+
+Query: {query}
+
+Provide a clear, factual answer. If you reference specific information, mention that it comes from your training data."""
+
+MOCK_RESULT = {
+    "answer": "[Mock] Research summary about the query. This is a placeholder response.",
+    "sources": ["mock-source-1", "mock-source-2"],
+    "error": False
+}
+
+EMPTY_QUERY_RESULT = {
+    "answer": "Please provide a valid query.",
+    "sources": [],
+    "error": True
+}
 
 
 @observe()
-def research_assistant(query: str) -> dict:
+def research_assistant(query: str, chat_model: Any = None, prompt_template: Optional[str] = None) -> dict:
     """
     Simple research assistant that answers queries.
     Automatically traced by Langfuse via @observe decorator.
+    chat_model and prompt_template default to the module's llm and RESEARCH_PROMPT.
     """
     if not query or not query.strip():
-        return {
-            "answer": "Please provide a valid query.",
-            "sources": [],
-            "error": True
-        }
-    
-    if not llm:
-        return {
-            "answer": "[Mock] Research summary about the query. This is a placeholder response.",
-            "sources": ["mock-source-1", "mock-source-2"],
-            "error": False
-        }
-    
-    # Simple research prompt
-    prompt = f"""You are a research assistant. Answer the following query concisely and accurately.
-
-Query: {query}
+        return dict(EMPTY_QUERY_RESULT)
+    
+    chat_model = chat_model or llm
+    prompt_template = prompt_template or RESEARCH_PROMPT
+    if not chat_model:
+        return dict(MOCK_RESULT)
+    
+    cache_key, answer = _cache_lookup(query, chat_model, prompt_template)
+    if answer is None:
+        messages = [HumanMessage(content=prompt_template.format(query=query))]
+        with stage("generation"):
+            response = limited_invoke(chat_model, messages, priority="batch")
+        record_llm_usage("generation", response, getattr(chat_model, "model_name", None))
+        answer = response.content
+        _cache_store(cache_key, answer)
+    
+    return _validate_and_score(answer)
 
-Provide a clear, factual answer. If you reference specific information, mention that it comes from your training data."""
 
-    messages = [HumanMessage(content=prompt)]
-    response = llm.invoke(messages)
+@observe()
+async def aresearch_assistant(query: str, chat_model: Any = None, prompt_template: Optional[str] = None) -> dict:
+    """
+    Async research assistant using llm.ainvoke.
+    Same behaviour as research_assistant() without blocking the event loop.
+    """
+    if not query or not query.strip():
+        return dict(EMPTY_QUERY_RESULT)
     
+    chat_model = chat_model or llm
+    prompt_template = prompt_template or RESEARCH_PROMPT
+    if not chat_model:
+        return dict(MOCK_RESULT)
+    
+    cache_key, answer = _cache_lookup(query, chat_model, prompt_template)
+    if answer is None:
+        messages = [HumanMessage(content=prompt_template.format(query=query))]
+        with stage("generation"):
+            response = await limited_ainvoke(chat_model, messages, priority="batch")
+        record_llm_usage("generation", response, getattr(chat_model, "model_name", None))
+        answer = response.content
+        _cache_store(cache_key, answer)
+    
+    return _validate_and_score(answer)
+
+
+def _cache_lookup(query: str, chat_model: Any, prompt_template: str):
+    """
+    Look up a cached answer for this query and mark the current trace
+    with whether it was a cache hit. Returns (key, answer or None).
+    """
+    if not response_cache:
+        return None, None
+    key = make_cache_key(
+        query,
+        getattr(chat_model, "model_name", "unknown"),
+        getattr(chat_model, "temperature", None),
+        prompt_template
+    )
+    answer = response_cache.get(key)
+    langfuse_context.update_current_observation(metadata={"cache_hit": answer is not None})
+    if answer is not None:
+        langfuse_context.update_current_trace(tags=["cache_hit"])
+    return key, answer
+
+
+def _cache_store(key: Optional[str], answer: str):
+    """Store a fresh answer if caching is enabled."""
+    if response_cache and key:
+        response_cache.set(key, answer)
+
+
+def _validate_and_score(answer: str) -> dict:
+    """Run rule-based validation on an answer and log it to the current trace."""
     # Get current trace ID for scoring
     trace_id = langfuse_context.get_current_trace_id()
     
     result = {
-        "answer": response.content,
+        "answer": answer,
         "sources": ["training_data"],  # Simplified for demo
         "error": False
     }
     
     # Validate response
-    validation_result = validator.validate_response(result)
+    with stage("validation"):
+        validation_result = validator.validate_response(result)
     
-    # Log validation to Langfuse
+    # Log validation to Langfuse (queued; sent by the background exporter)
     if trace_id:
-        from langfuse import Langfuse
-        langfuse = Langfuse()
-        langfuse.score(
-            trace_id=trace_id,
-            name="rule_based_validation",
-            value=1.0 if validation_result["valid"] else 0.0,
-            comment=f"Validation errors: {', '.join(validation_result['errors']) if validation_result['errors'] else 'None'}"
-        )
+        with stage("scoring"):
+            tracer.score_trace(
+                trace_id=trace_id,
+                name="rule_based_validation",
+                value=1.0 if validation_result.valid else 0.0,
+                comment=f"Validation errors: {', '.join(validation_result.errors) if validation_result.errors else 'None'}"
+            )
     
     # If validation fails, add errors to result
-    if not validation_result["valid"]:
-        result["validation_errors"] = validation_result["errors"]
+    if not validation_result.valid:
+        result["validation_errors"] = list(validation_result.errors)
     
     return result
 
 
 @observe()
-def research_assistant_with_eval(query: str, expected_topics: list = None, expected_not: list = None) -> dict:
+def research_assistant_with_eval(
+    query: str,
+    expected_topics: list = None,
+    expected_not: list = None,
+    chat_model: Any = None,
+    prompt_template: Optional[str] = None
+) -> dict:
     """
     Research assistant with full evaluation pipeline.
     Includes rule-based validation and LLM-as-judge scoring.
+    Per-stage timings, tokens and estimated cost are attached as result["metrics"].
     """
-    # Get the research result
-    result = research_assistant(query)
-    
-    # Get trace ID for scoring
-    trace_id = langfuse_context.get_current_trace_id()
+    with request_metrics() as request:
+        # Get the research result
+        result = research_assistant(query, chat_model, prompt_template)
+        
+        # Get trace ID for scoring
+        trace_id = langfuse_context.get_current_trace_id()
+        
+        # Run LLM-as-judge evaluation if we have a response
+        if result.get("answer") and not result.get("error"):
+            eval_result = judge.evaluate(
+                query=query,
+                response=result["answer"],
+                expected_topics=expected_topics or [],
+                expected_not=expected_not or [],
+                trace_id=trace_id
+            )
+            result["evaluation"] = eval_result
     
-    # Run LLM-as-judge evaluation if we have a response
-    if result.get("answer") and not result.get("error"):
-        eval_result = judge.evaluate(
-            query=query,
-            response=result["answer"],
-            expected_topics=expected_topics or [],
-            expected_not=expected_not or [],
-            trace_id=trace_id
-        )
-        result["evaluation"] = eval_result
+    result["metrics"] = request.to_dict()
+    return result
+
+
+@observe()
+async def aresearch_assistant_with_eval(
+    query: str,
+    expected_topics: list = None,
+    expected_not: list = None,
+    chat_model: Any = None,
+    prompt_template: Optional[str] = None
+) -> dict:
+    """
+    Async research assistant with full evaluation pipeline.
+    Both the answer and the judge call go through ainvoke.
+    """
+    with request_metrics() as request:
+        result = await aresearch_assistant(query, chat_model, prompt_template)
+        
+        trace_id = langfuse_context.get_current_trace_id()
+        
+        if result.get("answer") and not result.get("error"):
+            eval_result = await judge.aevaluate(
+                query=query,
+                response=result["answer"],
+                expected_topics=expected_topics or [],
+                expected_not=expected_not or [],
+                trace_id=trace_id
+            )
+            result["evaluation"] = eval_result
     
+    result["metrics"] = request.to_dict()
     return result
 
 
-def run_golden_dataset_eval(dataset_path: str = "golden_dataset.json"):
+def _build_record(test_case: dict, result: dict) -> dict:
+    """Turn a test case and its pipeline result into a golden-eval record."""
+    min_score = test_case.get("min_score", 0.0)
+    
+    # Check if meets minimum score
+    eval_score = result.get("evaluation", {}).get("overall", 0.0)
+    passed = eval_score >= min_score
+    
+    return {
+        "test_id": test_case.get("id"),
+        "category": test_case.get("category"),
+        "query": test_case.get("query", ""),
+        "passed": passed,
+        "validation_passed": not result.get("validation_errors"),
+        "score": eval_score,
+        "min_score": min_score,
+        "result": result
+    }
+
+
+def _open_dataset(dataset: Union[str, GoldenDataset]) -> GoldenDataset:
+    """Accept either a dataset path or an already opened (possibly sharded) GoldenDataset."""
+    return dataset if isinstance(dataset, GoldenDataset) else GoldenDataset(dataset)
+
+
+def _case_fingerprint(test_case: dict) -> str:
+    """Fingerprint of a case under the current prompt, model and judge."""
+    return case_fingerprint(
+        test_case,
+        RESEARCH_PROMPT,
+        f"{getattr(llm, 'model_name', 'mock')}@{getattr(llm, 'temperature', None)}",
+        JUDGE_RUBRIC,
+        getattr(judge.llm, "model_name", type(judge.llm).__name__)
+    )
+
+
+def _reuse_from_manifest(cases: List[dict], manifest: Optional[RunManifest]):
+    """
+    Split cases into reusable and stale ones.
+    Returns (records with reused entries filled in, fingerprints, stale indexes).
+    """
+    if manifest is None:
+        return [None] * len(cases), [None] * len(cases), list(range(len(cases)))
+    
+    records: List[Optional[dict]] = []
+    fingerprints = []
+    stale = []
+    for i, test_case in enumerate(cases):
+        fingerprint = _case_fingerprint(test_case)
+        record = manifest.fresh_record(test_case.get("id"), fingerprint)
+        if record is None:
+            stale.append(i)
+        else:
+            record = {**record, "reused": True}
+        records.append(record)
+        fingerprints.append(fingerprint)
+    return records, fingerprints, stale
+
+
+def _save_manifest(
+    manifest: Optional[RunManifest],
+    dataset: GoldenDataset,
+    cases: List[dict],
+    fingerprints: List[Optional[str]],
+    records: List[dict],
+    stale: List[int]
+):
+    """Store fresh results; pruning is skipped for shards, which only see part of the suite."""
+    if manifest is None:
+        return
+    for i in stale:
+        manifest.update(cases[i].get("id"), fingerprints[i], records[i])
+    if dataset.num_shards == 1:
+        manifest.prune(case.get("id") for case in cases)
+    manifest.save()
+
+
+def run_golden_dataset_eval(
+    dataset_path: Union[str, GoldenDataset] = "golden_dataset.json",
+    manifest_path: Optional[str] = None
+):
     """
     Run evaluation on golden dataset.
     Returns results for all test cases.
+    
+    With manifest_path, only cases whose fingerprint (case, prompt, model,
+    judge rubric) changed since the last run are executed; the rest are
+    merged from the manifest and marked "reused".
     """
-    dataset = GoldenDataset(dataset_path)
-    results = []
+    dataset = _open_dataset(dataset_path)
+    manifest = RunManifest(manifest_path) if manifest_path else None
+    cases = dataset.get_all_cases() if manifest else list(dataset.iter_cases())
+    results, fingerprints, stale = _reuse_from_manifest(cases, manifest)
     
-    for test_case in dataset.get_all_cases():
-        query = test_case.get("query", "")
-        expected_topics = test_case.get("expected_topics", [])
-        expected_not = test_case.get("expected_not", [])
-        min_score = test_case.get("min_score", 0.0)
-        
+    for i in stale:
+        test_case = cases[i]
         # Run research assistant with evaluation
         result = research_assistant_with_eval(
-            query=query,
-            expected_topics=expected_topics,
-            expected_not=expected_not
+            query=test_case.get("query", ""),
+            expected_topics=test_case.get("expected_topics", []),
+            expected_not=test_case.get("expected_not", [])
         )
-        
-        # Check if meets minimum score
-        eval_score = result.get("evaluation", {}).get("overall", 0.0)
-        passed = eval_score >= min_score
-        
-        results.append({
-            "test_id": test_case.get("id"),
-            "query": query,
-            "passed": passed,
-            "score": eval_score,
-            "min_score": min_score,
-            "result": result
-        })
+        results[i] = _build_record(test_case, result)
     
+    _save_manifest(manifest, dataset, cases, fingerprints, results, stale)
     return results
 
 
+class _JudgeFailed(Exception):
+    """Raised inside a retry attempt when the judge returned an error result."""
+    
+    def __init__(self, result: dict):
+        super().__init__(result["evaluation"]["error"])
+        self.result = result
+
+
+async def _retry_with_backoff(
+    call: Callable[[], Awaitable[Any]],
+    timeout: Optional[float],
+    max_retries: int,
+    backoff_base: float,
+    backoff_max: float = 30.0
+) -> Any:
+    """
+    Await call() with a per-attempt timeout, retrying failures.
+    Uses "full jitter" backoff: sleep uniform(0, base * 2**attempt), capped.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await asyncio.wait_for(call(), timeout=timeout)
+        except Exception:
+            if attempt >= max_retries:
+                raise
+            delay = min(backoff_max, backoff_base * (2 ** attempt))
+            await asyncio.sleep(random.uniform(0, delay))
+            attempt += 1
+
+
+async def aiter_golden_dataset_eval(
+    dataset_path: Union[str, GoldenDataset] = "golden_dataset.json",
+    concurrency: int = 8,
+    timeout: Optional[float] = 60.0,
+    max_retries: int = 2,
+    backoff_base: float = 0.5,
+    chat_model: Any = None,
+    prompt_template: Optional[str] = None
+) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    Evaluate the golden dataset concurrently, yielding (index, record)
+    pairs as cases finish. At most `concurrency` cases are in flight.
+    A case that still fails after `max_retries` retries yields an error
+    record instead of aborting the run. chat_model and prompt_template
+    override the assistant's defaults (see matrix_eval.py).
+    """
+    cases = _open_dataset(dataset_path).get_all_cases()
+    async for item in _aiter_cases(cases, concurrency, timeout, max_retries, backoff_base, chat_model, prompt_template):
+        yield item
+
+
+async def _aiter_cases(
+    cases: Iterable[dict],
+    concurrency: int,
+    timeout: Optional[float],
+    max_retries: int,
+    backoff_base: float,
+    chat_model: Any = None,
+    prompt_template: Optional[str] = None
+) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    Run cases with at most `concurrency` in flight and yield (index, record)
+    as they complete. Cases are pulled from `cases` only as slots free up,
+    so a streamed dataset is never fully materialized.
+    """
+    concurrency = max(1, concurrency)
+    
+    async def attempt(test_case: dict) -> dict:
+        result = await aresearch_assistant_with_eval(
+            query=test_case.get("query", ""),
+            expected_topics=test_case.get("expected_topics", []),
+            expected_not=test_case.get("expected_not", []),
+            chat_model=chat_model,
+            prompt_template=prompt_template
+        )
+        # The judge swallows its own errors; surface them so they are retried too
+        if result.get("evaluation", {}).get("error"):
+            raise _JudgeFailed(result)
+        return result
+    
+    async def run_case(index: int, test_case: dict) -> Tuple[int, dict]:
+        try:
+            result = await _retry_with_backoff(
+                lambda: attempt(test_case),
+                timeout=timeout,
+                max_retries=max_retries,
+                backoff_base=backoff_base
+            )
+        except _JudgeFailed as e:
+            result = e.result
+        except Exception as e:
+            result = _failed_result(e)
+        return index, _build_record(test_case, result)
+    
+    pending = set()
+    try:
+        for index, test_case in enumerate(cases):
+            pending.add(asyncio.create_task(run_case(index, test_case)))
+            if len(pending) >= concurrency:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    yield task.result()
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _failed_result(error: Exception) -> dict:
+    """Result recorded for a case that failed after all retries."""
+    message = str(error) or type(error).__name__
+    return {
+        "answer": "",
+        "sources": [],
+        "error": True,
+        "evaluation": {"scores": {}, "reasoning": f"Error during run: {message}", "overall": 0.0, "error": message}
+    }
+
+
+@observe()
+async def _aresearch_traced(query: str) -> Tuple[dict, Optional[str]]:
+    """
+    Answer a query in its own trace and return the trace id for later judging.
+    Batched judge stages are shared across items, so they only reach the registry.
+    """
+    with request_metrics() as request:
+        result = await aresearch_assistant(query)
+    result["metrics"] = request.to_dict()
+    return result, langfuse_context.get_current_trace_id()
+
+
+async def _arun_batched(
+    cases: List[dict],
+    concurrency: int,
+    timeout: Optional[float],
+    max_retries: int,
+    backoff_base: float,
+    judge_batch_size: int
+) -> List[dict]:
+    """
+    Two-phase golden run: answer every case concurrently, then judge the
+    answers `judge_batch_size` at a time with LLMJudge.aevaluate_batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def answer(test_case: dict) -> Tuple[dict, Optional[str]]:
+        async with semaphore:
+            try:
+                return await _retry_with_backoff(
+                    lambda: _aresearch_traced(test_case.get("query", "")),
+                    timeout=timeout,
+                    max_retries=max_retries,
+                    backoff_base=backoff_base
+                )
+            except Exception as e:
+                return _failed_result(e), None
+    
+    answered = await asyncio.gather(*(answer(case) for case in cases))
+    results = [result for result, _ in answered]
+    
+    to_judge = [i for i, result in enumerate(results) if result.get("answer") and not result.get("error")]
+    verdicts = await judge.aevaluate_batch(
+        [
+            {
+                "query": cases[i].get("query", ""),
+                "response": results[i]["answer"],
+                "expected_topics": cases[i].get("expected_topics", []),
+                "expected_not": cases[i].get("expected_not", []),
+                "trace_id": answered[i][1]
+            }
+            for i in to_judge
+        ],
+        batch_size=judge_batch_size,
+        max_concurrency=max(1, concurrency // judge_batch_size)
+    )
+    for i, verdict in zip(to_judge, verdicts):
+        results[i]["evaluation"] = verdict
+    
+    return [_build_record(case, result) for case, result in zip(cases, results)]
+
+
+async def arun_golden_dataset_eval(
+    dataset_path: Union[str, GoldenDataset] = "golden_dataset.json",
+    concurrency: int = 8,
+    timeout: Optional[float] = 60.0,
+    max_retries: int = 2,
+    backoff_base: float = 0.5,
+    on_progress: Optional[Callable[[int, int, dict], None]] = None,
+    judge_batch_size: Optional[int] = None,
+    manifest_path: Optional[str] = None
+) -> List[dict]:
+    """
+    Run the golden dataset evaluation with bounded parallelism.
+    Returns records in dataset order; on_progress(done, total, record)
+    is called as each executed case completes.
+    
+    With judge_batch_size set, all answers are generated first and then
+    judged in batches (fewer judge requests and rubric tokens); progress
+    is reported once judging is done.
+    
+    With manifest_path, only stale cases are executed (see run_golden_dataset_eval).
+    """
+    dataset = _open_dataset(dataset_path)
+    cases = dataset.get_all_cases()
+    manifest = RunManifest(manifest_path) if manifest_path else None
+    results, fingerprints, stale = _reuse_from_manifest(cases, manifest)
+    stale_cases = [cases[i] for i in stale]
+    total = len(stale_cases)
+    
+    if judge_batch_size:
+        records = await _arun_batched(stale_cases, concurrency, timeout, max_retries, backoff_base, judge_batch_size)
+        for done, (i, record) in enumerate(zip(stale, records), start=1):
+            results[i] = record
+            if on_progress:
+                on_progress(done, total, record)
+    else:
+        done = 0
+        async for index, record in _aiter_cases(stale_cases, concurrency, timeout, max_retries, backoff_base):
+            results[stale[index]] = record
+            done += 1
+            if on_progress:
+                on_progress(done, total, record)
+    
+    _save_manifest(manifest, dataset, cases, fingerprints, results, stale)
+    return results
+
+
+def _open_checkpoint(checkpoint_path: str, resume: bool) -> RunCheckpoint:
+    """Checkpoint tied to the current prompt, model and judge (resume refuses a mismatch)."""
+    return RunCheckpoint(checkpoint_path, config=_case_fingerprint({}), resume=resume)
+
+
+def _pending_cases(dataset: GoldenDataset, checkpoint: RunCheckpoint) -> Iterator[Tuple[str, dict]]:
+    """Stream (checkpoint key, case) for every case not yet completed."""
+    for index, test_case in enumerate(dataset.iter_cases()):
+        key = case_key(test_case, index)
+        if not checkpoint.is_completed(key):
+            yield key, test_case
+
+
+def _checkpoint_summary(checkpoint: RunCheckpoint, executed: int, skipped: int) -> Dict[str, Any]:
+    return {**checkpoint.summary(), "executed": executed, "skipped": skipped, "checkpoint": checkpoint.path}
+
+
+def run_checkpointed_eval(
+    dataset_path: Union[str, GoldenDataset],
+    checkpoint_path: str,
+    resume: bool = False,
+    on_progress: Optional[Callable[[int, int, dict], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run the golden dataset, appending each record to a JSONL checkpoint as
+    soon as it finishes. With resume=True, cases already completed in the
+    checkpoint are skipped, so a crashed or killed run picks up where it
+    stopped. Records are not kept in memory - read them back with
+    RunCheckpoint.iter_records(); returns a summary of the run.
+    """
+    dataset = _open_dataset(dataset_path)
+    with _open_checkpoint(checkpoint_path, resume) as checkpoint:
+        total = sum(1 for _ in _pending_cases(dataset, checkpoint))
+        skipped = len(checkpoint.completed)
+        executed = 0
+        for key, test_case in _pending_cases(dataset, checkpoint):
+            result = research_assistant_with_eval(
+                query=test_case.get("query", ""),
+                expected_topics=test_case.get("expected_topics", []),
+                expected_not=test_case.get("expected_not", [])
+            )
+            record = _build_record(test_case, result)
+            checkpoint.append(record, key)
+            executed += 1
+            if on_progress:
+                on_progress(executed, total, record)
+        return _checkpoint_summary(checkpoint, executed, skipped)
+
+
+async def arun_checkpointed_eval(
+    dataset_path: Union[str, GoldenDataset],
+    checkpoint_path: str,
+    resume: bool = False,
+    concurrency: int = 8,
+    timeout: Optional[float] = 60.0,
+    max_retries: int = 2,
+    backoff_base: float = 0.5,
+    on_progress: Optional[Callable[[int, int, dict], None]] = None
+) -> Dict[str, Any]:
+    """
+    Async, bounded-parallelism version of run_checkpointed_eval. Cases are
+    streamed from the dataset and only `concurrency` records are held at
+    once, so memory stays flat however large the dataset is.
+    """
+    dataset = _open_dataset(dataset_path)
+    with _open_checkpoint(checkpoint_path, resume) as checkpoint:
+        total = sum(1 for _ in _pending_cases(dataset, checkpoint))
+        skipped = len(checkpoint.completed)
+        # index -> checkpoint key, for the cases currently in flight
+        keys: Dict[int, str] = {}
+        
+        def feed() -> Iterator[dict]:
+            for index, (key, test_case) in enumerate(_pending_cases(dataset, checkpoint)):
+                keys[index] = key
+                yield test_case
+        
+        executed = 0
+        async for index, record in _aiter_cases(feed(), concurrency, timeout, max_retries, backoff_base):
+            checkpoint.append(record, keys.pop(index))
+            executed += 1
+            if on_progress:
+                on_progress(executed, total, record)
+        return _checkpoint_summary(checkpoint, executed, skipped)
+
+
+def _print_progress(done: int, total: int, record: dict):
+    """Progress callback for the CLI."""
+    status = "✅" if record["passed"] else "❌"
+    print(f"  [{done}/{total}] {status} {record['test_id']}: Score {record['score']:.2f}")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the research assistant golden dataset evaluation.")
+    parser.add_argument("--dataset", default="golden_dataset.json", help="Path to the golden dataset (.json or .jsonl)")
+    parser.add_argument("--shard", help="Only run shard I of N, given as I/N (e.g. 0/4)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Cases in flight at once (>1 uses the async runner)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-case timeout in seconds (async runner)")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per case with jittered backoff (async runner)")
+    parser.add_argument("--judge-batch-size", type=int, help="Judge this many answers per request (async runner)")
+    parser.add_argument("--manifest", help="Run manifest path; only cases changed since the last run are re-executed")
+    parser.add_argument("--judge-store", help="Reuse judge verdicts: memory, sqlite:<path>, jsondir:<path> or none")
+    parser.add_argument("--checkpoint", help="Append each finished case to this JSONL file (constant memory)")
+    parser.add_argument("--resume", action="store_true", help="Skip cases already completed in --checkpoint")
+    parser.add_argument("--results-store", help="Also save this run as Parquet in this directory (needs pyarrow)")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    if args.checkpoint and (args.manifest or args.judge_batch_size):
+        parser.error("--checkpoint cannot be combined with --manifest or --judge-batch-size")
+    
+    if args.judge_store is not None:
+        judge.store = make_judge_store(args.judge_store)
+    
+    dataset = GoldenDataset(args.dataset)
+    if args.shard:
+        shard_index, num_shards = (int(part) for part in args.shard.split("/"))
+        dataset = dataset.shard(shard_index, num_shards)
+    
     # Example usage
     print("Testing Research Assistant with Evaluation...")
     
@@ -166,11 +715,63 @@ if __name__ == "__main__":
     
     # Run golden dataset evaluation
     print("\n\nRunning Golden Dataset Evaluation...")
-    eval_results = run_golden_dataset_eval()
-    
-    print(f"\nEvaluated {len(eval_results)} test cases")
-    passed = sum(1 for r in eval_results if r["passed"])
-    print(f"Passed: {passed}/{len(eval_results)}")
+    if args.checkpoint:
+        if args.concurrency > 1:
+            summary = asyncio.run(arun_checkpointed_eval(
+                dataset,
+                args.checkpoint,
+                resume=args.resume,
+                concurrency=args.concurrency,
+                timeout=args.timeout,
+                max_retries=args.retries,
+                on_progress=_print_progress
+            ))
+        else:
+            summary = run_checkpointed_eval(dataset, args.checkpoint, resume=args.resume, on_progress=_print_progress)
+        print(f"\nCheckpoint {summary['checkpoint']}: ran {summary['executed']} cases, "
+              f"{summary['skipped']} already completed")
+        print(f"Passed: {summary['passed']}/{summary['completed']} completed "
+              f"(mean score {summary['mean_score']:.2f})")
+        if summary["failed"]:
+            print(f"Failed: {summary['failed']} (re-run them with --resume)")
+        print(f"Judge calls: {judge.judge_calls}")
+        if args.results_store:
+            from results_store import ResultsStore, checkpoint_records
+            run_id = ResultsStore(args.results_store).write_run(checkpoint_records(args.checkpoint))
+            print(f"Saved run {run_id} to {args.results_store} (python reporting.py --store {args.results_store})")
+    else:
+        if args.concurrency > 1 or args.judge_batch_size:
+            eval_results = asyncio.run(arun_golden_dataset_eval(
+                dataset,
+                concurrency=args.concurrency,
+                timeout=args.timeout,
+                max_retries=args.retries,
+                on_progress=_print_progress,
+                judge_batch_size=args.judge_batch_size,
+                manifest_path=args.manifest
+            ))
+        else:
+            eval_results = run_golden_dataset_eval(dataset, manifest_path=args.manifest)
+        
+        print(f"\nEvaluated {len(eval_results)} test cases")
+        passed = sum(1 for r in eval_results if r["passed"])
+        print(f"Passed: {passed}/{len(eval_results)}")
+        if args.manifest:
+            skipped = sum(1 for r in eval_results if r.get("reused"))
+            print(f"Unchanged cases reused from manifest: {skipped}/{len(eval_results)}")
+        reused = sum(1 for r in eval_results if r["result"].get("evaluation", {}).get("cached"))
+        print(f"Judge verdicts reused: {reused}/{len(eval_results)} (judge calls: {judge.judge_calls})")
+        if judge.batch_stats["batch_requests"]:
+            print(f"Batched judging: {judge.batch_stats['batched_items']} items in {judge.batch_stats['batch_requests']} requests, "
+                  f"~{judge.batch_stats['prompt_tokens_saved']} prompt tokens saved")
+        if args.results_store:
+            from results_store import ResultsStore
+            run_id = ResultsStore(args.results_store).write_run(eval_results)
+            print(f"Saved run {run_id} to {args.results_store} (python reporting.py --store {args.results_store})")
+    judge_stats = judge.stats()
+    if judge_stats["parse_failures"]:
+        print(f"Unparseable judge outputs: {judge_stats['parse_failures']} "
+              f"({judge_stats['parse_failure_rate']:.1%} of judge calls wasted)")
     
     print("\nCheck your Langfuse dashboard to see traces and scores!")
 
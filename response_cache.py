@@ -0,0 +1,182 @@
+"""
+Response Cache for the Research Assistant
+Caches LLM answers keyed by normalized query, model, temperature and prompt template.
+
+Tiers are pluggable: an in-process LRU+TTL tier is always used, and an optional
+SQLite tier keeps entries across restarts. Lookups go tier by tier; a hit in a
+slower tier is copied back into the faster ones.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share a key."""
+    return " ".join(query.lower().split())
+
+
+def make_cache_key(query: str, model: str, temperature: Optional[float], prompt_template: str) -> str:
+    """Build a cache key from everything that changes the LLM answer."""
+    template_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+    payload = json.dumps([normalize_query(query), model, temperature, template_hash])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """In-process LRU cache with per-entry TTL."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """On-disk cache tier that survives restarts. Values must be JSON-serializable."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Multi-tier response cache with hit/miss counters."""
+
+    def __init__(self, tiers: List[Any]):
+        self.tiers = tiers
+        self.hits = 0
+        self.misses = 0
+        self.tier_hits: Dict[str, int] = {tier.name: 0 for tier in tiers}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None, promoting hits to faster tiers."""
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                self.hits += 1
+                self.tier_hits[tier.name] += 1
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        """Store a value in every tier."""
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for health/metrics endpoints."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "tier_hits": dict(self.tier_hits),
+            "sizes": {tier.name: len(tier) for tier in self.tiers},
+            "evictions": sum(getattr(tier, "evictions", 0) for tier in self.tiers),
+        }
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    """
+    Build the response cache from environment variables:
+      RESPONSE_CACHE_ENABLED      "0" disables caching (default "1")
+      RESPONSE_CACHE_MAX_ENTRIES  in-process LRU size (default 1024)
+      RESPONSE_CACHE_TTL_SECONDS  entry lifetime (default 3600)
+      RESPONSE_CACHE_SQLITE_PATH  enables the on-disk tier at this path
+    """
+    if os.getenv("RESPONSE_CACHE_ENABLED", "1") == "0":
+        return None
+    ttl = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    tiers: List[Any] = [MemoryTier(int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")), ttl)]
+    sqlite_path = os.getenv("RESPONSE_CACHE_SQLITE_PATH")
+    if sqlite_path:
+        tiers.append(SQLiteTier(sqlite_path, ttl))
+    return ResponseCache(tiers)
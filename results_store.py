@@ -0,0 +1,211 @@
+"""
+Columnar Results Store
+Persists golden-dataset runs as Parquet, one row per case per run, so months
+of nightly runs can be queried and aggregated without walking nested dicts
+(see reporting.py).
+
+Layout: <directory>/<run_id>.parquet, one file per run. Reading the
+directory back yields a single table across runs.
+
+Columns:
+  run_id, run_timestamp, test_id, category, query,
+  passed, validation_passed, error, cached, score, min_score,
+  score_relevance, score_accuracy, score_completeness, score_grounding,
+  total_ms, generation_ms, judge_ms,
+  generation_input_tokens, generation_output_tokens,
+  judge_input_tokens, judge_output_tokens, cost_usd
+
+Requires pyarrow (pip install pyarrow); it is imported only when a run is
+written or read.
+
+Usage:
+  python results_store.py import run.jsonl --store results/      # from a --checkpoint file
+  python results_store.py list --store results/
+"""
+
+import argparse
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+SCORE_DIMENSIONS = ("relevance", "accuracy", "completeness", "grounding")
+
+_INT_COLUMNS = (
+    "generation_input_tokens", "generation_output_tokens", "judge_input_tokens", "judge_output_tokens"
+)
+_FLOAT_COLUMNS = (
+    "score", "min_score", *(f"score_{d}" for d in SCORE_DIMENSIONS),
+    "total_ms", "generation_ms", "judge_ms", "cost_usd"
+)
+_BOOL_COLUMNS = ("passed", "validation_passed", "error", "cached")
+_STRING_COLUMNS = ("run_id", "test_id", "category", "query")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The results store needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _schema():
+    pa = _pyarrow()
+    return pa.schema(
+        [(name, pa.string()) for name in _STRING_COLUMNS]
+        + [("run_timestamp", pa.timestamp("us", tz="UTC"))]
+        + [(name, pa.bool_()) for name in _BOOL_COLUMNS]
+        + [(name, pa.float64()) for name in _FLOAT_COLUMNS]
+        + [(name, pa.int64()) for name in _INT_COLUMNS]
+    )
+
+
+def new_run_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def record_to_row(record: Dict[str, Any], run_id: str, run_timestamp: datetime) -> Dict[str, Any]:
+    """Flatten one golden-eval record (see _build_record) into a table row."""
+    result = record.get("result", {})
+    evaluation = result.get("evaluation", {})
+    scores = evaluation.get("scores", {})
+    metrics = result.get("metrics", {})
+    stages = metrics.get("stages_ms", {})
+    tokens = metrics.get("tokens", {})
+
+    def dimension(name: str) -> Optional[float]:
+        value = scores.get(name)
+        if isinstance(value, dict):
+            value = value.get("score")
+        return float(value) if isinstance(value, (int, float)) else None
+
+    return {
+        "run_id": run_id,
+        "run_timestamp": run_timestamp,
+        "test_id": record.get("test_id"),
+        "category": record.get("category"),
+        "query": record.get("query"),
+        "passed": bool(record.get("passed")),
+        "validation_passed": bool(record.get("validation_passed")),
+        "error": bool(result.get("error") or evaluation.get("error")),
+        "cached": bool(evaluation.get("cached")),
+        "score": float(record.get("score", 0.0)),
+        "min_score": float(record.get("min_score", 0.0)),
+        **{f"score_{name}": dimension(name) for name in SCORE_DIMENSIONS},
+        "total_ms": metrics.get("total_ms"),
+        "generation_ms": stages.get("generation"),
+        "judge_ms": stages.get("judge_call"),
+        "generation_input_tokens": tokens.get("generation", {}).get("input", 0),
+        "generation_output_tokens": tokens.get("generation", {}).get("output", 0),
+        "judge_input_tokens": tokens.get("judge", {}).get("input", 0),
+        "judge_output_tokens": tokens.get("judge", {}).get("output", 0),
+        "cost_usd": metrics.get("cost_usd", 0.0),
+    }
+
+
+class ResultsStore:
+    """Directory of per-run Parquet files."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def write_run(
+        self,
+        records: Iterable[Dict[str, Any]],
+        run_id: Optional[str] = None,
+        batch_size: int = 10_000
+    ) -> str:
+        """
+        Write one run. `records` may be any iterable (e.g. a checkpoint's
+        iter_records()); rows are written in batches, so memory stays flat.
+        Returns the run id; writing an existing run id replaces that run.
+        """
+        pa = _pyarrow()
+        if run_id is None:
+            run_id = base_id = new_run_id()
+            suffix = 1
+            # Never overwrite an earlier run that started in the same second
+            while os.path.exists(self._path(run_id)):
+                suffix += 1
+                run_id = f"{base_id}-{suffix}"
+        if not re.fullmatch(r"[\w.\-]+", run_id):
+            raise ValueError(f"Invalid run id {run_id!r} (letters, digits, '_', '-', '.')")
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(run_id)
+        tmp_path = f"{path}.tmp"
+        schema = _schema()
+        run_timestamp = datetime.now(timezone.utc)
+
+        with pa.parquet.ParquetWriter(tmp_path, schema) as writer:
+            batch: List[Dict[str, Any]] = []
+            for record in records:
+                batch.append(record_to_row(record, run_id, run_timestamp))
+                if len(batch) >= batch_size:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+        os.replace(tmp_path, path)
+        return run_id
+
+    def list_runs(self) -> List[str]:
+        """Run ids in chronological (lexicographic) order."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len(".parquet")] for name in os.listdir(self.directory) if name.endswith(".parquet"))
+
+    def read(self, run_ids: Optional[List[str]] = None, columns: Optional[List[str]] = None):
+        """All rows (or only these runs / columns) as a pandas DataFrame."""
+        pa = _pyarrow()
+        run_ids = run_ids or self.list_runs()
+        if not run_ids:
+            return _schema().empty_table().to_pandas()
+        tables = [pa.parquet.read_table(self._path(run_id), columns=columns) for run_id in run_ids]
+        return pa.concat_tables(tables).to_pandas()
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.parquet")
+
+
+def checkpoint_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the records of a --checkpoint file (latest record per case wins).
+    The file is only read, so importing a finished or running checkpoint
+    never touches it.
+    """
+    from checkpoint import read_records
+
+    latest: Dict[str, int] = {}
+    for position, record in enumerate(read_records(path)):
+        latest[record.get("key", position)] = position
+    keep = set(latest.values())
+    for position, record in enumerate(read_records(path)):
+        if position in keep:
+            yield record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar store for golden dataset runs.")
+    parser.add_argument("command", choices=["import", "list"])
+    parser.add_argument("source", nargs="?", help="import: checkpoint JSONL or JSON list of records")
+    parser.add_argument("--store", default="eval_results", help="Results directory")
+    parser.add_argument("--run-id", help="Run id (default: current UTC time)")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    if args.command == "list":
+        for run_id in store.list_runs():
+            print(run_id)
+    else:
+        if not args.source:
+            parser.error("import needs a source file")
+        if args.source.endswith(".jsonl"):
+            records = checkpoint_records(args.source)
+        else:
+            with open(args.source, "r") as f:
+                records = json.load(f)
+        run_id = store.write_run(records, run_id=args.run_id)
+        print(f"Wrote run {run_id} to {store._path(run_id)}")
@@ -0,0 +1,78 @@
+"""
+Run Manifest for Incremental Golden Dataset Evaluation
+Records, per test case, a fingerprint of everything that affects its result
+(the case itself, prompt template, model, judge rubric and judge model) along
+with the last result. A new run only re-executes cases whose fingerprint
+changed and merges the rest from the manifest.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+MANIFEST_VERSION = 1
+
+
+def case_fingerprint(
+    test_case: Dict[str, Any],
+    prompt_template: str,
+    model: str,
+    judge_rubric: str,
+    judge_model: str
+) -> str:
+    """Hash of a test case plus the prompt, model and rubric it is evaluated with."""
+    payload = json.dumps(
+        {
+            "case": test_case,
+            "prompt_template": prompt_template,
+            "model": model,
+            "judge_rubric": judge_rubric,
+            "judge_model": judge_model,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunManifest:
+    """JSON file mapping case id -> {fingerprint, record}."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cases: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.cases = data.get("cases", {})
+
+    def fresh_record(self, case_id: Optional[str], fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Stored record for this case if its fingerprint is unchanged and the
+        stored run succeeded; None means the case must be re-executed.
+        """
+        entry = self.cases.get(case_id) if case_id is not None else None
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return None
+        record = entry.get("record", {})
+        # Failed runs and judge errors are always retried
+        if record.get("result", {}).get("evaluation", {}).get("error"):
+            return None
+        return record
+
+    def update(self, case_id: Optional[str], fingerprint: str, record: Dict[str, Any]):
+        if case_id is not None:
+            self.cases[case_id] = {"fingerprint": fingerprint, "record": record}
+
+    def prune(self, keep_ids: Iterable[str]):
+        """Drop cases that are no longer in the dataset."""
+        keep = set(keep_ids)
+        self.cases = {case_id: entry for case_id, entry in self.cases.items() if case_id in keep}
+
+    def save(self):
+        """Write atomically so a crash never leaves a truncated manifest."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "cases": self.cases}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,210 @@
+"""
+Background Score Export for Langfuse
+A single shared pipeline for evaluation scores: callers enqueue scores without
+blocking, and a background thread ships them in batches (by size or interval)
+through one Langfuse client. The queue is bounded; when it is full new scores
+are dropped and counted rather than slowing down the request path.
+
+When a telemetry spool is configured (TELEMETRY_SPOOL_DIR), batches are
+written to the local spool instead and shipped later by the replayer, so a
+Langfuse outage never costs scores.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_STOP = object()
+
+
+def _default_client_factory():
+    from langfuse import Langfuse
+    return Langfuse()
+
+
+class ScoreExporter:
+    """Bounded queue + background flusher for Langfuse scores."""
+
+    def __init__(
+        self,
+        client_factory: Optional[Callable[[], Any]] = None,
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        spool=None
+    ):
+        self.client_factory = client_factory or _default_client_factory
+        self.spool = spool
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._client = None
+        self._client_failed = False
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.submitted = 0
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, trace_id: str, name: str, value: float, comment: str = "") -> bool:
+        """Enqueue a score; returns False if it was dropped (queue full or exporter closed)."""
+        if self._closed:
+            self._count("dropped")
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait({"trace_id": trace_id, "name": name, "value": value, "comment": comment})
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("submitted")
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything enqueued so far has been exported (or timeout)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        client = self._client
+        if client is not None and hasattr(client, "flush"):
+            client.flush()
+        return not self._queue.unfinished_tasks
+
+    def shutdown(self, timeout: float = 10.0):
+        """Flush remaining scores and stop the worker. Registered with atexit."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        if self.spool is not None:
+            self.spool.seal()
+        client = self._client
+        if client is not None and hasattr(client, "flush"):
+            client.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "submitted": self.submitted,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "queue_depth": self._queue.qsize(),
+        }
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def export_batch(self, batch: List[Dict[str, Any]]):
+        """Send one batch. The Langfuse SDK queues each score for its own bulk ingestion."""
+        if self.spool is not None:
+            from telemetry_spool import score_event
+            self.spool.append([score_event(**score) for score in batch])
+            return
+        client = self._get_client()
+        if client is None:
+            raise RuntimeError("Langfuse client unavailable")
+        for score in batch:
+            client.score(**score)
+
+    def _get_client(self):
+        if self._client is None and not self._client_failed:
+            try:
+                self._client = self.client_factory()
+            except Exception:
+                self._client_failed = True
+        return self._client
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="score-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._export(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+    def _export(self, batch: List[Dict[str, Any]]):
+        try:
+            self.export_batch(batch)
+            self.exported += len(batch)
+            self.batches += 1
+        except Exception:
+            self.failed += len(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+_exporter: Optional[ScoreExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_score_exporter() -> ScoreExporter:
+    """
+    Process-wide exporter, created on first use. Tunable via
+    SCORE_EXPORT_MAX_QUEUE, SCORE_EXPORT_BATCH_SIZE and SCORE_EXPORT_FLUSH_INTERVAL;
+    spools to disk when TELEMETRY_SPOOL_DIR is set.
+    """
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                from telemetry_spool import get_spool
+                _exporter = ScoreExporter(
+                    max_queue=int(os.getenv("SCORE_EXPORT_MAX_QUEUE", "10000")),
+                    batch_size=int(os.getenv("SCORE_EXPORT_BATCH_SIZE", "100")),
+                    flush_interval=float(os.getenv("SCORE_EXPORT_FLUSH_INTERVAL", "1.0")),
+                    spool=get_spool(),
+                )
+                atexit.register(_exporter.shutdown)
+    return _exporter
+
+
+def reset_score_exporter():
+    """
+    Forget the process-wide exporter without flushing it. Call in a forked
+    child: the parent's flusher thread did not survive the fork, and its
+    queued scores belong to the parent.
+    """
+    global _exporter
+    with _exporter_lock:
+        _exporter = None
+
+
+def shutdown_score_exporter():
+    """Flush and stop the process-wide exporter, if one was created (gunicorn worker_exit)."""
+    exporter = _exporter
+    if exporter is not None:
+        exporter.shutdown()
@@ -0,0 +1,118 @@
+"""
+Single-Flight Request Coalescing
+Concurrent calls with the same key share one execution: the first caller
+runs the work, callers that arrive while it is in flight wait for its
+result (or exception) instead of issuing a duplicate upstream call.
+Nothing is cached - once the call finishes, the next caller runs it again.
+
+Works for async code (`ado`, one flight per event loop) and for threads
+(`do`). Each group counts leader calls and coalesced callers, also exported
+as llm_eval_singleflight_calls_total{group} and
+llm_eval_coalesced_requests_total{group}.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from metrics import REGISTRY
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A synchronous in-flight call."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls (keys must be hashable; None disables)."""
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._sync_calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Tuple[int, Hashable], "asyncio.Future"] = {}
+
+    async def ado(self, key: Optional[Hashable], fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await fn() once per key across concurrent callers.
+        The shared call runs as its own task, so a caller being cancelled
+        (e.g. a client disconnect) does not cancel it for the others.
+        """
+        if key is None:
+            return await fn()
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        task = self._async_calls.get(flight_key)
+        if task is not None:
+            self._count_coalesced()
+        else:
+            task = loop.create_task(fn())
+            self._async_calls[flight_key] = task
+            task.add_done_callback(lambda t: self._finish_async(flight_key, t))
+            self._count_call()
+        return await asyncio.shield(task)
+
+    def do(self, key: Optional[Hashable], fn: Callable[[], T]) -> T:
+        """Run fn() once per key across concurrent threads."""
+        if key is None:
+            return fn()
+        with self._lock:
+            call = self._sync_calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._sync_calls[key] = _Call()
+        if not leader:
+            self._count_coalesced()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self._count_call()
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._sync_calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Leader calls, coalesced callers and calls currently in flight."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._sync_calls) + len(self._async_calls),
+        }
+
+    def _finish_async(self, flight_key: Tuple[int, Hashable], task: "asyncio.Future"):
+        if self._async_calls.get(flight_key) is task:
+            del self._async_calls[flight_key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def _count_call(self):
+        with self._lock:
+            self.calls += 1
+        REGISTRY.counter(
+            "llm_eval_singleflight_calls_total", "Calls executed by single-flight groups", group=self.name
+        ).inc()
+
+    def _count_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+        REGISTRY.counter(
+            "llm_eval_coalesced_requests_total", "Calls that shared an identical in-flight call", group=self.name
+        ).inc()
@@ -0,0 +1,479 @@
+"""
+Offline Telemetry Spool for Langfuse
+When TELEMETRY_SPOOL_DIR is set, scores, explicitly recorded traces and
+(after spool_langfuse_sdk()) everything the Langfuse SDK ingests, including
+@observe traces, are appended to a local spool first instead of being sent
+inline. The spool is
+append-only and segmented: the active segment is a JSONL file, sealed
+segments are gzip-compressed, and the oldest segments are dropped (and
+counted) once the total size cap is reached.
+
+The active segment is sealed when it reaches its size or age limit (a
+background timer covers idle processes) and when the process exits. Segments
+left active by a process that died without sealing are adopted by the
+replayer once their owner pid is gone or they have gone stale.
+
+SpoolReplayer ships sealed segments to the Langfuse ingestion API in bulk.
+Every event carries a stable id, so replaying a segment twice is harmless;
+a segment is deleted only after the server accepted it.
+
+Usage:
+  python telemetry_spool.py replay              # ship everything now
+  python telemetry_spool.py stats
+"""
+
+import argparse
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def score_event(trace_id: str, name: str, value: float, comment: str = "") -> Dict[str, Any]:
+    """Langfuse ingestion event for a score."""
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": _now_iso(),
+        "type": "score-create",
+        "body": {
+            "id": str(uuid.uuid4()),
+            "traceId": trace_id,
+            "name": name,
+            "value": value,
+            "comment": comment,
+        },
+    }
+
+
+def generation_events(
+    name: str,
+    input: Any = None,
+    output: Any = None,
+    model: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    completion_start_time: Optional[datetime] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    level: str = "DEFAULT",
+    status_message: Optional[str] = None,
+    trace_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Langfuse ingestion events for a trace containing one generation."""
+    trace_id = trace_id or str(uuid.uuid4())
+    timestamp = _now_iso()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "timestamp": timestamp,
+            "type": "trace-create",
+            "body": {"id": trace_id, "name": name, "input": input, "output": output, "metadata": metadata},
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "timestamp": timestamp,
+            "type": "generation-create",
+            "body": {
+                "id": str(uuid.uuid4()),
+                "traceId": trace_id,
+                "name": name,
+                "input": input,
+                "output": output,
+                "model": model,
+                "startTime": _iso(start_time),
+                "endTime": _iso(end_time),
+                "completionStartTime": _iso(completion_start_time),
+                "metadata": metadata,
+                "level": level,
+                "statusMessage": status_message,
+            },
+        },
+    ]
+
+
+class TelemetrySpool:
+    """Append-only, size-capped, segmented spool of Langfuse ingestion events."""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        segment_max_age: float = 30.0,
+        max_total_bytes: int = 256 * 1024 * 1024,
+        compress: bool = True,
+        stale_after: Optional[float] = None
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age = segment_max_age
+        self.max_total_bytes = max_total_bytes
+        self.compress = compress
+        # Live processes seal within ~2x segment_max_age, so an active segment
+        # untouched for this long is orphaned even if its pid was reused
+        self.stale_after = stale_after if stale_after is not None else max(300.0, 10 * segment_max_age)
+        self._lock = threading.Lock()
+        self._active: Optional[Path] = None
+        self._active_file = None
+        self._active_bytes = 0
+        self._active_opened = 0.0
+        self._sealer: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+        self.appended = 0
+        self.dropped_segments = 0
+        self.dropped_bytes = 0
+
+    def append(self, events: List[Dict[str, Any]]):
+        """Append events to the active segment, rotating and enforcing the cap as needed."""
+        data = "".join(json.dumps(event, default=str) + "\n" for event in events).encode("utf-8")
+        with self._lock:
+            if self._active_file is None:
+                self._open_segment()
+                self._ensure_sealer()
+            self._active_file.write(data)
+            self._active_file.flush()
+            self._active_bytes += len(data)
+            self.appended += len(events)
+            if (self._active_bytes >= self.segment_max_bytes
+                    or time.monotonic() - self._active_opened >= self.segment_max_age):
+                self._seal_active()
+                self._enforce_cap()
+
+    def seal(self):
+        """Close the active segment so it can be replayed."""
+        with self._lock:
+            self._seal_active()
+            self._enforce_cap()
+
+    def close(self):
+        """Seal the active segment and stop the age timer. Registered with atexit by get_spool()."""
+        self._closed.set()
+        self.seal()
+
+    def adopt_orphans(self) -> int:
+        """
+        Seal active segments left behind by processes that exited without
+        sealing (crash, SIGKILL, os._exit). Returns how many were adopted.
+        """
+        adopted = 0
+        now = time.time()
+        for path in self.directory.glob("segment-*.jsonl"):
+            if path.name.endswith(".sealed.jsonl") or path == self._active:
+                continue
+            try:
+                pid = int(path.name[:-len(".jsonl")].rsplit("-", 1)[1])
+                idle = now - path.stat().st_mtime
+            except (ValueError, IndexError, FileNotFoundError):
+                continue
+            if _pid_alive(pid) and idle < self.stale_after:
+                continue
+            with self._lock:
+                try:
+                    sealed = self._seal_path(path)
+                except FileNotFoundError:
+                    continue            # another replayer adopted it first
+            if sealed:
+                adopted += 1
+                logger.info("Adopted orphaned telemetry segment %s", path.name)
+        return adopted
+
+    def sealed_segments(self) -> List[Path]:
+        """Sealed segments from every process, oldest first."""
+        segments = list(self.directory.glob("segment-*.jsonl.gz"))
+        segments.extend(self.directory.glob("segment-*.sealed.jsonl"))
+        return sorted(segments, key=lambda path: path.name)
+
+    @staticmethod
+    def read_segment(path: Path) -> Iterator[Dict[str, Any]]:
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def stats(self) -> Dict[str, int]:
+        segments = self.sealed_segments()
+        return {
+            "appended": self.appended,
+            "sealed_segments": len(segments),
+            "spooled_bytes": sum(path.stat().st_size for path in segments) + self._active_bytes,
+            "dropped_segments": self.dropped_segments,
+            "dropped_bytes": self.dropped_bytes,
+        }
+
+    def _open_segment(self):
+        # Name sorts chronologically and is unique across worker processes
+        self._active = self.directory / f"segment-{time.time_ns():020d}-{os.getpid()}.jsonl"
+        self._active_file = open(self._active, "ab")
+        self._active_bytes = 0
+        self._active_opened = time.monotonic()
+
+    def _ensure_sealer(self):
+        # Seals an idle active segment once it reaches segment_max_age
+        if self._sealer is not None and self._sealer.is_alive():
+            return
+
+        def loop():
+            while not self._closed.wait(self.segment_max_age / 2):
+                with self._lock:
+                    if (self._active_file is not None
+                            and time.monotonic() - self._active_opened >= self.segment_max_age):
+                        self._seal_active()
+                        self._enforce_cap()
+
+        self._sealer = threading.Thread(target=loop, name="spool-sealer", daemon=True)
+        self._sealer.start()
+
+    def _seal_active(self):
+        if self._active_file is None:
+            return
+        self._active_file.close()
+        path, self._active, self._active_file = self._active, None, None
+        self._active_bytes = 0
+        self._seal_path(path)
+
+    def _seal_path(self, path: Path) -> bool:
+        """Compress (or rename) one closed .jsonl segment; empty segments are removed."""
+        if path.stat().st_size == 0:
+            path.unlink(missing_ok=True)
+            return False
+        base = path.name[:-len(".jsonl")]
+        if self.compress:
+            tmp = path.with_name(base + f".jsonl.gz.{os.getpid()}.tmp")
+            with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+                dst.write(src.read())
+            os.replace(tmp, path.with_name(base + ".jsonl.gz"))
+            path.unlink()
+        else:
+            os.replace(path, path.with_name(base + ".sealed.jsonl"))
+        return True
+
+    def _enforce_cap(self):
+        segments = self.sealed_segments()
+        total = sum(path.stat().st_size for path in segments)
+        while segments and total > self.max_total_bytes:
+            oldest = segments.pop(0)
+            size = oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+            total -= size
+            self.dropped_segments += 1
+            self.dropped_bytes += size
+            logger.warning("Telemetry spool over %d bytes; dropped %s", self.max_total_bytes, oldest.name)
+
+
+class SpoolingTransport(httpx.BaseTransport):
+    """
+    httpx transport for the Langfuse SDK: ingestion batches are appended to
+    the spool and acknowledged at once; any other request goes to the network.
+    """
+
+    def __init__(self, spool: TelemetrySpool, transport: Optional[httpx.BaseTransport] = None):
+        self.spool = spool
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/api/public/ingestion"):
+            return self._transport.handle_request(request)
+        batch = json.loads(request.read()).get("batch", [])
+        self.spool.append(batch)
+        acknowledged = {"successes": [{"id": event.get("id"), "status": 201} for event in batch], "errors": []}
+        return httpx.Response(207, json=acknowledged, request=request)
+
+    def close(self):
+        self._transport.close()
+
+
+class SpoolReplayer:
+    """Ships sealed spool segments to the Langfuse ingestion API in bulk."""
+
+    def __init__(
+        self,
+        spool: TelemetrySpool,
+        host: Optional[str] = None,
+        public_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        batch_size: int = 200,
+        timeout: float = 10.0
+    ):
+        self.spool = spool
+        self.host = (host or os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")).rstrip("/")
+        self.public_key = public_key or os.getenv("LANGFUSE_PUBLIC_KEY", "")
+        self.secret_key = secret_key or os.getenv("LANGFUSE_SECRET_KEY", "")
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.shipped = 0
+        self.rejected = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def replay(self, seal_active: bool = True) -> Dict[str, int]:
+        """
+        Ship every sealed segment, oldest first. Stops at the first segment
+        that can't be delivered (Langfuse down) and leaves it for next time.
+        """
+        if seal_active:
+            self.spool.seal()
+        self.spool.adopt_orphans()
+        shipped_segments = 0
+        with httpx.Client(base_url=self.host, auth=(self.public_key, self.secret_key), timeout=self.timeout) as client:
+            for segment in self.spool.sealed_segments():
+                try:
+                    self._ship_segment(client, segment)
+                except (httpx.HTTPError, RuntimeError) as e:
+                    logger.warning("Langfuse unavailable, keeping %s for later: %s", segment.name, e)
+                    break
+                segment.unlink(missing_ok=True)
+                shipped_segments += 1
+        return {"segments": shipped_segments, "events": self.shipped, "rejected": self.rejected}
+
+    def start_background(self, interval: float = 30.0):
+        """Replay periodically from a daemon thread (catches up after an outage)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.replay()
+                except Exception:
+                    logger.exception("Telemetry spool replay failed")
+
+        self._thread = threading.Thread(target=loop, name="spool-replayer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _ship_segment(self, client, segment: Path):
+        batch: List[Dict[str, Any]] = []
+        for event in self.spool.read_segment(segment):
+            batch.append(event)
+            if len(batch) >= self.batch_size:
+                self._post(client, batch)
+                batch = []
+        if batch:
+            self._post(client, batch)
+
+    def _post(self, client, batch: List[Dict[str, Any]]):
+        response = client.post("/api/public/ingestion", json={"batch": batch})
+        if response.status_code >= 500 or response.status_code in (401, 403, 429):
+            raise RuntimeError(f"ingestion returned {response.status_code}")
+        errors = response.json().get("errors", []) if response.content else []
+        retryable = [error for error in errors if error.get("status", 500) >= 500]
+        if retryable:
+            raise RuntimeError(f"{len(retryable)} events failed server-side")
+        # 4xx per-event errors are permanent; count them instead of retrying forever
+        self.rejected += len(errors)
+        self.shipped += len(batch) - len(errors)
+
+
+_spool: Optional[TelemetrySpool] = None
+_replayer: Optional[SpoolReplayer] = None
+_spool_lock = threading.Lock()
+# False in forked workers whose parent already replays the shared directory
+_replay_in_process = True
+
+
+def get_spool() -> Optional[TelemetrySpool]:
+    """
+    Process-wide spool, or None when TELEMETRY_SPOOL_DIR is unset. Also starts a
+    background replayer when TELEMETRY_SPOOL_REPLAY_INTERVAL (seconds) is set.
+    Other knobs: TELEMETRY_SPOOL_SEGMENT_BYTES, TELEMETRY_SPOOL_MAX_BYTES.
+    """
+    global _spool, _replayer
+    directory = os.getenv("TELEMETRY_SPOOL_DIR")
+    if not directory:
+        return None
+    if _spool is None:
+        with _spool_lock:
+            if _spool is None:
+                _spool = TelemetrySpool(
+                    directory,
+                    segment_max_bytes=int(os.getenv("TELEMETRY_SPOOL_SEGMENT_BYTES", str(4 * 1024 * 1024))),
+                    max_total_bytes=int(os.getenv("TELEMETRY_SPOOL_MAX_BYTES", str(256 * 1024 * 1024))),
+                )
+                atexit.register(_spool.close)
+                interval = os.getenv("TELEMETRY_SPOOL_REPLAY_INTERVAL")
+                if interval and _replay_in_process:
+                    _replayer = SpoolReplayer(_spool)
+                    _replayer.start_background(float(interval))
+    return _spool
+
+
+def reset_spool(replay: bool = True):
+    """
+    Forget the process-wide spool (call in a forked child; the next get_spool()
+    opens fresh segments named after this pid). With replay=False this process
+    never starts a background replayer, leaving replay to the parent so sealed
+    segments are shipped once.
+    """
+    global _spool, _replayer, _replay_in_process
+    with _spool_lock:
+        _spool = None
+        _replayer = None
+        _replay_in_process = replay
+
+
+def spool_langfuse_sdk(spool: Optional[TelemetrySpool] = None) -> bool:
+    """
+    Send the Langfuse SDK's ingestion (@observe traces, spans, generations)
+    through the spool, so traces survive an outage like scores do. Returns
+    False when no spool is configured. This builds the decorator's client, so
+    call it once per process (in a gunicorn worker, not the preloading master).
+    """
+    spool = spool or get_spool()
+    if spool is None:
+        return False
+    from langfuse.decorators import langfuse_context
+    langfuse_context.configure(httpx_client=httpx.Client(transport=SpoolingTransport(spool), timeout=20.0))
+    return True
+
+
+def close_spool():
+    """Seal the process-wide spool's active segment, if a spool was opened (gunicorn worker_exit)."""
+    spool = _spool
+    if spool is not None:
+        spool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or replay the telemetry spool.")
+    parser.add_argument("command", choices=["replay", "stats"])
+    parser.add_argument("--dir", default=os.getenv("TELEMETRY_SPOOL_DIR", "telemetry_spool"))
+    args = parser.parse_args()
+
+    spool = TelemetrySpool(args.dir)
+    if args.command == "stats":
+        spool.adopt_orphans()
+        print(json.dumps(spool.stats(), indent=2))
+    else:
+        print(json.dumps(SpoolReplayer(spool).replay(), indent=2))
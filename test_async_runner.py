@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for the async golden dataset runner (offline, scripted model).
+Checks result order, the concurrency bound, per-attempt timeouts, retries
+with full-jitter backoff, and that one failing case never aborts a run.
+
+Run directly or with pytest:
+  python test_async_runner.py
+"""
+
+import asyncio
+import json
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage
+
+import research_assistant_with_eval as assistant
+from eval_system import GoldenDataset, LLMJudge
+from fake_llm import FakeChatModel
+from score_exporter import ScoreExporter
+
+
+class ScriptedModel:
+    """
+    Answers after the delay named in the query ("delay 0.05"). Queries that
+    mention "flaky" fail their first attempt, "slow" hangs on its first
+    attempt and "broken" always fails. Tracks the peak number of calls in flight.
+    """
+
+    model_name = "scripted"
+    temperature = 0
+
+    def __init__(self):
+        self.inflight = 0
+        self.peak = 0
+        self.attempts = {}
+
+    async def ainvoke(self, messages):
+        query = re.search(r"Query: (.*)", messages[-1].content).group(1)
+        attempt = self.attempts[query] = self.attempts.get(query, 0) + 1
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        try:
+            match = re.search(r"delay ([\d.]+)", query)
+            await asyncio.sleep(float(match.group(1)) if match else 0.0)
+            if "broken" in query or ("flaky" in query and attempt == 1):
+                raise RuntimeError("upstream failed")
+            if "slow" in query and attempt == 1:
+                await asyncio.sleep(10)
+            return AIMessage(content=f"Retrieval-augmented generation answers: {query}. " * 3)
+        finally:
+            self.inflight -= 1
+
+
+@contextmanager
+def _offline(model: ScriptedModel):
+    """Point the assistant at `model` and a fake judge; restore everything afterwards."""
+    saved = {name: getattr(assistant, name) for name in ("llm", "judge", "response_cache")}
+    saved_env = os.environ.get("LLM_RATE_LIMIT")
+    assistant.llm = model
+    assistant.judge = LLMJudge(
+        llm=FakeChatModel(latency_ms=1, latency_distribution="fixed"),
+        exporter=ScoreExporter(client_factory=lambda: SimpleNamespace(score=lambda **kwargs: None)),
+        coalesce=False,
+    )
+    assistant.response_cache = None
+    os.environ["LLM_RATE_LIMIT"] = "0"
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(assistant, name, value)
+        if saved_env is None:
+            os.environ.pop("LLM_RATE_LIMIT", None)
+        else:
+            os.environ["LLM_RATE_LIMIT"] = saved_env
+
+
+def _dataset(directory: str, queries) -> GoldenDataset:
+    path = Path(directory) / "cases.jsonl"
+    with open(path, "w") as f:
+        for i, query in enumerate(queries):
+            f.write(json.dumps({"id": f"case_{i:02d}", "query": query, "min_score": 1.0}) + "\n")
+    return GoldenDataset(str(path))
+
+
+def test_results_keep_dataset_order_under_a_concurrency_bound():
+    model = ScriptedModel()
+    # Later cases finish first, so completion order is the reverse of dataset order
+    queries = [f"What is retrieval {i}? delay {0.01 * (12 - i):.2f}" for i in range(12)]
+    with _offline(model), tempfile.TemporaryDirectory() as directory:
+        dataset = _dataset(directory, queries)
+        completed = []
+        results = asyncio.run(assistant.arun_golden_dataset_eval(
+            dataset, concurrency=3, timeout=5, on_progress=lambda done, total, record: completed.append(record["test_id"])
+        ))
+    assert [record["test_id"] for record in results] == [f"case_{i:02d}" for i in range(12)]
+    assert completed != sorted(completed), "cases should complete out of order"
+    assert model.peak == 3, f"peak in flight {model.peak}, bound 3"
+    assert all(not record["result"].get("error") for record in results)
+
+
+def test_timeouts_retries_and_failures_stay_per_case():
+    model = ScriptedModel()
+    queries = [
+        "What is retrieval? delay 0.01",
+        "What is a flaky retrieval? delay 0.01",
+        "What is a slow retrieval? delay 0.01",
+        "What is a broken retrieval? delay 0.01",
+        "What is reranking? delay 0.01",
+    ]
+    with _offline(model), tempfile.TemporaryDirectory() as directory:
+        dataset = _dataset(directory, queries)
+        results = asyncio.run(assistant.arun_golden_dataset_eval(
+            dataset, concurrency=5, timeout=0.5, max_retries=2, backoff_base=0.01
+        ))
+    by_query = {record["query"]: record for record in results}
+    assert len(results) == 5
+    assert model.attempts[queries[1]] == 2 and not by_query[queries[1]]["result"].get("error")
+    assert model.attempts[queries[2]] == 2 and not by_query[queries[2]]["result"].get("error"), "timed-out attempt retried"
+    broken = by_query[queries[3]]
+    assert model.attempts[queries[3]] == 3, "one attempt plus max_retries"
+    assert broken["result"]["error"] and not broken["passed"] and broken["score"] == 0.0
+    assert "upstream failed" in broken["result"]["evaluation"]["error"]
+    assert not by_query[queries[0]]["result"].get("error") and not by_query[queries[4]]["result"].get("error")
+
+
+def test_batched_judging_keeps_order_and_failures():
+    model = ScriptedModel()
+    queries = [f"What is retrieval {i}? delay {0.01 * (6 - i):.2f}" for i in range(6)]
+    queries[2] = "What is a broken retrieval? delay 0.01"
+    with _offline(model), tempfile.TemporaryDirectory() as directory:
+        dataset = _dataset(directory, queries)
+        results = asyncio.run(assistant.arun_golden_dataset_eval(
+            dataset, concurrency=2, timeout=5, max_retries=1, backoff_base=0.01, judge_batch_size=2
+        ))
+    assert [record["test_id"] for record in results] == [f"case_{i:02d}" for i in range(6)]
+    assert model.peak == 2, f"peak in flight {model.peak}, bound 2"
+    assert results[2]["result"]["error"] and results[2]["score"] == 0.0
+    judged = [record for i, record in enumerate(results) if i != 2]
+    assert all(record["result"]["evaluation"]["overall"] > 0 for record in judged)
+
+
+def test_full_jitter_backoff():
+    delays = []
+    original_uniform = assistant.random.uniform
+    assistant.random.uniform = lambda low, high: delays.append((low, high)) or 0.0
+    calls = []
+
+    async def always_fails():
+        calls.append(1)
+        raise RuntimeError("nope")
+
+    try:
+        asyncio.run(assistant._retry_with_backoff(always_fails, timeout=1, max_retries=4, backoff_base=0.5, backoff_max=3.0))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("error swallowed after max_retries")
+    finally:
+        assistant.random.uniform = original_uniform
+    assert len(calls) == 5
+    # uniform(0, min(cap, base * 2**attempt)) before each retry
+    assert delays == [(0, 0.5), (0, 1.0), (0, 2.0), (0, 3.0)]
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Async Runner Tests")
+    print("=" * 60)
+
+    tests = [
+        test_results_keep_dataset_order_under_a_concurrency_bound,
+        test_timeouts_retries_and_failures_stay_per_case,
+        test_batched_judging_keeps_order_and_failures,
+        test_full_jitter_backoff,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark comparison used to gate CI (benchmarks/compare.py).
+
+Run directly or with pytest:
+  python test_benchmark_compare.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from compare import compare_results
+
+
+def _results(**metrics) -> dict:
+    return {"benchmarks": {"chat": {"metrics": {
+        name: {"value": value, "unit": unit, "better": better} for name, (value, unit, better) in metrics.items()
+    }}}}
+
+
+def _rows(baseline: dict, current: dict) -> dict:
+    return {row["metric"]: row for row in compare_results(baseline, current, threshold=0.15)}
+
+
+def test_relative_threshold():
+    rows = _rows(
+        _results(rps=(100.0, "req/s", "higher"), p95_ms=(50.0, "ms", "lower")),
+        _results(rps=(80.0, "req/s", "higher"), p95_ms=(45.0, "ms", "lower")),
+    )
+    assert rows["rps"]["regression"] and abs(rows["rps"]["change"] + 0.2) < 1e-9
+    assert not rows["p95_ms"]["regression"] and not rows["p95_ms"]["improvement"]
+
+
+def test_zero_baseline():
+    rows = _rows(
+        _results(errors=(0, "requests", "lower"), fixed=(3, "requests", "lower"), rps=(0.0, "req/s", "higher")),
+        _results(errors=(4, "requests", "lower"), fixed=(0, "requests", "lower"), rps=(10.0, "req/s", "higher")),
+    )
+    assert rows["errors"]["regression"], "0 -> 4 errors must regress"
+    assert rows["fixed"]["improvement"] and not rows["fixed"]["regression"]
+    assert rows["rps"]["improvement"] and not rows["rps"]["regression"]
+
+    unchanged = _rows(_results(errors=(0, "requests", "lower")), _results(errors=(0, "requests", "lower")))
+    assert not unchanged["errors"]["regression"] and unchanged["errors"]["change"] == 0.0
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Benchmark Compare Tests")
+    print("=" * 60)
+
+    tests = [
+        test_relative_threshold,
+        test_zero_baseline,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
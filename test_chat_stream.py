@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the backend's /chat/stream endpoint (in-process, fake LLM).
+The upstream slot taken for a stream must be released however the response
+ends, including when the client is gone before the first byte is sent.
+
+Run directly or with pytest:
+  python test_chat_stream.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+
+def _load_app():
+    """Import backend/main.py against the fake LLM without leaking env to other tests."""
+    overrides = {"LLM_BACKEND": "fake", "FAKE_LLM_LATENCY_MS": "1", "LLM_RATE_LIMIT": "0",
+                 "LANGFUSE_PUBLIC_KEY": "", "LANGFUSE_SECRET_KEY": "", "ONLINE_EVAL_RATE": "0"}
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        import main
+        main.init_process_clients()
+        return main
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _scope() -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/chat/stream", "raw_path": b"/chat/stream",
+        "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+
+
+async def _call(app, send):
+    body = json.dumps({"message": "What is RAG?"}).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    try:
+        await app(_scope(), receive, send)
+    except Exception:
+        pass                        # a vanished client surfaces as an error; only the slot matters
+
+
+def test_stream_completes_and_releases_slot():
+    main = _load_app()
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await _call(main.app, send)
+        return main.limiter.stats()
+
+    stats = asyncio.run(run())
+    body = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    events = [json.loads(line) for line in body.decode().splitlines()]
+    assert events and events[-1]["type"] == "done", events[-1:]
+    assert stats["inflight"] == 0, stats
+
+
+def test_disconnect_before_headers_releases_slot():
+    main = _load_app()
+
+    async def send(message):
+        raise OSError("client disconnected")
+
+    async def run():
+        for _ in range(3):
+            await _call(main.app, send)
+        # Checked inside the loop: asyncio.run's shutdown would finalize a leaked slot
+        return main.limiter.stats()
+
+    stats = asyncio.run(run())
+    assert stats["inflight"] == 0, stats
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Chat Stream Tests")
+    print("=" * 60)
+
+    tests = [
+        test_stream_completes_and_releases_slot,
+        test_disconnect_before_headers_releases_slot,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for checkpointed, resumable golden dataset runs (offline, fake LLM).
+
+Run directly or with pytest:
+  python test_checkpoint.py
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import research_assistant_with_eval as assistant
+from checkpoint import CheckpointMismatch, RunCheckpoint
+from eval_system import LLMJudge
+from fake_llm import FakeChatModel
+from score_exporter import ScoreExporter
+
+
+class Crash(Exception):
+    pass
+
+
+@contextmanager
+def _offline():
+    """Run the assistant on fake models without a cache; restore its globals afterwards."""
+    saved = {name: getattr(assistant, name) for name in ("llm", "judge", "response_cache")}
+    saved_env = os.environ.get("LLM_RATE_LIMIT")
+    assistant.llm = FakeChatModel(latency_ms=1, latency_distribution="fixed")
+    assistant.judge = LLMJudge(llm=FakeChatModel(latency_ms=1, latency_distribution="fixed"), exporter=ScoreExporter())
+    assistant.response_cache = None
+    os.environ["LLM_RATE_LIMIT"] = "0"
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(assistant, name, value)
+        if saved_env is None:
+            os.environ.pop("LLM_RATE_LIMIT", None)
+        else:
+            os.environ["LLM_RATE_LIMIT"] = saved_env
+
+
+def _write_dataset(path: Path, size: int):
+    with open(path, "w") as f:
+        for i in range(size):
+            f.write(json.dumps({
+                "id": f"case_{i:03d}",
+                "query": f"What is retrieval technique number {i}?",
+                "expected_topics": ["retrieval"],
+            }) + "\n")
+
+
+def _crash_after(count: int):
+    def on_progress(done, total, record):
+        if done >= count:
+            raise Crash()
+    return on_progress
+
+
+def test_async_run_resumes_after_crash():
+    with _offline(), tempfile.TemporaryDirectory() as directory:
+        dataset, checkpoint = Path(directory) / "cases.jsonl", str(Path(directory) / "run.jsonl")
+        _write_dataset(dataset, 30)
+        try:
+            asyncio.run(assistant.arun_checkpointed_eval(
+                str(dataset), checkpoint, concurrency=4, on_progress=_crash_after(10)
+            ))
+        except Crash:
+            pass
+        with RunCheckpoint(checkpoint, resume=True) as partial:
+            assert len(partial.completed) == 10
+
+        summary = asyncio.run(assistant.arun_checkpointed_eval(str(dataset), checkpoint, resume=True, concurrency=4))
+        assert summary["skipped"] == 10 and summary["executed"] == 20
+        assert summary["completed"] == 30 and summary["failed"] == 0
+
+        with RunCheckpoint(checkpoint, resume=True) as done:
+            ids = [record["test_id"] for record in done.iter_records()]
+        assert sorted(ids) == [f"case_{i:03d}" for i in range(30)]
+
+
+def test_sync_run_resumes_and_new_run_starts_over():
+    with _offline(), tempfile.TemporaryDirectory() as directory:
+        dataset, checkpoint = Path(directory) / "cases.jsonl", str(Path(directory) / "run.jsonl")
+        _write_dataset(dataset, 6)
+        try:
+            assistant.run_checkpointed_eval(str(dataset), checkpoint, on_progress=_crash_after(2))
+        except Crash:
+            pass
+        assert assistant.run_checkpointed_eval(str(dataset), checkpoint, resume=True)["executed"] == 4
+        assert assistant.run_checkpointed_eval(str(dataset), checkpoint)["executed"] == 6
+
+
+def test_truncated_line_and_failed_cases_are_rerun():
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "run.jsonl")
+        ok = {"passed": True, "score": 4.0, "result": {"evaluation": {"overall": 4.0}}}
+        failed = {"passed": False, "score": 0.0, "result": {"error": True, "evaluation": {"error": "timeout"}}}
+        with RunCheckpoint(path, config="cfg") as checkpoint:
+            checkpoint.append(ok, "a")
+            checkpoint.append(failed, "b")
+        with open(path, "a") as f:
+            f.write('{"key": "c", "passed": tr')   # killed mid-write
+
+        with RunCheckpoint(path, config="cfg", resume=True) as checkpoint:
+            assert set(checkpoint.completed) == {"a"} and checkpoint.failed == {"b"}
+            checkpoint.append(ok, "c")
+        with RunCheckpoint(path, config="cfg", resume=True) as checkpoint:
+            assert set(checkpoint.completed) == {"a", "c"}
+
+        try:
+            RunCheckpoint(path, config="other", resume=True)
+        except CheckpointMismatch:
+            pass
+        else:
+            raise AssertionError("resume with a different config was accepted")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Checkpoint Tests")
+    print("=" * 60)
+
+    tests = [
+        test_async_run_resumes_after_crash,
+        test_sync_run_resumes_and_new_run_starts_over,
+        test_truncated_line_and_failed_cases_are_rerun,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
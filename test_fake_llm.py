@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the deterministic fake chat model.
+Checks that it drops in for ChatOpenAI (judge, batch judge, streaming,
+registry selection), is reproducible by seed, and injects the same error
+types the OpenAI client raises.
+
+Run directly or with pytest:
+  python test_fake_llm.py
+"""
+
+import asyncio
+import os
+
+import openai
+from langchain_core.messages import HumanMessage
+
+from eval_system import LLMJudge
+from fake_llm import FakeChatModel
+from score_exporter import ScoreExporter
+
+
+def make_fake(**kwargs) -> FakeChatModel:
+    return FakeChatModel(**{"latency_ms": 0, "latency_distribution": "fixed", **kwargs})
+
+
+def test_answers_are_deterministic():
+    first = make_fake().invoke([HumanMessage(content="Query: What is RAG?")])
+    second = make_fake(seed=99).invoke([HumanMessage(content="Query: What is RAG?")])
+    assert first.content == second.content
+    assert "What is RAG?" in first.content
+    assert first.usage_metadata["input_tokens"] > 0
+
+
+def test_judge_single_and_batch_agree():
+    judge = LLMJudge(llm=make_fake(), exporter=ScoreExporter())
+    items = [{"query": f"q{i}", "response": f"answer {i}"} for i in range(5)]
+    single = [judge.evaluate(item["query"], item["response"]) for item in items]
+    batched = judge.evaluate_batch(items, batch_size=5)
+    assert all(result["scores"] for result in single)
+    assert [r["scores"] for r in single] == [r["scores"] for r in batched]
+    assert judge.stats()["parse_failures"] == 0
+
+
+def test_streaming_yields_the_full_answer():
+    fake = make_fake(tokens_per_second=1000)
+    messages = [HumanMessage(content="Query: streaming")]
+    chunks = list(fake.stream(messages))
+    assert len(chunks) > 10
+    assert "".join(chunk.content for chunk in chunks) == fake.invoke(messages).content
+
+
+def test_latency_distribution_is_seeded():
+    samples_a = [make_fake(latency_ms=100, latency_distribution="lognormal", seed=3).sample_latency() for _ in range(3)]
+    fake = make_fake(latency_ms=100, latency_distribution="lognormal", seed=3)
+    samples_b = [fake.sample_latency() for _ in range(200)]
+    assert samples_a[0] == samples_b[0]
+    assert max(samples_b) > 2 * sorted(samples_b)[100], "lognormal should have a long tail"
+
+
+def test_error_injection_uses_openai_exceptions():
+    rate_limited = make_fake(error_rate=1.0)
+    try:
+        rate_limited.invoke("hi")
+        assert False, "expected RateLimitError"
+    except openai.RateLimitError as e:
+        assert e.status_code == 429 and e.response.headers["retry-after"] == "1"
+
+    timing_out = make_fake(timeout_rate=1.0, timeout_ms=0)
+    try:
+        asyncio.run(timing_out.ainvoke("hi"))
+        assert False, "expected APITimeoutError"
+    except openai.APITimeoutError:
+        pass
+
+
+def test_registry_selects_fake_backend():
+    from llm_clients import ClientRegistry
+
+    previous = os.environ.get("LLM_BACKEND")
+    os.environ["LLM_BACKEND"] = "fake"
+    try:
+        registry = ClientRegistry()
+        model = registry.chat_model("gpt-4o-mini")
+        assert isinstance(model, FakeChatModel)
+        assert model is registry.chat_model("gpt-4o-mini")
+    finally:
+        if previous is None:
+            os.environ.pop("LLM_BACKEND")
+        else:
+            os.environ["LLM_BACKEND"] = previous
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Fake Chat Model Tests")
+    print("=" * 60)
+
+    tests = [
+        test_answers_are_deterministic,
+        test_judge_single_and_batch_agree,
+        test_streaming_yields_the_full_answer,
+        test_latency_distribution_is_seeded,
+        test_error_injection_uses_openai_exceptions,
+        test_registry_selects_fake_backend,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for GoldenDataset: JSON and JSONL loading, sharding (including shards
+of shards), streaming, and the id/category indexes.
+
+Run directly or with pytest:
+  python test_golden_dataset.py
+"""
+
+import json
+import os
+import tempfile
+
+from eval_system import GoldenDataset
+
+
+def _cases(count: int):
+    return [{"id": f"case_{i:02d}", "category": "even" if i % 2 == 0 else "odd", "query": f"q{i}"} for i in range(count)]
+
+
+def _write_json(directory: str, cases) -> str:
+    path = os.path.join(directory, "golden.json")
+    with open(path, "w") as f:
+        json.dump({"name": "sample", "version": "2.0.0", "test_cases": cases}, f)
+    return path
+
+
+def _write_jsonl(directory: str, lines) -> str:
+    path = os.path.join(directory, "golden.jsonl")
+    with open(path, "w") as f:
+        for line in lines:
+            f.write((line if isinstance(line, str) else json.dumps(line)) + "\n")
+    return path
+
+
+def _ids(dataset: GoldenDataset):
+    return [case["id"] for case in dataset.iter_cases()]
+
+
+def test_shards_partition_the_dataset():
+    cases = _cases(10)
+    with tempfile.TemporaryDirectory() as directory:
+        for path in (_write_json(directory, cases), _write_jsonl(directory, cases)):
+            dataset = GoldenDataset(path)
+            shards = [_ids(dataset.shard(i, 3)) for i in range(3)]
+            assert shards[0] == ["case_00", "case_03", "case_06", "case_09"], (path, shards[0])
+            assert sorted(sum(shards, [])) == _ids(dataset), "shards overlap or miss cases"
+
+
+def test_shard_of_a_shard():
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = GoldenDataset(_write_jsonl(directory, _cases(10)))
+        nested = dataset.shard(1, 2).shard(0, 2)
+        assert (nested.shard_index, nested.num_shards) == (1, 4)
+        assert _ids(nested) == ["case_01", "case_05", "case_09"]
+        assert len(nested.get_all_cases()) == 3
+
+
+def test_invalid_shard_is_rejected():
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write_jsonl(directory, _cases(2))
+        for index, count in ((2, 2), (-1, 2), (0, 0)):
+            try:
+                GoldenDataset(path, shard_index=index, num_shards=count)
+            except ValueError:
+                continue
+            raise AssertionError(f"shard {index}/{count} accepted")
+
+
+def test_jsonl_header_and_streaming():
+    lines = [{"_meta": {"name": "streamed", "version": "3.1.0"}}, *_cases(4)]
+    lines.insert(3, "")
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = GoldenDataset(_write_jsonl(directory, lines))
+        assert (dataset.name, dataset.version) == ("streamed", "3.1.0")
+        assert _ids(dataset) == ["case_00", "case_01", "case_02", "case_03"]
+        assert dataset._cases is None, "iter_cases must not materialize a JSONL dataset"
+
+        # Without a header the first line is a case; only this shard's lines are parsed
+        path = _write_jsonl(directory, [_cases(1)[0], "{not json", _cases(3)[2]])
+        shard = GoldenDataset(path, shard_index=0, num_shards=2)
+        assert shard.name == "unknown"
+        assert _ids(shard) == ["case_00", "case_02"]
+
+
+def test_indexes():
+    cases = _cases(5) + [{"id": "case_01", "category": "dup", "query": "later"}, {"category": "odd", "query": "no id"}]
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = GoldenDataset(_write_json(directory, cases))
+        assert dataset.get_test_case("case_01")["query"] == "q1", "first case with an id wins"
+        assert dataset.get_test_case("missing") is None
+        assert [case["query"] for case in dataset.get_cases_by_category("odd")] == ["q1", "q3", "no id"]
+        assert dataset.get_cases_by_category("none") == []
+
+        # Indexes follow the shard
+        shard = dataset.shard(1, 2)
+        assert shard.get_test_case("case_00") is None and shard.get_test_case("case_01") is not None
+        assert [case["id"] for case in shard.get_cases_by_category("dup")] == ["case_01"]
+
+
+def test_write_jsonl_roundtrip():
+    with tempfile.TemporaryDirectory() as directory:
+        original = GoldenDataset(_write_json(directory, _cases(6)))
+        jsonl_path = os.path.join(directory, "converted.jsonl")
+        original.write_jsonl(jsonl_path)
+        converted = GoldenDataset(jsonl_path)
+        assert (converted.name, converted.version) == ("sample", "2.0.0")
+        assert converted.get_all_cases() == original.get_all_cases()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Golden Dataset Tests")
+    print("=" * 60)
+
+    tests = [
+        test_shards_partition_the_dataset,
+        test_shard_of_a_shard,
+        test_invalid_shard_is_rejected,
+        test_jsonl_header_and_streaming,
+        test_indexes,
+        test_write_jsonl_roundtrip,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
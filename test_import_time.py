@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Import-time regression tests for eval_system (python -X importtime).
+
+Importing eval_system for RuleBasedValidator or GoldenDataset must not load
+LangChain, the OpenAI client, Langfuse or httpx; those load on the first judge
+call. Each check runs in a fresh interpreter so earlier imports can't hide a
+regression.
+
+Run directly or with pytest:
+  python test_import_time.py
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+# Loaded lazily by eval_system; importing it must not pull any of these in
+HEAVY_MODULES = ("langchain_openai", "langchain_core", "openai", "langfuse", "httpx")
+
+# Cumulative import time budget for eval_system. It was ~1.4s with eager
+# LangChain/OpenAI imports and is ~80ms without them; the slack absorbs slow CI.
+IMPORT_BUDGET_MS = 400.0
+
+
+def import_profile(statement: str, env: Dict[str, str] = None) -> Tuple[Dict[str, float], str]:
+    """
+    Run `statement` under python -X importtime in a fresh interpreter.
+    Returns ({module: cumulative ms}, stdout).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPO_ROOT,
+        env=env or _clean_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative) / 1000.0
+    return modules, result.stdout
+
+
+def _clean_env(**overrides: str) -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "LLM_BACKEND")}
+    env.update(overrides)
+    return env
+
+
+def test_eval_system_imports_no_heavy_dependencies():
+    modules, _ = import_profile("import eval_system")
+    loaded = sorted(m for m in modules if m.split(".")[0] in HEAVY_MODULES)
+    assert not loaded, f"eval_system imported {loaded[:5]}"
+
+
+def test_eval_system_import_time_budget():
+    # Best of three runs, to keep scheduler noise out of the measurement
+    best = min(import_profile("import eval_system")[0]["eval_system"] for _ in range(3))
+    assert best < IMPORT_BUDGET_MS, f"import eval_system took {best:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms)"
+
+
+def test_judge_builds_clients_on_first_use():
+    # No API key: constructing the judge and validating must still work, offline
+    statement = (
+        "import sys\n"
+        "from eval_system import LLMJudge, RuleBasedValidator\n"
+        "judge = LLMJudge()\n"
+        "answer = {'answer': 'Retrieval-augmented generation grounds answers in documents.', 'sources': ['doc1']}\n"
+        "assert RuleBasedValidator().validate_response(answer).valid\n"
+        "print('before', any(m.split('.')[0] in ('langchain_openai', 'langchain_core', 'langfuse') for m in sys.modules))\n"
+        "import os; os.environ['LLM_BACKEND'] = 'fake'\n"
+        "verdict = judge.evaluate('What is RAG?', 'Retrieval-augmented generation grounds answers in documents.')\n"
+        "print('after', 'langchain_core' in sys.modules, verdict['overall'] > 0)\n"
+    )
+    _, output = import_profile(statement)
+    assert "before False" in output, output
+    assert "after True True" in output, output
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Import Time Tests")
+    print("=" * 60)
+
+    tests = [
+        test_eval_system_imports_no_heavy_dependencies,
+        test_eval_system_import_time_budget,
+        test_judge_builds_clients_on_first_use,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    best = min(import_profile("import eval_system")[0]["eval_system"] for _ in range(3))
+    print(f"import eval_system: {best:.0f}ms")
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
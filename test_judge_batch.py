@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for batched judging: chunking by batch_size, re-sending only the items
+a batch reply dropped, halving a batch that failed to parse, and keeping
+verdicts matched to their items (sync and async, scripted judge model).
+
+Run directly or with pytest:
+  python test_judge_batch.py
+"""
+
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+from eval_system import LLMJudge
+from score_exporter import ScoreExporter
+
+
+def _score(response: str) -> int:
+    """Each response is "answer N"; its verdict scores N % 5 + 1 on every dimension."""
+    return int(response.split()[-1]) % 5 + 1
+
+
+def _verdict(response: str) -> dict:
+    score = _score(response)
+    return {
+        "scores": {"relevance": score, "accuracy": score, "completeness": score, "grounding": score},
+        "reasoning": response,
+        "overall": float(score),
+    }
+
+
+class ScriptedJudge:
+    """
+    Answers batch prompts through `reply(responses)`, which returns the item
+    numbers to include, "garbage" or raises. Single prompts always get a valid
+    verdict unless `single_garbage` is set. Records the size of every call.
+    """
+
+    def __init__(self, reply, single_garbage: bool = False):
+        self.reply = reply
+        self.single_garbage = single_garbage
+        self.calls = []
+
+    def invoke(self, messages):
+        responses = re.findall(r"Response to evaluate:\n(.*)", messages[-1].content)
+        self.calls.append(len(responses))
+        if "### Item" not in messages[-1].content:
+            text = "not json" if self.single_garbage else json.dumps(_verdict(responses[0]))
+            return SimpleNamespace(content=text, usage_metadata={})
+        included = self.reply(responses)
+        if included == "garbage":
+            return SimpleNamespace(content="I could not decide.", usage_metadata={})
+        evaluations = [{"id": str(i), **_verdict(responses[i - 1])} for i in included]
+        return SimpleNamespace(content=json.dumps({"evaluations": evaluations}), usage_metadata={"input_tokens": 1000})
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(0)
+        return self.invoke(messages)
+
+
+def _items(count: int):
+    return [{"query": f"q{i}", "response": f"answer {i}"} for i in range(count)]
+
+
+def _assert_matched(items, results):
+    assert len(results) == len(items)
+    for item, result in zip(items, results):
+        assert result["scores"]["relevance"] == _score(item["response"]), (item, result)
+
+
+def test_chunks_by_batch_size():
+    model = ScriptedJudge(lambda responses: range(1, len(responses) + 1))
+    judge = LLMJudge(llm=model, exporter=ScoreExporter())
+    items = _items(5)
+    results = judge.evaluate_batch(items, batch_size=2)
+    _assert_matched(items, results)
+    assert model.calls == [2, 2, 1]
+    assert judge.stats()["batch_requests"] == 2 and judge.stats()["requests_saved"] == 2
+
+
+def test_dropped_items_are_resent_together():
+    # The first reply skips items 2 and 4; only those two are sent again
+    model = ScriptedJudge(lambda responses: [1, 3] if len(responses) == 4 else range(1, len(responses) + 1))
+    judge = LLMJudge(llm=model, exporter=ScoreExporter())
+    items = _items(4)
+    results = judge.evaluate_batch(items, batch_size=4)
+    _assert_matched(items, results)
+    assert model.calls == [4, 2]
+    assert judge.stats()["unparsed_batch_items"] == 2 and judge.stats()["parse_failures"] == 0
+
+
+def test_unparseable_batch_is_split_in_half():
+    model = ScriptedJudge(lambda responses: "garbage" if len(responses) == 4 else range(1, len(responses) + 1))
+    judge = LLMJudge(llm=model, exporter=ScoreExporter())
+    items = _items(4)
+    results = judge.evaluate_batch(items, batch_size=4)
+    _assert_matched(items, results)
+    assert model.calls == [4, 2, 2]
+    assert judge.stats()["parse_failures"] == 1
+
+
+def test_splitting_terminates_when_nothing_parses():
+    model = ScriptedJudge(lambda responses: "garbage", single_garbage=True)
+    judge = LLMJudge(llm=model, exporter=ScoreExporter())
+    results = judge.evaluate_batch(_items(4), batch_size=4)
+    # 4 -> 2 -> 1 + 1, then the other half; every item ends as an unparsed verdict
+    assert model.calls == [4, 2, 1, 1, 2, 1, 1]
+    assert all(result["scores"] == {} and result["overall"] == 0.0 for result in results)
+
+
+def test_failed_call_is_not_split():
+    def reply(responses):
+        raise RuntimeError("judge unavailable")
+
+    model = ScriptedJudge(reply)
+    judge = LLMJudge(llm=model, exporter=ScoreExporter())
+    results = judge.evaluate_batch(_items(4), batch_size=4)
+    assert model.calls == [4]
+    assert all(result["error"] == "judge unavailable" for result in results)
+
+
+def test_async_split_and_retry_keep_order():
+    def reply(responses):
+        if len(responses) == 4:
+            return "garbage"
+        return [1] if len(responses) == 2 else range(1, len(responses) + 1)
+
+    model = ScriptedJudge(reply)
+    judge = LLMJudge(llm=model, exporter=ScoreExporter(), coalesce=False)
+    items = _items(8)
+    results = asyncio.run(judge.aevaluate_batch(items, batch_size=4, max_concurrency=2))
+    _assert_matched(items, results)
+    # Two batches of 4 fail, split into four pairs, each pair drops its second item
+    assert sorted(model.calls) == [1, 1, 1, 1, 2, 2, 2, 2, 4, 4]
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Batch Judge Tests")
+    print("=" * 60)
+
+    tests = [
+        test_chunks_by_batch_size,
+        test_dropped_items_are_resent_together,
+        test_unparseable_batch_is_split_in_half,
+        test_splitting_terminates_when_nothing_parses,
+        test_failed_call_is_not_split,
+        test_async_split_and_retry_keep_order,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
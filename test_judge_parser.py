@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for judge output parsing and structured-output mode.
+Uses a canned stand-in model, so no API key is needed.
+
+Run directly or with pytest:
+  python test_judge_parser.py
+"""
+
+import json
+from types import SimpleNamespace
+
+from eval_system import LLMJudge, extract_json
+from score_exporter import ScoreExporter
+
+VERDICT = {
+    "scores": {"relevance": 4, "accuracy": 5, "completeness": 3, "grounding": 4},
+    "reasoning": "Solid answer {with braces} in the reasoning.",
+    "overall": 4.0,
+}
+
+
+class CannedLLM:
+    """Returns the same text for every call and records bind() kwargs."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.bound = {}
+
+    def invoke(self, messages):
+        return SimpleNamespace(content=self.text, usage_metadata={})
+
+    def bind(self, **kwargs):
+        self.bound = kwargs
+        return self
+
+
+def make_judge(text: str, **kwargs) -> LLMJudge:
+    return LLMJudge(llm=CannedLLM(text), exporter=ScoreExporter(), **kwargs)
+
+
+def test_extract_json_tolerates_fences_and_trailing_text():
+    text = "Sure!\n```json\n" + json.dumps(VERDICT, indent=2) + "\n```\nHope this helps {:)}"
+    assert extract_json(text, "scores") == VERDICT
+
+
+def test_extract_json_skips_objects_without_required_key():
+    text = '{"note": {"scores": 1}} then ' + json.dumps(VERDICT)
+    assert extract_json(text, "scores") == VERDICT
+    assert extract_json("no json {here} at all", "scores") is None
+
+
+def test_nested_objects_keep_dimension_scores():
+    nested = dict(VERDICT, scores={"relevance": {"score": 4, "why": "on topic"}, "accuracy": 5}, overall=None)
+    result = make_judge(json.dumps(nested)).evaluate("q", "r")
+    assert result["scores"] == {"relevance": 4, "accuracy": 5}
+    assert result["overall"] == 4.5
+
+
+def test_parse_failures_are_counted():
+    judge = make_judge("I would rate this a solid four.")
+    result = judge.evaluate("q", "r")
+    assert result["scores"] == {}
+    stats = judge.stats()
+    assert stats["parse_failures"] == 1 and stats["parse_failure_rate"] == 1.0
+
+
+def test_batch_output_with_fence():
+    evaluations = [dict(VERDICT, id=str(i)) for i in (1, 2)]
+    judge = make_judge("```json\n" + json.dumps({"evaluations": evaluations}) + "\n```")
+    results = judge.evaluate_batch([{"query": "q1", "response": "r1"}, {"query": "q2", "response": "r2"}])
+    assert [r["overall"] for r in results] == [4.0, 4.0]
+    assert judge.stats()["unparsed_batch_items"] == 0
+
+
+def test_structured_output_requests_json_mode():
+    judge = make_judge(json.dumps(VERDICT), structured_output=True)
+    assert judge.llm.bound == {"response_format": {"type": "json_object"}}
+    assert judge.evaluate("q", "r")["scores"] == VERDICT["scores"]
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Judge Output Parsing Tests")
+    print("=" * 60)
+
+    tests = [
+        test_extract_json_tolerates_fences_and_trailing_text,
+        test_extract_json_skips_objects_without_required_key,
+        test_nested_objects_keep_dimension_scores,
+        test_parse_failures_are_counted,
+        test_batch_output_with_fence,
+        test_structured_output_requests_json_mode,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
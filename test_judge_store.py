@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the judge verdict store: content addressing, the memory, sqlite
+and jsondir backends, and verdict reuse in LLMJudge (offline, fake model).
+
+Run directly or with pytest:
+  python test_judge_store.py
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+from eval_system import LLMJudge
+from fake_llm import FakeChatModel
+from judge_store import JSONDirJudgeStore, MemoryJudgeStore, SQLiteJudgeStore, make_judge_store, verdict_key
+from score_exporter import ScoreExporter
+
+VERDICT = {"scores": {"relevance": 4, "accuracy": 5}, "reasoning": "Fine.", "overall": 4.5}
+BASE = ("rubric", "gpt-4o-mini", "What is RAG?", "Retrieval-augmented generation.", ["retrieval"], ["fine-tuning"])
+
+
+def make_judge(store, llm=None) -> LLMJudge:
+    return LLMJudge(llm=llm or FakeChatModel(latency_ms=0, latency_distribution="fixed"), store=store, exporter=ScoreExporter())
+
+
+def test_verdict_key_covers_every_input():
+    key = verdict_key(*BASE)
+    assert key == verdict_key(*BASE)
+    for position in range(len(BASE)):
+        changed = list(BASE)
+        changed[position] = ["other"] if isinstance(BASE[position], list) else "other"
+        assert verdict_key(*changed) != key, f"input {position} not part of the key"
+
+
+def _roundtrip(store, reopen):
+    key = verdict_key(*BASE)
+    assert store.get(key) is None
+    store.put(key, VERDICT)
+    store.put(key, VERDICT)
+    reopened = reopen()
+    assert reopened.get(key) == VERDICT
+    assert len(reopened) == 1
+
+
+def test_memory_store_copies_verdicts():
+    store = MemoryJudgeStore()
+    _roundtrip(store, lambda: store)
+    fetched = store.get(verdict_key(*BASE))
+    fetched["cached"] = True
+    assert "cached" not in store.get(verdict_key(*BASE)), "callers must not mutate stored verdicts"
+
+
+def test_sqlite_store_survives_reopen():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "verdicts.db")
+        _roundtrip(SQLiteJudgeStore(path), lambda: SQLiteJudgeStore(path))
+
+
+def test_jsondir_store_layout():
+    with tempfile.TemporaryDirectory() as directory:
+        _roundtrip(JSONDirJudgeStore(directory), lambda: JSONDirJudgeStore(directory))
+        key = verdict_key(*BASE)
+        assert (Path(directory) / key[:2] / f"{key}.json").exists()
+        assert not list(Path(directory).glob("*/*.tmp")), "temp files left behind"
+        # A truncated file reads as a miss, so the pair is re-judged
+        (Path(directory) / key[:2] / f"{key}.json").write_text('{"scores": ')
+        assert JSONDirJudgeStore(directory).get(key) is None
+
+
+def test_make_judge_store_specs():
+    with tempfile.TemporaryDirectory() as directory:
+        assert make_judge_store(None) is None and make_judge_store("none") is None
+        assert isinstance(make_judge_store("memory"), MemoryJudgeStore)
+        assert isinstance(make_judge_store(f"sqlite:{directory}/v.db"), SQLiteJudgeStore)
+        assert isinstance(make_judge_store(f"jsondir:{directory}/v"), JSONDirJudgeStore)
+        for spec in ("sqlite", "jsondir:", "redis:localhost"):
+            try:
+                make_judge_store(spec)
+            except ValueError:
+                continue
+            raise AssertionError(f"{spec!r} accepted")
+
+
+def test_judge_reuses_stored_verdicts():
+    with tempfile.TemporaryDirectory() as directory:
+        judge = make_judge(SQLiteJudgeStore(os.path.join(directory, "verdicts.db")))
+        first = judge.evaluate("What is RAG?", "Retrieval-augmented generation.", ["retrieval"])
+        again = judge.evaluate("What is RAG?", "Retrieval-augmented generation.", ["retrieval"])
+        judge.evaluate("What is RAG?", "A different answer.", ["retrieval"])
+
+        # A new judge on the same store (next run) only pays for new pairs
+        rerun = make_judge(SQLiteJudgeStore(os.path.join(directory, "verdicts.db")))
+        batched = rerun.evaluate_batch([
+            {"query": "What is RAG?", "response": "Retrieval-augmented generation.", "expected_topics": ["retrieval"]},
+            {"query": "What is RAG?", "response": "Something new."},
+        ])
+    assert judge.stats()["judge_calls"] == 2 and judge.stats()["reused_verdicts"] == 1
+    assert again["cached"] and again["scores"] == first["scores"]
+    assert rerun.stats()["reused_verdicts"] == 1 and rerun.stats()["judge_calls"] == 1
+    assert batched[0]["scores"] == first["scores"]
+
+
+def test_unparseable_verdicts_are_not_stored():
+    garbage = SimpleNamespace(invoke=lambda messages: SimpleNamespace(content="no json here", usage_metadata={}))
+    store = MemoryJudgeStore()
+    judge = make_judge(store, llm=garbage)
+    for _ in range(2):
+        judge.evaluate("What is RAG?", "Retrieval-augmented generation.")
+    assert len(store) == 0
+    assert judge.stats()["judge_calls"] == 2 and judge.stats()["reused_verdicts"] == 0
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Judge Store Tests")
+    print("=" * 60)
+
+    tests = [
+        test_verdict_key_covers_every_input,
+        test_memory_store_copies_verdicts,
+        test_sqlite_store_survives_reopen,
+        test_jsondir_store_layout,
+        test_make_judge_store_specs,
+        test_judge_reuses_stored_verdicts,
+        test_unparseable_verdicts_are_not_stored,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared LLM client registry (offline, local stub server).
+
+Run directly or with pytest:
+  python test_llm_clients.py
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_clients import ClientRegistry
+
+
+def _stub_server():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_async_client_survives_new_event_loops():
+    server, url = _stub_server()
+    try:
+        registry = ClientRegistry()
+        client = registry.async_http_client(url)
+
+        async def fetch(n: int):
+            return [(await client.get(url)).status_code for _ in range(n)]
+
+        # Each asyncio.run() is a new loop; the shared client must keep working
+        for _ in range(3):
+            assert asyncio.run(fetch(2)) == [200, 200]
+        stats = registry.stats()["async"][url]
+        assert stats["requests"] == 6
+        assert stats["connection_reuse"] == 3, "keep-alive reuse within a loop"
+        assert registry.async_http_client(url) is client
+    finally:
+        server.shutdown()
+
+
+def test_sync_pool_reuses_connections():
+    server, url = _stub_server()
+    try:
+        registry = ClientRegistry()
+        client = registry.http_client(url)
+        for _ in range(5):
+            assert client.get(url).status_code == 200
+        stats = registry.stats()["sync"][url]
+        assert stats["requests"] == 5 and stats["connections_opened"] == 1
+        registry.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LLM Client Registry Tests")
+    print("=" * 60)
+
+    tests = [
+        test_async_client_survives_new_event_loops,
+        test_sync_pool_reuses_connections,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-variant comparison runs.
+
+Run directly or with pytest:
+  python test_matrix_eval.py
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import llm_clients
+import research_assistant_with_eval as assistant
+from eval_system import LLMJudge
+from fake_llm import FakeChatModel
+from matrix_eval import SHORT_PROMPT, Variant, arun_matrix, format_table, load_variants, summarize_variant
+from score_exporter import ScoreExporter
+
+FAKE_ENV = {
+    "LLM_BACKEND": "fake",
+    "FAKE_LLM_LATENCY_MS": "1",
+    "FAKE_LLM_LATENCY_DISTRIBUTION": "fixed",
+    "LLM_RATE_LIMIT": "0",
+}
+
+
+def _record(score: float, generation_ms: float, passed: bool = True) -> dict:
+    return {
+        "score": score,
+        "passed": passed,
+        "validation_passed": True,
+        "result": {
+            "evaluation": {},
+            "metrics": {
+                "stages_ms": {"generation": generation_ms},
+                "tokens": {"generation": {"input": 1000, "output": 500}},
+            },
+        },
+    }
+
+
+@contextmanager
+def _fake_backend():
+    """
+    Serve every variant from the fake backend through a fresh client registry,
+    judge with a fake model, and restore the environment and the assistant's
+    globals afterwards so nothing leaks into other tests.
+    """
+    saved_env = {key: os.environ.get(key) for key in FAKE_ENV}
+    saved = {name: getattr(assistant, name) for name in ("judge", "response_cache")}
+    saved_registry = llm_clients._registry
+    os.environ.update(FAKE_ENV)
+    llm_clients._registry = llm_clients.ClientRegistry()
+    assistant.judge = LLMJudge(llm=FakeChatModel(latency_ms=1, latency_distribution="fixed"),
+                               exporter=ScoreExporter(), coalesce=False)
+    assistant.response_cache = None
+    try:
+        yield
+    finally:
+        llm_clients._registry = saved_registry
+        for name, value in saved.items():
+            setattr(assistant, name, value)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def test_load_variants_with_prompt_file():
+    with tempfile.TemporaryDirectory() as directory:
+        Path(directory, "prompt.txt").write_text("Be brief.\n\nQuery: {query}")
+        path = Path(directory, "variants.json")
+        path.write_text(json.dumps([
+            {"name": "inline", "model": "gpt-4o", "temperature": 0.3},
+            {"name": "from-file", "prompt_file": "prompt.txt"},
+        ]))
+        variants = load_variants(str(path))
+    assert [v.name for v in variants] == ["inline", "from-file"]
+    assert variants[0].model == "gpt-4o" and variants[0].temperature == 0.3
+    assert variants[1].prompt_template.startswith("Be brief.")
+
+
+def test_load_variants_rejects_template_without_query():
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory, "variants.json")
+        path.write_text(json.dumps([{"name": "bad", "prompt_template": "No placeholder"}]))
+        try:
+            load_variants(str(path))
+        except ValueError as e:
+            assert "{query}" in str(e)
+        else:
+            raise AssertionError("template without {query} was accepted")
+
+
+def test_summarize_variant():
+    judge_failed = _record(0.0, 200, passed=False)
+    judge_failed["result"]["evaluation"] = {"error": "judge timed out", "overall": 0.0}
+    records = [_record(4.0, 100), _record(3.0, 300, passed=False), judge_failed, {"score": 0, "passed": False,
+               "validation_passed": False, "result": {"error": "timeout"}}]
+    row = summarize_variant(Variant("v", model="gpt-4o-mini"), records)
+    assert row["cases"] == 4 and row["failed"] == 1 and row["judge_errors"] == 1
+    assert row["mean_score"] == 3.5, "a failed judge call must not count as a score"
+    assert row["pass_rate"] == 0.25
+    assert row["p50_latency_ms"] == 200 and row["p95_latency_ms"] == 300
+    # The unscored answer was still generated and paid for
+    case_cost = (1000 * 0.15 + 500 * 0.60) / 1_000_000
+    assert abs(row["cost_usd"] - 3 * case_cost) < 1e-12
+    assert abs(row["cost_per_1k_cases_usd"] - 1000 * case_cost) < 1e-12
+    assert "v" in format_table([row])
+
+
+def test_arun_matrix_end_to_end():
+    variants = [
+        Variant("baseline"),
+        Variant("short-prompt", prompt_template=SHORT_PROMPT, temperature=0.7),
+    ]
+    progress = []
+    env_before = {key: os.environ.get(key) for key in FAKE_ENV}
+    with tempfile.TemporaryDirectory() as directory, _fake_backend():
+        dataset = Path(directory, "cases.jsonl")
+        dataset.write_text("".join(
+            json.dumps({"id": f"case_{i}", "query": f"What is retrieval technique {i}?", "min_score": 1.0}) + "\n"
+            for i in range(5)
+        ))
+        results = asyncio.run(arun_matrix(
+            variants, str(dataset), concurrency=4,
+            on_progress=lambda name, done, total: progress.append((name, done, total))
+        ))
+    assert list(results) == ["baseline", "short-prompt"]
+    for name, records in results.items():
+        assert [record["test_id"] for record in records] == [f"case_{i}" for i in range(5)], name
+        assert all(record["passed"] and not record["result"].get("error") for record in records), name
+        assert (name, 5, 5) in progress
+    rows = [summarize_variant(variant, results[variant.name]) for variant in variants]
+    for row in rows:
+        assert row["cases"] == 5 and row["failed"] == 0 and row["pass_rate"] == 1.0, row
+        assert row["mean_score"] > 0 and row["avg_input_tokens"] > 0 and row["cost_usd"] > 0, row
+    # The short prompt sends fewer input tokens for the same cases
+    assert rows[1]["avg_input_tokens"] < rows[0]["avg_input_tokens"]
+    assert {key: os.environ.get(key) for key in FAKE_ENV} == env_before, "fake backend settings leaked"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Matrix Eval Tests")
+    print("=" * 60)
+
+    tests = [
+        test_load_variants_with_prompt_file,
+        test_load_variants_rejects_template_without_query,
+        test_summarize_variant,
+        test_arun_matrix_end_to_end,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process metrics registry and per-request stage metrics.
+
+Run directly or with pytest:
+  python test_metrics.py
+"""
+
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+from metrics import (
+    Histogram,
+    MetricsRegistry,
+    REGISTRY,
+    estimate_cost,
+    mark_process_dead,
+    record_llm_usage,
+    render_metrics,
+    request_metrics,
+    stage,
+    write_snapshot,
+)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    snap = histogram.snapshot()
+    assert [count for _, count in snap["buckets"]] == [1, 3, 4]
+    assert snap["count"] == 4 and abs(snap["sum"] - 6.05) < 1e-9
+    assert histogram.quantile(0.5) == 1.0
+
+
+def test_prometheus_exposition():
+    registry = MetricsRegistry()
+    registry.counter("demo_total", "Demo counter", kind='in"put').inc(3)
+    registry.histogram("demo_seconds", "Demo histogram", stage="x").observe(0.2)
+    text = registry.render_prometheus()
+    assert '# TYPE demo_total counter' in text
+    assert 'demo_total{kind="in\\"put"} 3' in text
+    assert 'demo_seconds_bucket{stage="x",le="+Inf"} 1' in text
+    assert 'demo_seconds_count{stage="x"} 1' in text
+
+
+def test_request_metrics_collect_stages_and_usage():
+    message = SimpleNamespace(
+        usage_metadata={"input_tokens": 1000, "output_tokens": 500},
+        response_metadata={"model_name": "gpt-4o-mini"},
+    )
+    with request_metrics() as request:
+        with stage("generation"):
+            pass
+        record_llm_usage("generation", message)
+    result = request.to_dict()
+    assert "generation" in result["stages_ms"]
+    assert result["tokens"]["generation"] == {"input": 1000, "output": 500}
+    assert abs(result["cost_usd"] - estimate_cost("gpt-4o-mini", 1000, 500)) < 1e-12
+    assert REGISTRY.histogram("llm_eval_stage_duration_seconds", stage="generation").snapshot()["count"] >= 1
+
+
+def test_request_metrics_are_isolated_per_task():
+    async def one_request(name: str):
+        with request_metrics() as request:
+            with stage(name):
+                await asyncio.sleep(0.01)
+        return request.to_dict()["stages_ms"]
+
+    async def main():
+        return await asyncio.gather(*(one_request(f"stage_{i}") for i in range(5)))
+
+    for i, stages in enumerate(asyncio.run(main())):
+        assert list(stages) == [f"stage_{i}"]
+
+
+def test_cost_estimates():
+    assert estimate_cost("fake-gpt-4o-mini", 1_000_000, 0) == estimate_cost("gpt-4o-mini", 1_000_000, 0) == 0.15
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 0, 1_000_000) == 0.60
+    assert estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_multiprocess_totals():
+    with tempfile.TemporaryDirectory() as directory:
+        for pid, requests in ((1001, 3), (1002, 4)):
+            worker = MetricsRegistry()
+            worker.counter("worker_requests_total", "Requests", route="/chat").inc(requests)
+            for _ in range(requests):
+                worker.histogram("worker_latency_seconds", "Latency").observe(0.02)
+            write_snapshot(directory, worker, pid=pid)
+
+        def totals() -> tuple:
+            text = render_metrics(directory)
+            assert text.count("# TYPE worker_requests_total counter") == 1
+            return ('worker_requests_total{route="/chat"} 7' in text, "worker_latency_seconds_count 7" in text)
+
+        assert totals() == (True, True)
+        # A finished worker's counts move to the archive; totals never drop
+        mark_process_dead(1001, directory)
+        assert totals() == (True, True)
+        mark_process_dead(1002, directory)
+        assert totals() == (True, True)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Metrics Tests")
+    print("=" * 60)
+
+    tests = [
+        test_histogram_buckets_are_cumulative,
+        test_prometheus_exposition,
+        test_request_metrics_collect_stages_and_usage,
+        test_request_metrics_are_isolated_per_task,
+        test_cost_estimates,
+        test_multiprocess_totals,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for sampled online evaluation.
+
+Run directly or with pytest:
+  python test_online_eval.py
+"""
+
+import asyncio
+
+from metrics import request_metrics
+from online_eval import OnlineEvalSampler, OnlineEvaluator
+
+GOOD_ANSWER = "Retrieval augmented generation grounds answers in retrieved documents."
+
+
+class RecordingExporter:
+    def __init__(self):
+        self.scores = []
+
+    def submit(self, trace_id, name, value, comment=""):
+        self.scores.append((trace_id, name, value))
+        return True
+
+
+class SlowJudge:
+    """Stands in for LLMJudge: same aevaluate signature, fixed verdict."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = []
+        self.exporter = RecordingExporter()
+
+    async def aevaluate(self, query, response, expected_topics=None, expected_not=None, trace_id=None):
+        await asyncio.sleep(self.delay)
+        self.calls.append((query, trace_id))
+        self.exporter.submit(trace_id, "llm_judge_overall", 4.0)
+        return {"scores": {"relevance": 4}, "overall": 4.0}
+
+
+def test_rate_sampling_fraction():
+    sampler = OnlineEvalSampler(rate=0.2, mode="rate", seed=1)
+    sampled = sum(1 for i in range(10_000) if sampler.decide(f"query {i}"))
+    assert 1800 < sampled < 2200
+
+
+def test_hash_sampling_is_stable_per_query():
+    sampler = OnlineEvalSampler(rate=0.3, mode="hash")
+    queries = [f"What is topic {i}?" for i in range(2000)]
+    first = [sampler.decide(q) for q in queries]
+    assert first == [sampler.decide(q) for q in queries]
+    assert sampler.decide("What is  TOPIC 7?") == sampler.decide("what is topic 7?")
+    assert 500 < sum(1 for reason in first if reason) < 700
+
+
+def test_validation_failures_always_sampled():
+    sampler = OnlineEvalSampler(rate=0.0, mode="rate")
+    assert sampler.decide("q", validation_passed=True) is None
+    assert sampler.decide("q", validation_passed=False) == "validation_failure"
+    assert OnlineEvalSampler(rate=0.0, always_on_validation_failure=False).decide("q", False) is None
+
+
+def test_submit_does_not_wait_for_judge():
+    judge = SlowJudge(delay=0.2)
+    evaluator = OnlineEvaluator(judge, OnlineEvalSampler(rate=1.0, mode="rate"), workers=2)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with request_metrics() as request:
+            reasons = [evaluator.submit(f"trace-{i}", f"query {i}", GOOD_ANSWER) for i in range(4)]
+        submit_seconds = loop.time() - start
+        await evaluator.stop(timeout=5)
+        return reasons, submit_seconds, request
+
+    reasons, submit_seconds, request = asyncio.run(main())
+    assert reasons == ["rate"] * 4
+    assert submit_seconds < 0.05
+    assert sorted(trace for _, trace in judge.calls) == [f"trace-{i}" for i in range(4)]
+    assert evaluator.stats()["judged"] == 4 and evaluator.stats()["mean_overall_score"] == 4.0
+    assert ("trace-0", "validation_passed", 1.0) in judge.exporter.scores
+    # Background judging is not billed to the request that submitted it
+    assert request.stages_ms == {}
+
+
+def test_failed_validation_is_judged_and_full_queue_drops():
+    judge = SlowJudge(delay=0.05)
+    evaluator = OnlineEvaluator(judge, OnlineEvalSampler(rate=0.0, mode="rate"), workers=1, max_queue=1)
+
+    async def main():
+        reasons = [
+            evaluator.submit("t1", "q1", "short"),       # too short -> validation failure
+            evaluator.submit("t2", "q2", GOOD_ANSWER),   # valid, rate 0 -> skipped
+            evaluator.submit("t3", "q3", "short"),
+            evaluator.submit("t4", "q4", "short"),       # queue full -> dropped
+        ]
+        await evaluator.stop(timeout=5)
+        return reasons
+
+    reasons = asyncio.run(main())
+    stats = evaluator.stats()
+    assert reasons[0] == "validation_failure" and reasons[1] is None
+    assert stats["dropped"] >= 1
+    assert stats["sampled_by_reason"] == {"validation_failure": stats["sampled"]}
+    assert ("t1", "validation_passed", 0.0) in judge.exporter.scores
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Online Evaluation Tests")
+    print("=" * 60)
+
+    tests = [
+        test_rate_sampling_fraction,
+        test_hash_sampling_is_stable_per_query,
+        test_validation_failures_always_sampled,
+        test_submit_does_not_wait_for_judge,
+        test_failed_validation_is_judged_and_full_queue_drops,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
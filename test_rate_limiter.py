@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Tests for the adaptive client-side rate limiter (offline).
+
+Run directly or with pytest:
+  python test_rate_limiter.py
+"""
+
+import asyncio
+import os
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage, HumanMessage
+
+from fake_llm import FakeChatModel
+from llm_clients import ClientRegistry
+from rate_limiter import AdaptiveRateLimiter, get_rate_limiter, parse_duration, rate_limit_enabled
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _rate_limit_error(retry_after: str = "0.05") -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, request=request, headers={"retry-after": retry_after})
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def _server_error() -> openai.InternalServerError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.InternalServerError("Server error", response=httpx.Response(500, request=request), body=None)
+
+
+class FlakyModel:
+    """Fails the first `failures` calls (with a 429 by default), then answers."""
+
+    def __init__(self, failures: int, error=_rate_limit_error):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def _answer(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error()
+        return AIMessage(
+            content="ok",
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+            response_metadata={"headers": {"x-ratelimit-limit-requests": "1000"}},
+        )
+
+    def invoke(self, messages):
+        return self._answer()
+
+    async def ainvoke(self, messages):
+        return self._answer()
+
+
+def test_parse_duration():
+    assert parse_duration("2") == 2.0 and parse_duration("0.5") == 0.5
+    assert parse_duration("20ms") == 0.02 and parse_duration("6m0s") == 360.0
+    assert abs(parse_duration("1m30.5s") - 90.5) < 1e-9
+    assert parse_duration(None) is None and parse_duration("soon") is None
+
+
+def test_requests_per_minute_bucket():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, tokens_per_minute=1_000_000, clock=clock)
+    for _ in range(60):
+        assert limiter._try_acquire(0, 10) == 0.0
+    # Bucket empty: the next request waits for one refill (1/s)
+    assert abs(limiter._try_acquire(0, 10) - 1.0) < 1e-9
+    clock.now += 1.0
+    assert limiter._try_acquire(0, 10) == 0.0
+
+
+def test_tokens_per_minute_bucket():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(requests_per_minute=1000, tokens_per_minute=6000, clock=clock)
+    assert limiter._try_acquire(0, 6000) == 0.0
+    assert abs(limiter._try_acquire(0, 100) - 1.0) < 1e-9      # 100 tokens at 100 tokens/s
+    # Real usage below the estimate is refunded
+    limiter.settle(6000, 5900)
+    assert limiter._try_acquire(0, 100) == 0.0
+
+
+def test_priorities_reserve_capacity_for_interactive():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, tokens_per_minute=1_000_000, clock=clock)
+    background, interactive = 2, 0
+    granted = 0
+    while limiter._try_acquire(background, 1) == 0.0:
+        granted += 1
+    # Background leaves 3 seconds of refill (3 requests at 1/s); interactive still gets them
+    assert granted == 57
+    for _ in range(3):
+        assert limiter._try_acquire(interactive, 1) == 0.0
+    assert limiter._try_acquire(interactive, 1) > 0
+
+    # A waiting interactive caller holds back lower classes even when capacity frees up
+    clock.now += 60
+    limiter._enter(interactive)
+    assert limiter._try_acquire(1, 1) > 0
+    limiter._leave(interactive, clock.now)
+    assert limiter._try_acquire(1, 1) == 0.0
+
+
+def test_aimd_and_headers():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, tokens_per_minute=100_000, clock=clock)
+    limiter.on_rate_limited(retry_after=2.0)
+    assert limiter.scale == 0.5 and limiter.stats()["effective_rpm"] == 300
+    assert abs(limiter._try_acquire(0, 1) - 1.0) < 1e-9          # paused (capped sleep)
+    # A burst of 429s from calls already in flight counts as one decrease
+    limiter.on_rate_limited(retry_after=2.0)
+    assert limiter.scale == 0.5
+    clock.now += 2.0
+    limiter.on_success()
+    assert abs(limiter.scale - 0.52) < 1e-9
+
+    limiter.observe_headers({
+        "x-ratelimit-limit-requests": "5000",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "3s",
+    })
+    assert limiter.limit_rpm == 5000
+    assert limiter.stats()["paused_for_seconds"] == 3.0
+
+
+def test_rate_limited_calls_are_retried():
+    # High limits and no reserve keep the post-429 waits short
+    limiter = AdaptiveRateLimiter(requests_per_minute=6000, tokens_per_minute=1_000_000, reserve_seconds=(0, 0, 0))
+    model = FlakyModel(failures=2)
+    response = asyncio.run(limiter.ainvoke(model, [HumanMessage(content="hello")], priority="background"))
+    assert response.content == "ok" and model.calls == 3
+    stats = limiter.stats()
+    assert stats["rate_limited"] == 2 and stats["retries"] == 2 and limiter.limit_rpm == 1000
+
+    sync_model = FlakyModel(failures=1)
+    assert limiter.invoke(sync_model, [HumanMessage(content="hello")]).content == "ok"
+
+    # Out of retries: the 429 reaches the caller
+    stubborn = AdaptiveRateLimiter(requests_per_minute=6000, max_retries=1)
+    try:
+        stubborn.invoke(FlakyModel(failures=5), [HumanMessage(content="hello")])
+    except openai.RateLimitError:
+        pass
+    else:
+        raise AssertionError("429 was swallowed after max_retries")
+
+
+def test_transient_errors_retry_without_slowing_down():
+    limiter = AdaptiveRateLimiter(requests_per_minute=6000, reserve_seconds=(0, 0, 0))
+    model = FlakyModel(failures=1, error=_server_error)
+    assert limiter.invoke(model, [HumanMessage(content="hello")]).content == "ok"
+    stats = limiter.stats()
+    assert model.calls == 2 and stats["retries"] == 1
+    assert stats["rate_limited"] == 0 and limiter.scale == 1.0, "a 5xx is not a rate signal"
+
+    # Other errors (bad request, auth) are never retried
+    try:
+        limiter.invoke(FlakyModel(failures=1, error=lambda: ValueError("bad request")), [HumanMessage(content="hi")])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("non-transient error was retried")
+
+
+def _env(**values):
+    saved = {key: os.environ.get(key) for key in values}
+    for key, value in values.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    return saved
+
+
+def test_sdk_retries_off_while_limiter_owns_them():
+    saved = _env(LLM_BACKEND=None, LLM_RATE_LIMIT="1")
+    try:
+        limited = ClientRegistry().chat_model("gpt-4o-mini", api_key="sk-test")
+        os.environ["LLM_RATE_LIMIT"] = "0"
+        unlimited = ClientRegistry().chat_model("gpt-4o-mini", api_key="sk-test")
+    finally:
+        _env(**saved)
+    assert limited.max_retries == 0
+    assert unlimited.max_retries != 0, "without the limiter the SDK keeps its retries"
+
+
+def test_fake_models_skip_the_limiter_by_default():
+    fake = FakeChatModel(latency_ms=0, latency_distribution="fixed")
+    saved = _env(LLM_BACKEND=None, LLM_RATE_LIMIT=None)
+    try:
+        # Auto mode: a fake model is never throttled, even with the openai backend
+        auto = (rate_limit_enabled(fake), get_rate_limiter(fake), rate_limit_enabled(object()))
+        os.environ["LLM_RATE_LIMIT"] = "1"
+        forced = rate_limit_enabled(fake)
+    finally:
+        _env(**saved)
+    assert auto[:2] == (False, None), "auto mode throttled a FakeChatModel"
+    assert auto[2], "auto mode must still limit real models"
+    assert forced, "LLM_RATE_LIMIT=1 forces the limiter on"
+
+
+def test_workers_split_the_limits():
+    saved = os.environ.get("LLM_RATE_LIMIT_WORKERS")
+    os.environ["LLM_RATE_LIMIT_WORKERS"] = "4"
+    try:
+        limiter = AdaptiveRateLimiter.from_env()
+    finally:
+        if saved is None:
+            os.environ.pop("LLM_RATE_LIMIT_WORKERS")
+        else:
+            os.environ["LLM_RATE_LIMIT_WORKERS"] = saved
+    assert limiter.share == 0.25 and limiter.limit_rpm == 500 * 0.25
+    # Server-reported limits are for the whole API key
+    limiter.observe_headers({"x-ratelimit-limit-requests": "10000"})
+    assert limiter.limit_rpm == 2500
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Rate Limiter Tests")
+    print("=" * 60)
+
+    tests = [
+        test_parse_duration,
+        test_requests_per_minute_bucket,
+        test_tokens_per_minute_bucket,
+        test_priorities_reserve_capacity_for_interactive,
+        test_aimd_and_headers,
+        test_rate_limited_calls_are_retried,
+        test_transient_errors_retry_without_slowing_down,
+        test_sdk_retries_off_while_limiter_owns_them,
+        test_fake_models_skip_the_limiter_by_default,
+        test_workers_split_the_limits,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
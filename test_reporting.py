@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for the Parquet results store and aggregate reports.
+
+Run directly or with pytest:
+  python test_reporting.py
+"""
+
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from reporting import category_breakdown, diff_summary, pass_rates, run_diff, run_summary, score_distribution
+from checkpoint import RunCheckpoint
+from results_store import ResultsStore, checkpoint_records, record_to_row
+
+
+def _record(test_id: str, score: float, category: str = "basic", error: bool = False) -> dict:
+    return {
+        "test_id": test_id,
+        "category": category,
+        "query": f"query {test_id}",
+        "passed": score >= 3.0,
+        "validation_passed": True,
+        "score": score,
+        "min_score": 3.0,
+        "result": {
+            "answer": "...",
+            "error": error,
+            "evaluation": {"scores": {"relevance": 5, "accuracy": {"score": 4}}, "overall": score},
+            "metrics": {
+                "total_ms": 120.0,
+                "stages_ms": {"generation": 100.0, "judge_call": 15.0},
+                "tokens": {"generation": {"input": 50, "output": 200}, "judge": {"input": 300, "output": 60}},
+                "cost_usd": 0.0002,
+            },
+        },
+    }
+
+
+def _frame(runs: dict) -> pd.DataFrame:
+    now = datetime.now(timezone.utc)
+    return pd.DataFrame([record_to_row(r, run_id, now) for run_id, records in runs.items() for r in records])
+
+
+def test_record_to_row_flattens_scores_latency_and_tokens():
+    row = record_to_row(_record("a", 4.5), "run1", datetime.now(timezone.utc))
+    assert row["score_relevance"] == 5.0 and row["score_accuracy"] == 4.0 and row["score_grounding"] is None
+    assert row["generation_ms"] == 100.0 and row["judge_ms"] == 15.0
+    assert row["generation_output_tokens"] == 200 and row["judge_input_tokens"] == 300
+    assert row["category"] == "basic" and row["passed"] and not row["error"]
+
+
+def test_store_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultsStore(directory)
+        first = store.write_run((_record(f"c{i}", i % 5) for i in range(25)), batch_size=10)
+        second = store.write_run([_record("c0", 4.0)])
+        assert first != second and store.list_runs() == sorted([first, second])
+        df = store.read()
+        assert len(df) == 26 and set(df["run_id"]) == {first, second}
+        only = store.read([second], columns=["test_id", "score"])
+        assert list(only.columns) == ["test_id", "score"] and only["score"].tolist() == [4.0]
+
+
+def test_aggregates():
+    df = _frame({
+        "r1": [_record("a", 4.0, "basic"), _record("b", 2.0, "basic"), _record("c", 5.0, "safety", error=True)],
+    })
+    summary = run_summary(df).loc["r1"]
+    assert summary["cases"] == 3 and abs(summary["pass_rate"] - 2 / 3) < 1e-9
+    assert abs(summary["error_rate"] - 1 / 3) < 1e-9 and summary["score_relevance"] == 5.0
+    by_category = category_breakdown(df, "r1")
+    assert by_category.loc["basic", "pass_rate"] == 0.5 and by_category.loc["safety", "cases"] == 1
+    assert pass_rates(df).loc["r1", "validation_passed"] == 1.0
+    assert score_distribution(df).loc["r1"].sum() == 3
+
+
+def test_run_diff_statuses():
+    df = _frame({
+        "old": [_record("a", 4.0), _record("b", 2.0), _record("c", 4.0), _record("gone", 4.0)],
+        "new": [_record("b", 4.5), _record("a", 1.0), _record("c", 4.5), _record("added", 3.0)],
+    })
+    diff = run_diff(df, "old", "new").set_index("test_id")
+    assert diff.loc["a", "status"] == "regressed" and diff.loc["a", "score_delta"] == -3.0
+    assert diff.loc["b", "status"] == "fixed"
+    assert diff.loc["c", "status"] == "unchanged"
+    assert diff.loc["gone", "status"] == "removed" and pd.isna(diff.loc["gone", "passed_current"])
+    assert diff.loc["added", "status"] == "new"
+    counts = diff_summary(run_diff(df, "old", "new"))
+    assert counts["regressed"] == 1 and counts["new"] == 1 and counts["removed"] == 1
+
+    # Identical case order takes the positional fast path; results must match
+    same = _frame({"old": [_record("a", 4.0), _record("b", 2.0)], "new": [_record("a", 2.0), _record("b", 4.0)]})
+    statuses = run_diff(same, "old", "new").set_index("test_id")["status"]
+    assert statuses.to_dict() == {"a": "regressed", "b": "fixed"}
+
+
+def test_run_diff_keeps_cases_without_test_id():
+    df = _frame({
+        "old": [_record("a", 4.0), _record(None, 4.0)],
+        "new": [_record("a", 4.0), _record("b", 4.0), _record(None, 2.0), _record(None, 4.0)],
+    })
+    diff = run_diff(df, "old", "new")
+    assert len(diff) == 5, diff
+    assert diff.loc[diff["test_id"] == "b", "status"].tolist() == ["new"]
+    unnamed = diff[diff["test_id"].isna()]["status"].value_counts()
+    assert unnamed["removed"] == 1 and unnamed["new"] == 2
+
+
+def test_run_diff_uses_last_row_of_a_repeated_case():
+    df = _frame({
+        "old": [_record("a", 4.0), _record("b", 4.0), _record("a", 1.0)],
+        "new": [_record("a", 4.0), _record("b", 1.0), _record("b", 4.5)],
+    })
+    diff = run_diff(df, "old", "new").set_index("test_id")
+    assert len(diff) == 2, diff
+    assert diff.loc["a", "status"] == "fixed" and diff.loc["a", "score_baseline"] == 1.0
+    assert diff.loc["b", "status"] == "unchanged" and diff.loc["b", "score_current"] == 4.5
+
+    # Same order in both runs (the positional fast path): still one row per case
+    retried = _frame({"old": [_record("a", 1.0), _record("a", 4.0)], "new": [_record("a", 4.0), _record("a", 1.0)]})
+    diff = run_diff(retried, "old", "new")
+    assert diff["status"].tolist() == ["regressed"], diff
+
+
+def test_checkpoint_records_only_reads_the_file():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "run.jsonl")
+        with RunCheckpoint(path, config="cfg") as checkpoint:
+            checkpoint.append(_record("a", 1.0, error=True), key="a")
+            checkpoint.append(_record("b", 4.0), key="b")
+            checkpoint.append(_record("a", 4.0), key="a")
+        # A run killed mid-write leaves a partial last line
+        with open(path, "a") as f:
+            f.write('{"key": "c", "test_id": "c", "sco')
+        with open(path, "rb") as f:
+            before = f.read()
+
+        records = list(checkpoint_records(path))
+        assert [(r["test_id"], r["score"]) for r in records] == [("b", 4.0), ("a", 4.0)]
+        with open(path, "rb") as f:
+            assert f.read() == before, "reading a checkpoint must not modify it"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Results Store & Reporting Tests")
+    print("=" * 60)
+
+    tests = [
+        test_record_to_row_flattens_scores_latency_and_tokens,
+        test_store_round_trip,
+        test_aggregates,
+        test_run_diff_statuses,
+        test_run_diff_keeps_cases_without_test_id,
+        test_run_diff_uses_last_row_of_a_repeated_case,
+        test_checkpoint_records_only_reads_the_file,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
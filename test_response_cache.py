@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the response cache: key normalization, LRU eviction, TTL expiry,
+the SQLite tier across restarts and promotion of slower-tier hits.
+
+Run directly or with pytest:
+  python test_response_cache.py
+"""
+
+import os
+import tempfile
+import time
+
+from response_cache import MemoryTier, ResponseCache, SQLiteTier, cache_from_env, make_cache_key
+
+
+def test_cache_key_normalizes_query_only():
+    key = make_cache_key("What is  RAG?", "gpt-4o-mini", 0.7, "Query: {query}")
+    assert key == make_cache_key("  what is rag? ", "gpt-4o-mini", 0.7, "Query: {query}")
+    assert key != make_cache_key("What is RAG?", "gpt-4o", 0.7, "Query: {query}")
+    assert key != make_cache_key("What is RAG?", "gpt-4o-mini", 0.0, "Query: {query}")
+    assert key != make_cache_key("What is RAG?", "gpt-4o-mini", 0.7, "Q: {query}")
+
+
+def test_lru_evicts_least_recently_used():
+    tier = MemoryTier(max_entries=2, ttl_seconds=None)
+    tier.set("a", "A")
+    tier.set("b", "B")
+    assert tier.get("a") == "A"         # "b" is now least recently used
+    tier.set("c", "C")
+    assert tier.get("b") is None
+    assert tier.get("a") == "A" and tier.get("c") == "C"
+    assert len(tier) == 2 and tier.evictions == 1
+
+
+def test_ttl_expires_entries():
+    tier = MemoryTier(max_entries=10, ttl_seconds=0.05)
+    tier.set("a", "A")
+    assert tier.get("a") == "A"
+    time.sleep(0.1)
+    assert tier.get("a") is None
+    assert len(tier) == 0, "expired entry dropped on lookup"
+
+
+def test_sqlite_tier_survives_restart_and_expires():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+        SQLiteTier(path).set("a", {"answer": "A"})
+        SQLiteTier(path, ttl_seconds=0.05).set("b", "B")
+        reopened = SQLiteTier(path)
+        assert reopened.get("a") == {"answer": "A"}
+        time.sleep(0.1)
+        assert reopened.get("b") is None
+        assert len(reopened) == 1
+
+
+def test_slower_tier_hits_are_promoted():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+        ResponseCache([MemoryTier(), SQLiteTier(path)]).set("a", "A")
+
+        # A fresh process: empty memory tier, warm SQLite tier
+        memory = MemoryTier()
+        cache = ResponseCache([memory, SQLiteTier(path)])
+        assert cache.get("a") == "A" and cache.get("a") == "A"
+        assert cache.get("missing") is None
+        stats = cache.stats()
+    assert memory.get("a") == "A"
+    assert stats["tier_hits"] == {"memory": 1, "sqlite": 1}
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert abs(stats["hit_rate"] - 2 / 3) < 1e-9
+
+
+def test_cache_from_env():
+    keys = ("RESPONSE_CACHE_ENABLED", "RESPONSE_CACHE_MAX_ENTRIES", "RESPONSE_CACHE_SQLITE_PATH")
+    saved = {key: os.environ.pop(key, None) for key in keys}
+    try:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "0"
+        assert cache_from_env() is None
+        os.environ["RESPONSE_CACHE_ENABLED"] = "1"
+        os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "3"
+        cache = cache_from_env()
+        assert [tier.name for tier in cache.tiers] == ["memory"]
+        assert cache.tiers[0].max_entries == 3
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Response Cache Tests")
+    print("=" * 60)
+
+    tests = [
+        test_cache_key_normalizes_query_only,
+        test_lru_evicts_least_recently_used,
+        test_ttl_expires_entries,
+        test_sqlite_tier_survives_restart_and_expires,
+        test_slower_tier_hits_are_promoted,
+        test_cache_from_env,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental runs: fingerprints, when a stored record counts as
+fresh, and which cases a golden run re-executes after the dataset, model or
+judge changes (offline, counting model).
+
+Run directly or with pytest:
+  python test_run_manifest.py
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+from langchain_core.messages import AIMessage
+
+import research_assistant_with_eval as assistant
+from eval_system import GoldenDataset, LLMJudge
+from fake_llm import FakeChatModel
+from run_manifest import RunManifest, case_fingerprint
+from score_exporter import ScoreExporter
+
+CASE = {"id": "case_00", "query": "What is RAG?", "expected_topics": ["retrieval"]}
+RECORD = {"test_id": "case_00", "passed": True, "result": {"evaluation": {"overall": 4.0}}}
+
+
+class CountingModel:
+    """Answers every prompt and records which queries were executed."""
+
+    def __init__(self, model_name: str = "counting", temperature: float = 0.0):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.queries = []
+
+    async def ainvoke(self, messages):
+        query = messages[-1].content.split("Query: ", 1)[1].split("\n", 1)[0]
+        self.queries.append(query)
+        return AIMessage(content=f"Retrieval-augmented generation answers {query} from documents.")
+
+
+@contextmanager
+def _offline(model: CountingModel, judge_model: str = "judge-a"):
+    saved = {name: getattr(assistant, name) for name in ("llm", "judge", "response_cache")}
+    saved_env = os.environ.get("LLM_RATE_LIMIT")
+    judge_llm = FakeChatModel(latency_ms=0, latency_distribution="fixed")
+    judge_llm.model_name = judge_model
+    assistant.llm = model
+    assistant.judge = LLMJudge(llm=judge_llm, exporter=ScoreExporter(), coalesce=False)
+    assistant.response_cache = None
+    os.environ["LLM_RATE_LIMIT"] = "0"
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(assistant, name, value)
+        if saved_env is None:
+            os.environ.pop("LLM_RATE_LIMIT", None)
+        else:
+            os.environ["LLM_RATE_LIMIT"] = saved_env
+
+
+def _write_dataset(path: str, cases):
+    with open(path, "w") as f:
+        for case in cases:
+            f.write(json.dumps(case) + "\n")
+
+
+def _run(directory: str, model: CountingModel, dataset=None, judge_model: str = "judge-a"):
+    model.queries.clear()
+    with _offline(model, judge_model):
+        records = asyncio.run(assistant.arun_golden_dataset_eval(
+            dataset or os.path.join(directory, "cases.jsonl"),
+            concurrency=4,
+            manifest_path=os.path.join(directory, "manifest.json")
+        ))
+    return records, sorted(model.queries)
+
+
+def test_fingerprint_covers_every_input():
+    base = (CASE, "Query: {query}", "gpt-4o-mini@0.7", "rubric", "gpt-4o-mini")
+    key = case_fingerprint(*base)
+    assert key == case_fingerprint(dict(reversed(list(CASE.items()))), *base[1:]), "key order must not matter"
+    for position in range(1, len(base)):
+        changed = list(base)
+        changed[position] = "other"
+        assert case_fingerprint(*changed) != key, f"input {position} not part of the fingerprint"
+    assert case_fingerprint({**CASE, "expected_topics": ["rerank"]}, *base[1:]) != key
+
+
+def test_fresh_record_rules():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "manifest.json")
+        manifest = RunManifest(path)
+        manifest.update("case_00", "fp", RECORD)
+        manifest.update("case_01", "fp", {"result": {"evaluation": {"error": "timeout"}}})
+        manifest.update(None, "fp", RECORD)
+        manifest.save()
+        assert not os.path.exists(f"{path}.tmp")
+
+        reopened = RunManifest(path)
+        assert reopened.fresh_record("case_00", "fp") == RECORD
+        assert reopened.fresh_record("case_00", "changed") is None
+        assert reopened.fresh_record("case_01", "fp") is None, "failed runs are always retried"
+        assert reopened.fresh_record(None, "fp") is None and set(reopened.cases) == {"case_00", "case_01"}
+
+        reopened.prune(["case_01"])
+        assert set(reopened.cases) == {"case_01"}
+
+        # A manifest written by another format version is ignored, not misread
+        with open(path, "w") as f:
+            json.dump({"version": 0, "cases": {"case_00": {"fingerprint": "fp", "record": RECORD}}}, f)
+        assert RunManifest(path).fresh_record("case_00", "fp") is None
+
+
+def test_only_stale_cases_are_rerun():
+    cases = [{"id": f"case_{i}", "query": f"query {i}"} for i in range(4)]
+    model = CountingModel()
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_path = os.path.join(directory, "cases.jsonl")
+        _write_dataset(dataset_path, cases)
+        records, executed = _run(directory, model)
+        assert executed == ["query 0", "query 1", "query 2", "query 3"]
+        assert not any(record.get("reused") for record in records)
+
+        records, executed = _run(directory, model)
+        assert executed == [] and all(record["reused"] for record in records)
+        assert [record["test_id"] for record in records] == ["case_0", "case_1", "case_2", "case_3"]
+
+        # Editing a case, adding one and dropping one only runs the changed cases
+        cases[1]["expected_topics"] = ["retrieval"]
+        _write_dataset(dataset_path, cases[:3] + [{"id": "case_4", "query": "query 4"}])
+        records, executed = _run(directory, model)
+        assert executed == ["query 1", "query 4"]
+        assert [bool(record.get("reused")) for record in records] == [True, False, True, False]
+        assert set(RunManifest(os.path.join(directory, "manifest.json")).cases) == {"case_0", "case_1", "case_2", "case_4"}
+
+
+def test_model_or_judge_change_reruns_everything():
+    cases = [{"id": f"case_{i}", "query": f"query {i}"} for i in range(3)]
+    with tempfile.TemporaryDirectory() as directory:
+        _write_dataset(os.path.join(directory, "cases.jsonl"), cases)
+        _run(directory, CountingModel())
+        assert len(_run(directory, CountingModel(temperature=0.7))[1]) == 3
+        assert len(_run(directory, CountingModel(temperature=0.7), judge_model="judge-b")[1]) == 3
+        assert _run(directory, CountingModel(temperature=0.7), judge_model="judge-b")[1] == []
+
+
+def test_shard_runs_keep_other_shards():
+    cases = [{"id": f"case_{i}", "query": f"query {i}"} for i in range(4)]
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_path = os.path.join(directory, "cases.jsonl")
+        _write_dataset(dataset_path, cases)
+        for index in range(2):
+            _run(directory, CountingModel(), dataset=GoldenDataset(dataset_path, shard_index=index, num_shards=2))
+        assert len(RunManifest(os.path.join(directory, "manifest.json")).cases) == 4, "a shard pruned the others"
+        assert _run(directory, CountingModel())[1] == []
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Run Manifest Tests")
+    print("=" * 60)
+
+    tests = [
+        test_fingerprint_covers_every_input,
+        test_fresh_record_rules,
+        test_only_stale_cases_are_rerun,
+        test_model_or_judge_change_reruns_everything,
+        test_shard_runs_keep_other_shards,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the background score exporter: batching, flush, drop-on-full,
+shutdown draining and failure accounting (stub Langfuse client).
+
+Run directly or with pytest:
+  python test_score_exporter.py
+"""
+
+import threading
+import time
+
+from score_exporter import ScoreExporter
+
+
+class StubClient:
+    """Records scores; blocks inside score() until `release` is set, if given."""
+
+    def __init__(self, release: threading.Event = None):
+        self.release = release
+        self.entered = threading.Event()
+        self.scores = []
+        self.flushes = 0
+
+    def score(self, **score):
+        self.entered.set()
+        if self.release is not None:
+            self.release.wait(5)
+        self.scores.append(score)
+
+    def flush(self):
+        self.flushes += 1
+
+
+def _submit(exporter: ScoreExporter, count: int, start: int = 0):
+    return [exporter.submit(f"trace-{i}", "llm_judge_overall", float(i)) for i in range(start, start + count)]
+
+
+def test_batches_by_size_and_flush_waits():
+    client = StubClient()
+    exporter = ScoreExporter(client_factory=lambda: client, batch_size=3, flush_interval=0.05)
+    sizes = []
+    export_batch = exporter.export_batch
+    exporter.export_batch = lambda batch: sizes.append(len(batch)) or export_batch(batch)
+    assert all(_submit(exporter, 7))
+    assert exporter.flush(timeout=5)
+    assert [score["trace_id"] for score in client.scores] == [f"trace-{i}" for i in range(7)]
+    assert sum(sizes) == 7 and max(sizes) <= 3
+    assert client.flushes == 1
+    assert exporter.stats()["exported"] == 7 and exporter.stats()["queue_depth"] == 0
+    exporter.shutdown()
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    client = StubClient(release)
+    exporter = ScoreExporter(client_factory=lambda: client, max_queue=2, batch_size=1, flush_interval=0.01)
+    _submit(exporter, 1)
+    assert client.entered.wait(5), "worker never picked up the first score"
+
+    # The worker is stuck exporting; two scores fit in the queue, the rest are dropped at once
+    started = time.monotonic()
+    accepted = _submit(exporter, 4, start=1)
+    assert time.monotonic() - started < 0.5, "submit blocked on a full queue"
+    assert accepted == [True, True, False, False]
+    assert not exporter.flush(timeout=0.1), "flush reported success while scores were pending"
+
+    release.set()
+    assert exporter.flush(timeout=5)
+    stats = exporter.stats()
+    assert (stats["submitted"], stats["exported"], stats["dropped"]) == (3, 3, 2)
+    exporter.shutdown()
+
+
+def test_shutdown_drains_then_refuses():
+    client = StubClient()
+    # Neither batch size nor interval would trigger an export before shutdown
+    exporter = ScoreExporter(client_factory=lambda: client, batch_size=100, flush_interval=60)
+    _submit(exporter, 5)
+    exporter.shutdown()
+    assert len(client.scores) == 5 and client.flushes == 1
+    assert _submit(exporter, 1) == [False]
+    assert exporter.stats()["dropped"] == 1
+
+
+def test_client_failures_are_counted():
+    def broken_factory():
+        raise RuntimeError("no credentials")
+
+    exporter = ScoreExporter(client_factory=broken_factory, batch_size=2, flush_interval=0.01)
+    _submit(exporter, 3)
+    assert exporter.flush(timeout=5), "failed batches must still be marked done"
+    stats = exporter.stats()
+    assert (stats["exported"], stats["failed"]) == (0, 3)
+    exporter.shutdown()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Score Exporter Tests")
+    print("=" * 60)
+
+    tests = [
+        test_batches_by_size_and_flush_waits,
+        test_full_queue_drops_instead_of_blocking,
+        test_shutdown_drains_then_refuses,
+        test_client_failures_are_counted,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
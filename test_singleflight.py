@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight request coalescing.
+
+Run directly or with pytest:
+  python test_singleflight.py
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from eval_system import LLMJudge
+from fake_llm import FakeChatModel
+from singleflight import SingleFlight
+
+
+class RecordingExporter:
+    def __init__(self):
+        self.scores = []
+
+    def submit(self, trace_id, name, value, comment=""):
+        self.scores.append((trace_id, name, value))
+        return True
+
+
+def test_async_calls_share_one_execution():
+    flights = SingleFlight("test")
+    executions = []
+
+    async def work(key):
+        executions.append(key)
+        await asyncio.sleep(0.05)
+        return f"answer for {key}"
+
+    async def main():
+        return await asyncio.gather(
+            *(flights.ado(key, lambda key=key: work(key)) for key in ["a"] * 10 + ["b"] * 5)
+        )
+
+    results = asyncio.run(main())
+    assert sorted(executions) == ["a", "b"]
+    assert results == ["answer for a"] * 10 + ["answer for b"] * 5
+    assert flights.stats() == {"calls": 2, "coalesced": 13, "inflight": 0}
+
+
+def test_async_exception_reaches_every_caller_and_next_call_reruns():
+    flights = SingleFlight("test")
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        results = await asyncio.gather(*(flights.ado("k", failing) for _ in range(3)), return_exceptions=True)
+        await asyncio.gather(flights.ado("k", failing), return_exceptions=True)
+        return results
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(attempts) == 2
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flights = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.ado("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.ado("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_threads_share_one_execution():
+    flights = SingleFlight("test")
+    executions = []
+    started = threading.Event()
+
+    def work():
+        executions.append(1)
+        started.set()
+        time.sleep(0.1)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        first = pool.submit(flights.do, "k", work)
+        started.wait()
+        others = [pool.submit(flights.do, "k", work) for _ in range(7)]
+        results = [first.result()] + [f.result() for f in others]
+    assert results == [42] * 8
+    assert len(executions) == 1 and flights.coalesced == 7
+
+
+def test_judge_coalesces_identical_evaluations():
+    exporter = RecordingExporter()
+    judge = LLMJudge(llm=FakeChatModel(latency_ms=50), exporter=exporter)
+
+    async def main():
+        return await asyncio.gather(*(
+            judge.aevaluate("What is RAG?", "RAG retrieves documents.", trace_id=f"trace-{i}") for i in range(5)
+        ))
+
+    results = asyncio.run(main())
+    assert judge.judge_calls == 1 and judge.stats()["coalesced_calls"] == 4
+    assert all(r["overall"] == results[0]["overall"] for r in results)
+    # Every caller's trace gets the scores, not just the leader's
+    overall = {trace for trace, name, _ in exporter.scores if name == "llm_judge_overall"}
+    assert overall == {f"trace-{i}" for i in range(5)}
+
+    # Sync path, and no coalescing when disabled
+    solo = LLMJudge(llm=FakeChatModel(latency_ms=20), exporter=exporter, coalesce=False)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(lambda _: solo.evaluate("q", "a response"), range(3)))
+    assert solo.judge_calls == 3
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Single-Flight Tests")
+    print("=" * 60)
+
+    tests = [
+        test_async_calls_share_one_execution,
+        test_async_exception_reaches_every_caller_and_next_call_reruns,
+        test_cancelled_leader_does_not_cancel_followers,
+        test_threads_share_one_execution,
+        test_judge_coalesces_identical_evaluations,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
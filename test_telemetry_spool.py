@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+End-to-end test for the offline telemetry spool.
+A local stub of the Langfuse ingestion API is taken down while scores are
+produced: submitting must stay fast, everything lands in the spool, and once
+the stub is back the replayer ships every score exactly once. @observe traces
+take the same path once the SDK is pointed at the spool.
+
+Run directly or with pytest:
+  python test_telemetry_spool.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from score_exporter import ScoreExporter
+import telemetry_spool
+from telemetry_spool import SpoolReplayer, TelemetrySpool, generation_events, get_spool, reset_spool, score_event
+
+
+class StubLangfuse:
+    """Minimal /api/public/ingestion endpoint; returns 503 while `down`."""
+
+    def __init__(self):
+        self.down = False
+        self.events = []
+        self.posts = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.posts += 1
+                if stub.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                stub.events.extend(body["batch"])
+                payload = json.dumps({
+                    "successes": [{"id": event["id"], "status": 201} for event in body["batch"]],
+                    "errors": [],
+                }).encode()
+                self.send_response(207)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def test_segments_rotate_compress_and_cap():
+    with tempfile.TemporaryDirectory() as directory:
+        spool = TelemetrySpool(directory, segment_max_bytes=2000, max_total_bytes=3000)
+        for i in range(200):
+            spool.append([score_event(f"trace-{i}", "overall", 0.5)])
+        spool.seal()
+
+        segments = spool.sealed_segments()
+        assert segments and all(path.name.endswith(".jsonl.gz") for path in segments)
+        assert spool.dropped_segments > 0, "size cap should drop the oldest segments"
+        assert spool.stats()["spooled_bytes"] <= 3000
+        # Surviving segments are the newest ones and still readable
+        last = list(TelemetrySpool.read_segment(segments[-1]))[-1]
+        assert last["body"]["traceId"] == "trace-199"
+
+
+def test_outage_then_replay():
+    stub = StubLangfuse()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            spool = TelemetrySpool(directory, segment_max_bytes=16 * 1024)
+            exporter = ScoreExporter(spool=spool, batch_size=50, flush_interval=0.05)
+            replayer = SpoolReplayer(spool, host=stub.url, public_key="pk", secret_key="sk", batch_size=100)
+
+            # Outage: the request path must not slow down and nothing is lost
+            stub.down = True
+            latencies = []
+            for i in range(1000):
+                start = time.perf_counter()
+                assert exporter.submit(f"trace-{i}", "overall", i / 1000)
+                latencies.append(time.perf_counter() - start)
+            spool.append(generation_events("research_assistant_stream", input="q", output="a"))
+            assert exporter.flush()
+            assert sorted(latencies)[int(len(latencies) * 0.99)] < 0.01
+
+            result = replayer.replay()
+            assert result["segments"] == 0
+            assert spool.sealed_segments(), "segments must be kept while Langfuse is down"
+
+            # Recovery: everything ships, each event exactly once
+            stub.down = False
+            replayer.replay()
+            assert not spool.sealed_segments()
+            ids = [event["id"] for event in stub.events]
+            assert len(ids) == len(set(ids))
+            scores = {event["body"]["traceId"] for event in stub.events if event["type"] == "score-create"}
+            assert scores == {f"trace-{i}" for i in range(1000)}
+            assert any(event["type"] == "generation-create" for event in stub.events)
+
+            assert replayer.replay()["segments"] == 0
+            assert len(stub.events) == len(ids), "replaying an empty spool sends nothing"
+            exporter.shutdown()
+    finally:
+        stub.close()
+
+
+def test_idle_segment_is_sealed_by_timer():
+    with tempfile.TemporaryDirectory() as directory:
+        spool = TelemetrySpool(directory, segment_max_age=0.1)
+        spool.append([score_event("trace-idle", "overall", 1.0)])
+        deadline = time.monotonic() + 2.0
+        while not spool.sealed_segments() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert len(spool.sealed_segments()) == 1
+        spool.close()
+
+
+def _run_child(directory: str, code: str, **overrides: str):
+    env = dict(os.environ, TELEMETRY_SPOOL_DIR=directory, LANGFUSE_PUBLIC_KEY="", LANGFUSE_SECRET_KEY="")
+    env.update(overrides)
+    env.pop("TELEMETRY_SPOOL_REPLAY_INTERVAL", None)
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), env=env, check=True)
+
+
+def test_scores_survive_process_exit():
+    stub = StubLangfuse()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            # Clean exit: atexit flushes the exporter and seals the segment
+            _run_child(directory, "from score_exporter import get_score_exporter\n"
+                                  "get_score_exporter().submit('trace-exit', 'overall', 1.0)\n")
+            spool = TelemetrySpool(directory)
+            assert spool.stats()["sealed_segments"] == 1
+
+            # Crash: no atexit, the active segment is left behind and adopted by the replayer
+            _run_child(directory, "import os\n"
+                                  "from telemetry_spool import get_spool, score_event\n"
+                                  "get_spool().append([score_event('trace-crash', 'overall', 1.0)])\n"
+                                  "os._exit(0)\n")
+            assert len(spool.sealed_segments()) == 1, "crashed segment is still active"
+
+            result = SpoolReplayer(spool, host=stub.url, public_key="pk", secret_key="sk").replay()
+            assert result["segments"] == 2
+            traces = {event["body"]["traceId"] for event in stub.events}
+            assert traces == {"trace-exit", "trace-crash"}
+            assert not list(spool.directory.iterdir())
+    finally:
+        stub.close()
+
+
+def test_observe_traces_are_spooled():
+    stub = StubLangfuse()
+    stub.down = True
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            _run_child(directory, "from langfuse.decorators import langfuse_context, observe\n"
+                                  "from telemetry_spool import spool_langfuse_sdk\n"
+                                  "assert spool_langfuse_sdk()\n"
+                                  "@observe(name='traced-answer')\n"
+                                  "def answer(query):\n"
+                                  "    return 'Retrieval-augmented generation.'\n"
+                                  "answer('What is RAG?')\n"
+                                  "langfuse_context.flush()\n",
+                       LANGFUSE_PUBLIC_KEY="pk", LANGFUSE_SECRET_KEY="sk", LANGFUSE_HOST=stub.url)
+            assert stub.posts == 0, "traces were sent inline instead of spooled"
+
+            stub.down = False
+            SpoolReplayer(TelemetrySpool(directory), host=stub.url, public_key="pk", secret_key="sk").replay()
+            traces = [event["body"] for event in stub.events if event["type"] == "trace-create"]
+            assert [trace["name"] for trace in traces if "name" in trace] == ["traced-answer"], traces
+            assert any(trace.get("output") == "Retrieval-augmented generation." for trace in traces)
+    finally:
+        stub.close()
+
+
+def test_forked_worker_leaves_replay_to_parent():
+    with tempfile.TemporaryDirectory() as directory:
+        saved = {key: os.environ.get(key) for key in ("TELEMETRY_SPOOL_DIR", "TELEMETRY_SPOOL_REPLAY_INTERVAL")}
+        os.environ.update(TELEMETRY_SPOOL_DIR=directory, TELEMETRY_SPOOL_REPLAY_INTERVAL="3600")
+        try:
+            reset_spool(replay=False)           # what gunicorn's post_fork does
+            spool = get_spool()
+            assert spool is not None and telemetry_spool._replayer is None
+            reset_spool()
+            assert get_spool() is not spool and telemetry_spool._replayer is not None
+        finally:
+            if telemetry_spool._replayer is not None:
+                telemetry_spool._replayer.stop()
+            reset_spool()
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Telemetry Spool Outage Test")
+    print("=" * 60)
+
+    tests = [
+        test_segments_rotate_compress_and_cap,
+        test_outage_then_replay,
+        test_idle_segment_is_sealed_by_timer,
+        test_scores_survive_process_exit,
+        test_observe_traces_are_spooled,
+        test_forked_worker_leaves_replay_to_parent,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
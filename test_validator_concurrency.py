@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Stress test for RuleBasedValidator under concurrency.
+Checks that one shared validator gives the same results from 32 concurrent
+workers as it does serially (threads, thread-pool and process-pool fan-out).
+
+Run directly or with pytest:
+  python test_validator_concurrency.py
+"""
+
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from eval_system import RuleBasedValidator
+
+WORKERS = 32
+
+SNIPPETS = [
+    "Retrieval augmented generation grounds answers in documents.",
+    "Contact me at jane.doe@example.com for details.",
+    "Call 555-123-4567 to learn more.",
+    "This explains how to bypass the filter.",
+    "ok",
+    "LangGraph is a framework for stateful agent workflows.",
+]
+
+
+def make_responses(count: int, seed: int = 7) -> list:
+    """Deterministic mix of valid and invalid responses."""
+    rng = random.Random(seed)
+    responses = []
+    for _ in range(count):
+        answer = " ".join(rng.choices(SNIPPETS, k=rng.randint(1, 4)))
+        responses.append({"answer": answer, "sources": rng.choice([["doc-1"], [], "doc-1"])})
+    responses.extend([None, {}, {"answer": 42}])
+    return responses
+
+
+def test_shared_validator_threads():
+    """32 threads hammer one validator; every result must match the serial baseline."""
+    validator = RuleBasedValidator()
+    responses = make_responses(2000)
+    expected = [validator.validate_response(r) for r in responses]
+    mismatches = []
+    barrier = threading.Barrier(WORKERS)
+
+    def worker(offset: int):
+        barrier.wait()
+        for i in range(offset, len(responses), WORKERS):
+            if validator.validate_response(responses[i]) != expected[i]:
+                mismatches.append(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not mismatches, f"{len(mismatches)} results corrupted under concurrency"
+
+
+def test_shared_validator_thread_pool_callers():
+    """Many callers each running validate_many on the same validator at once."""
+    validator = RuleBasedValidator()
+    batches = [make_responses(200, seed=i) for i in range(WORKERS)]
+    expected = [[validator.validate_response(r) for r in batch] for batch in batches]
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        actual = list(pool.map(validator.validate_many, batches))
+
+    assert actual == expected
+
+
+def test_validate_many_thread_fan_out():
+    validator = RuleBasedValidator()
+    responses = make_responses(5000)
+    expected = [validator.validate_response(r) for r in responses]
+    assert validator.validate_many(responses, workers=WORKERS, chunk_size=100) == expected
+
+
+def test_validate_many_process_fan_out():
+    validator = RuleBasedValidator()
+    responses = make_responses(2000)
+    expected = [validator.validate_response(r) for r in responses]
+    actual = validator.validate_many(responses, workers=4, executor="process", chunk_size=250)
+    assert actual == expected
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"RuleBasedValidator Concurrency Stress Test ({WORKERS} workers)")
+    print("=" * 60)
+
+    tests = [
+        test_shared_validator_threads,
+        test_shared_validator_thread_pool_callers,
+        test_validate_many_thread_fan_out,
+        test_validate_many_process_fan_out,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")
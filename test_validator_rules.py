@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for RuleBasedValidator's precompiled rules: loading a custom JSON
+config, the combined banned-term pattern, and agreement with the original
+per-call checks on a mixed corpus.
+
+Run directly or with pytest:
+  python test_validator_rules.py
+"""
+
+import json
+import os
+import re
+import tempfile
+
+from eval_system import DEFAULT_VALIDATION_RULES, RuleBasedValidator
+from test_validator_concurrency import make_responses
+
+
+def _legacy_errors(response) -> list:
+    """The validator's checks as they were before compilation (one regex per call)."""
+    if not isinstance(response, dict):
+        return ["Response must be a dictionary"]
+    errors = []
+    if "answer" not in response:
+        errors.append("Missing 'answer' field")
+    elif not isinstance(response.get("answer"), str):
+        errors.append("'answer' field must be a string")
+    answer = response.get("answer", "")
+    if not isinstance(answer, str):
+        answer = ""
+    if len(answer) < 10:
+        errors.append("Response too short (minimum 10 characters)")
+    if len(answer) > 5000:
+        errors.append("Response too long (maximum 5000 characters)")
+    if "sources" in response:
+        sources = response.get("sources", [])
+        if not isinstance(sources, list):
+            errors.append("'sources' must be a list")
+        elif len(sources) == 0 and answer:
+            errors.append("No sources cited for response")
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    phone_pattern = r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
+    if re.search(email_pattern, answer) or re.search(phone_pattern, answer):
+        errors.append("Potential PII detected in response")
+    if any(word in answer.lower() for word in ["hack", "exploit", "bypass"]):
+        errors.append("Banned content detected")
+    return errors
+
+
+def _banned(validator: RuleBasedValidator, answer: str) -> bool:
+    return "Banned content detected" in validator.validate_response({"answer": answer}).errors
+
+
+def test_from_config_overrides_defaults():
+    config = {"min_length": 3, "banned_terms": ["c++", "drop table"], "pii_patterns": {"ssn": r"\b\d{3}-\d{2}-\d{4}\b"}}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rules.json")
+        with open(path, "w") as f:
+            json.dump(config, f)
+        validator = RuleBasedValidator.from_config(path)
+
+    # Keys missing from the file keep their defaults
+    assert validator.max_length == DEFAULT_VALIDATION_RULES["max_length"]
+    assert validator.validate_response({"answer": "Fine"}).valid, "min_length not taken from the config"
+    assert _banned(validator, "Please DROP TABLE users.")
+    assert _banned(validator, "Written in C++ for speed."), "terms must be matched literally"
+    assert not _banned(validator, "How to bypass a cache."), "custom terms replace the defaults"
+    assert validator.validate_response({"answer": "SSN 123-45-6789 leaked"}).errors == ("Potential PII detected in response",)
+    assert validator.validate_response({"answer": "Mail a@b.io now"}).valid, "custom PII patterns replace the defaults"
+
+
+def test_banned_terms_are_case_insensitive_substrings():
+    validator = RuleBasedValidator()
+    for answer in ("How to HACK a router.", "Exploitation of the bug.", "The ByPass valve is open.", "Lifehacks for tracing."):
+        assert _banned(validator, answer), answer
+    # No word boundaries, as before: a term inside a longer word still matches
+    assert _banned(validator, "A shacking-up story.")
+    assert not _banned(validator, "Retrieval grounds the answer in documents.")
+    # Longest term first, so an overlapping pair still matches either way
+    overlapping = RuleBasedValidator({"banned_terms": ["pass", "bypass"]})
+    assert overlapping._banned_re.pattern.startswith("bypass")
+    assert _banned(overlapping, "bypass") and _banned(overlapping, "passing")
+
+
+def test_empty_rule_lists_match_nothing():
+    validator = RuleBasedValidator({"banned_terms": [], "pii_patterns": {}})
+    assert validator._banned_re is None and validator._pii_re is None
+    assert validator.validate_response({"answer": "hack me at jane@example.com"}).valid
+
+
+def test_result_reads_like_the_old_dict():
+    result = RuleBasedValidator().validate_response({"answer": "ok"})
+    assert result["valid"] is False and result.get("errors") == result.errors
+    assert "valid" in result and "score" not in result
+    assert result.get("score") is None and result.get("score", 0) == 0
+    assert dict(result) == {"valid": False, "errors": result.errors}
+    try:
+        result["score"]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("unknown key did not raise KeyError")
+
+
+def test_matches_per_call_checks():
+    validator = RuleBasedValidator()
+    responses = make_responses(3000, seed=11) + [
+        {"answer": "Email JANE.DOE@EXAMPLE.ORG or call 555.123.4567."},
+        {"answer": "x" * 5001, "sources": ["doc-1"]},
+        {"sources": ["doc-1"]},
+        "not a dict",
+    ]
+    mismatches = [
+        response for response in responses
+        if list(validator.validate_response(response).errors) != _legacy_errors(response)
+    ]
+    assert not mismatches, f"{len(mismatches)} responses differ, first: {mismatches[0]!r}"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RuleBasedValidator Rule Tests")
+    print("=" * 60)
+
+    tests = [
+        test_from_config_overrides_defaults,
+        test_banned_terms_are_case_insensitive_substrings,
+        test_empty_rule_lists_match_nothing,
+        test_result_reads_like_the_old_dict,
+        test_matches_per_call_checks,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 60)
+    print("✅ All tests passed!" if not failed else f"❌ {failed} test(s) failed.")